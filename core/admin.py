@@ -1,22 +1,132 @@
 # core/admin.py
 from __future__ import annotations
 
-from typing import Any
-
-from django.contrib import admin
-from django.contrib.admin.utils import label_for_field, lookup_field
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
-from django.http import HttpRequest, HttpResponse
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 from django.urls import path
-from django.utils import formats
-
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+from django.utils.crypto import constant_time_compare
+
+from . import perf
+
+from .export_jobs import enqueue_export
+from .exports import (
+    EXPORTERS,
+    aiter_chunks,
+    get_admin_columns_and_headers,
+    get_export_model_admins,
+    get_export_queryset,
+    get_exporter,
+    iter_admin_rows,
+    select_columns,
+)
+from .forms import AdminExportForm, ModerationFilterForm
+from .models import ApplicationStatusChange, Category, Event, ExportJob, VolunteerApplication, EventLike
+from .moderation import ModerationResult, fill_free_seats, moderate_applications
+from .pagination import EstimatedCountPaginator, InvalidCursor, paginate_keyset
+from .search import prefix_query
+
+
+# Changelist'ы больших таблиц (заявки, лайки, мероприятия, журнал статусов):
+# - связанные объекты строк — одним JOIN (list_select_related), а не запросом на строку;
+# - фильтр по мероприятию — поле автодополнения, а не список всех мероприятий в сайдбаре;
+# - поиск по индексам: начало username (auth_user_username_*_like) и слова
+#   названия мероприятия (GIN search_vector), без JOIN + ILIKE '%...%';
+# - число строк — оценка планировщика выше порога (EstimatedCountPaginator),
+#   без второго COUNT(*) по всей таблице (show_full_result_count) и без фасетов.
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(f, type) and issubclass(f, AutocompleteFilter) for f in self.list_filter):
+            # select2 и admin/js/autocomplete.js для полей фильтров
+            media += AutocompleteSelect(VolunteerApplication._meta.get_field("event"), self.admin_site).media
+        return media
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    Фильтр по внешнему ключу полем автодополнения (admin autocomplete view +
+    search_fields связанной модели): в сайдбар не выводятся все объекты.
+    """
 
-from .forms import AdminExportForm
-from .models import Category, Event, VolunteerApplication, EventLike
+    template = "admin/autocomplete_filter.html"
+    field_name = ""
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = f"{self.field_name}__id__exact"
+        super().__init__(request, params, model, model_admin)
+        value = self.value()
+        if value is not None and not value.isdigit():
+            raise IncorrectLookupParameters(f"{self.parameter_name}={value!r}")
+
+        field = model._meta.get_field(self.field_name)
+        self.title = self.title or field.verbose_name
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.related_model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self) -> bool:
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        return queryset.filter(**{self.parameter_name: self.value()})
+
+    def choices(self, changelist):
+        # «Все» — ссылка без параметра; остальные параметры сохраняет шаблон
+        yield {
+            "selected": self.value() is None,
+            "query_string": changelist.get_query_string(remove=[self.parameter_name]),
+            "display": "Все",
+        }
+
+    def rendered_widget(self) -> str:
+        return self.form_field.widget.render(
+            self.parameter_name,
+            self.value(),
+            attrs={"id": f"id_filter_{self.parameter_name}", "style": "width: 100%"},
+        )
+
+
+class EventAutocompleteFilter(AutocompleteFilter):
+    field_name = "event"
+    title = "мероприятию"
+
+
+def _search_by_user_or_event(queryset, search_term: str):
+    """
+    Поиск заявок/лайков: начало имени пользователя (LIKE 'abc%' по индексу
+    *_like на auth_user.username) или слова названия мероприятия (GIN
+    search_vector). Ветки объединены UNION по id — каждая идёт по своему индексу.
+    """
+    term = search_term.strip()
+    if not term:
+        return queryset, False
+    model = queryset.model
+    ids = model.objects.filter(user__username__startswith=term).values("pk")
+    query = prefix_query(term)
+    if query is not None:
+        ids = ids.union(model.objects.filter(event__search_vector=query).values("pk"))
+    return queryset.filter(pk__in=ids), False
 
 
 @admin.register(Category)
@@ -26,66 +136,138 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "category", "event_date", "location", "created_at")
+class EventAdmin(LargeTableAdmin):
+    list_display = (
+        "id", "title", "category", "event_date", "location",
+        "likes_count", "applications_count", "capacity", "seats_taken", "created_at",
+    )
     list_filter = ("category",)
+    list_select_related = ("category",)
+    # поле поиска в changelist; сам поиск — по GIN-индексу search_vector, а не ILIKE '%...%'
     search_fields = ("title", "location")
 
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            return
+        # счётчики (лайки, заявки, места) меняются параллельно с редактированием —
+        # пишем только поля формы, иначе save() вернул бы прочитанные значения
+        if form.changed_data:
+            obj.save(update_fields=[*form.changed_data, "updated_at"])
+        # мест стало больше — лист ожидания занимает их сразу
+        if "capacity" in form.changed_data:
+            promoted = fill_free_seats(obj.pk)
+            if promoted:
+                messages.info(request, f"Из листа ожидания на новые места: {promoted}.")
+
+    def get_search_results(self, request, queryset, search_term):
+        query = prefix_query(search_term)
+        if query is None:
+            return queryset, False
+        return queryset.filter(search_vector=query), False
+
+
+def _report_moderation(request: HttpRequest, result: ModerationResult, status: str) -> None:
+    label = VolunteerApplication.Status(status).label.lower()
+    messages.success(request, f"Заявок переведено в статус «{label}»: {result.changed}.")
+    if result.no_seats:
+        messages.warning(
+            request,
+            f"Не одобрено из-за нехватки мест: {result.skipped_for_capacity} "
+            f"(мероприятия: {', '.join(map(str, sorted(result.no_seats)))}).",
+        )
+    if result.promoted:
+        messages.info(request, f"Из листа ожидания на освободившиеся места: {result.promoted}.")
+
 
 @admin.register(VolunteerApplication)
-class VolunteerApplicationAdmin(admin.ModelAdmin):
+class VolunteerApplicationAdmin(LargeTableAdmin):
     list_display = ("id", "user", "event", "status", "created_at")
-    list_filter = ("status", "event")
+    list_filter = ("status", EventAutocompleteFilter)
+    list_select_related = ("user", "event")
+    # поле поиска; сам поиск — _search_by_user_or_event
     search_fields = ("user__username", "event__title")
+    search_help_text = "Начало имени пользователя или слова из названия мероприятия."
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("event",)
+    actions = ("approve_selected", "reject_selected")
+
+    @admin.action(description="Одобрить выбранные заявки", permissions=["change"])
+    def approve_selected(self, request, queryset):
+        self._moderate(request, queryset, VolunteerApplication.Status.APPROVED)
+
+    @admin.action(description="Отклонить выбранные заявки", permissions=["change"])
+    def reject_selected(self, request, queryset):
+        self._moderate(request, queryset, VolunteerApplication.Status.REJECTED)
+
+    def _moderate(self, request, queryset, status: str) -> None:
+        # одним UPDATE по id, без загрузки объектов и save() каждого
+        ids = queryset.order_by().values_list("pk", flat=True)
+        _report_moderation(request, moderate_applications(ids, status, request.user), status)
+
+    def save_model(self, request, obj, form, change):
+        # статус меняется только через moderate_applications: места (условный UPDATE
+        # под блокировкой мероприятия), журнал. Новая заявка создаётся в листе
+        # ожидания, не занимая места, и уже оттуда переводится в выбранный статус.
+        new_status = obj.status
+        if change:
+            obj.status = form.initial["status"]
+            fields = [name for name in form.changed_data if name != "status"]
+            if fields:
+                obj.save(update_fields=[*fields, "updated_at"])
+        else:
+            obj.status = VolunteerApplication.Status.WAITLISTED
+            obj.save()
+        if new_status != obj.status:
+            result = moderate_applications([obj.pk], new_status, request.user)
+            if result.changed:
+                obj.status = new_status
+            else:
+                _report_moderation(request, result, new_status)
 
+    def get_search_results(self, request, queryset, search_term):
+        return _search_by_user_or_event(queryset, search_term)
 
-@admin.register(EventLike)
-class EventLikeAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "event", "created_at")
-    search_fields = ("user__username", "event__title")
 
+@admin.register(ApplicationStatusChange)
+class ApplicationStatusChangeAdmin(LargeTableAdmin):
+    """Журнал только для чтения: записи добавляет moderate_applications."""
 
-def _format_admin_value(value: Any) -> Any:
-    if value is None:
-        return ""
+    list_display = ("id", "application", "old_status", "new_status", "changed_by", "created_at")
+    list_filter = ("new_status",)
+    list_select_related = ("application__user", "application__event", "changed_by")
+    raw_id_fields = ("application",)
 
-    if isinstance(value, bool):
-        return "Да" if value else "Нет"
+    def has_add_permission(self, request):
+        return False
 
-    if isinstance(value, models.Model):
-        return str(value)
+    def has_change_permission(self, request, obj=None):
+        return False
 
-    # datetime/date: локализованный формат как в админке
-    if hasattr(value, "strftime"):
-        try:
-            return formats.localize(value)
-        except Exception:
-            return str(value)
+    def has_delete_permission(self, request, obj=None):
+        return False
 
-    if isinstance(value, (list, tuple, set)):
-        return ", ".join(str(x) for x in value)
 
-    return value
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "model_label", "format", "status", "rows_processed", "rows_total", "requested_by", "created_at")
+    list_filter = ("status",)
+    list_select_related = ("requested_by",)
+    readonly_fields = ("rows_total", "rows_processed", "started_at", "finished_at", "error")
 
 
-def _get_admin_columns_and_headers(
-    request: HttpRequest,
-    model_admin: admin.ModelAdmin,
-) -> tuple[list[str], list[str]]:
-    """
-    Базовые колонки (как в list_display) + заголовки.
-    """
-    columns = list(model_admin.get_list_display(request))
-    headers: list[str] = []
-
-    for col in columns:
-        try:
-            header = label_for_field(col, model_admin.model, model_admin=model_admin, return_attr=False)
-        except Exception:
-            header = col
-        headers.append(str(header))
+@admin.register(EventLike)
+class EventLikeAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "event", "created_at")
+    list_filter = (EventAutocompleteFilter,)
+    list_select_related = ("user", "event")
+    search_fields = ("user__username", "event__title")
+    search_help_text = "Начало имени пользователя или слова из названия мероприятия."
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("event",)
 
-    return columns, headers
+    def get_search_results(self, request, queryset, search_term):
+        return _search_by_user_or_event(queryset, search_term)
 
 
 def _get_fields_choices_for_model(
@@ -97,52 +279,29 @@ def _get_fields_choices_for_model(
     - choices для чекбоксов: (column_name, header)
     - список всех column_name (для initial)
     """
-    columns, headers = _get_admin_columns_and_headers(request, model_admin)
+    columns, headers = get_admin_columns_and_headers(request, model_admin)
     choices = list(zip(columns, headers))
     return choices, columns
 
 
-def _get_admin_row_values(
-    model_admin: admin.ModelAdmin,
-    obj: models.Model,
-    columns: list[str],
-) -> list[Any]:
-    row: list[Any] = []
-
-    for col in columns:
-        try:
-            _, _, value = lookup_field(col, obj, model_admin)
-        except ObjectDoesNotExist:
-            value = ""
-        except Exception:
-            value = ""
-
-        row.append(_format_admin_value(value))
-
-    return row
-
-
 def export_xlsx_view(request: HttpRequest) -> HttpResponse:
     """
-    Экспорт XLSX:
+    Экспорт данных:
     - выбираем одну модель
     - выбираем набор колонок (list_display)
+    - выбираем формат: потоковые (CSV/JSONL) отдаются сразу,
+      остальные (XLSX) собираются фоновой задачей
     """
     if not request.user.is_authenticated or not request.user.is_staff:
         return HttpResponse("Forbidden", status=403)
 
     # текущие ModelAdmin из стандартного admin.site
-    model_admin_map: dict[str, admin.ModelAdmin] = {
-        "core.Category": admin.site._registry.get(Category),
-        "core.Event": admin.site._registry.get(Event),
-        "core.VolunteerApplication": admin.site._registry.get(VolunteerApplication),
-        "core.EventLike": admin.site._registry.get(EventLike),
-    }
-    model_admin_map = {k: v for k, v in model_admin_map.items() if v is not None}
+    model_admin_map = get_export_model_admins()
 
     # --- Формирование формы ---
     form = AdminExportForm(request.POST or None)
     form.fields["model"].choices = [(k, k) for k in model_admin_map.keys()]
+    form.fields["format"].choices = [(name, exporter.label) for name, exporter in EXPORTERS.items()]
 
     selected_model_label = None
     selected_model_admin: admin.ModelAdmin | None = None
@@ -170,7 +329,7 @@ def export_xlsx_view(request: HttpRequest) -> HttpResponse:
         selected_model_admin = model_admin_map.get(selected_model_label)
 
         if selected_model_admin is None:
-            return TemplateResponse(request, "admin/export_xlsx.html", {"form": form})
+            return TemplateResponse(request, "admin/export_xlsx.html", _export_context(request, form))
 
         # права на просмотр модели
         app_label = selected_model_admin.model._meta.app_label
@@ -185,42 +344,149 @@ def export_xlsx_view(request: HttpRequest) -> HttpResponse:
             if not form.cleaned_data.get("fields"):
                 _, all_columns = _get_fields_choices_for_model(request, selected_model_admin)
                 form.initial["fields"] = all_columns
-            return TemplateResponse(request, "admin/export_xlsx.html", {"form": form})
+            return TemplateResponse(request, "admin/export_xlsx.html", _export_context(request, form))
 
         # если нажали "Скачать"
         selected_fields: list[str] = form.cleaned_data.get("fields") or []
-        all_columns, all_headers = _get_admin_columns_and_headers(request, selected_model_admin)
+        all_columns, all_headers = get_admin_columns_and_headers(request, selected_model_admin)
+        # оставляем только выбранные, сохраняя порядок list_display (пусто = все)
+        columns, headers = select_columns(all_columns, all_headers, selected_fields)
+        exporter = get_exporter(form.cleaned_data["format"])
+
+        if exporter.streaming:
+            # строки уходят клиенту по мере чтения queryset, без файла и без воркера
+            qs = get_export_queryset(request, selected_model_admin, columns)
+            rows = iter_admin_rows(selected_model_admin, qs, columns)
+            chunks = exporter.iter_chunks(columns, headers, rows)
+            if isinstance(request, ASGIRequest):
+                chunks = aiter_chunks(chunks)
+            resp = StreamingHttpResponse(chunks, content_type=exporter.content_type)
+            resp["Content-Disposition"] = f'attachment; filename="export.{exporter.extension}"'
+            return resp
+
+        # остальные форматы — задача в очередь, файл строит run_export_worker
+        job = enqueue_export(request.user, selected_model_label, columns, exporter.name)
+        return redirect("admin:export_job", pk=job.pk)
+
+    return TemplateResponse(request, "admin/export_xlsx.html", _export_context(request, form))
+
+
+def _export_context(request: HttpRequest, form: AdminExportForm) -> dict:
+    recent_jobs = ExportJob.objects.filter(requested_by=request.user).order_by("-created_at")[:10]
+    return {"form": form, "recent_jobs": recent_jobs}
 
-        if selected_fields:
-            # оставляем только выбранные, сохраняя порядок list_display
-            columns = [c for c in all_columns if c in set(selected_fields)]
-        else:
-            # если ничего не выбрано — выгружаем все
-            columns = all_columns
 
-        # заголовки под выбранные колонки
-        headers_map = dict(zip(all_columns, all_headers))
-        headers = [headers_map.get(c, c) for c in columns]
+def _get_export_job_or_404(request: HttpRequest, pk: int) -> ExportJob:
+    job = get_object_or_404(ExportJob, pk=pk)
+    if not (request.user.is_superuser or job.requested_by_id == request.user.pk):
+        raise Http404
+    return job
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = selected_model_label.split(".")[-1][:31]
 
-        ws.append(headers)
+def export_job_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """Страница прогресса фоновой выгрузки (обновляется сама, пока задача не завершится)."""
+    job = _get_export_job_or_404(request, pk)
+    return TemplateResponse(request, "admin/export_job.html", {"job": job, "title": f"Экспорт #{job.pk}"})
 
-        qs = selected_model_admin.get_queryset(request).order_by("id")[:5000]
-        for obj in qs:
-            ws.append(_get_admin_row_values(selected_model_admin, obj, columns))
 
-        for i, header in enumerate(headers, start=1):
-            ws.column_dimensions[get_column_letter(i)].width = max(12, min(45, len(str(header)) + 6))
+def export_job_download(request: HttpRequest, pk: int) -> HttpResponse:
+    job = _get_export_job_or_404(request, pk)
+    if job.status != ExportJob.Status.DONE or not job.file:
+        raise Http404
+    exporter = get_exporter(job.format)
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=f"export.{exporter.extension}",
+        content_type=exporter.content_type,
+    )
 
-        resp = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        resp["Content-Disposition"] = 'attachment; filename="export.xlsx"'
-        wb.save(resp)
-        return resp
 
-    return TemplateResponse(request, "admin/export_xlsx.html", {"form": form})
+def _moderation_queryset(filters: ModerationFilterForm):
+    status = filters.cleaned_data.get("status") or VolunteerApplication.Status.NEW
+    qs = VolunteerApplication.objects.filter(status=status)
+    if filters.cleaned_data.get("event"):
+        qs = qs.filter(event_id=filters.cleaned_data["event"])
+    return qs
+
+
+def moderation_view(request: HttpRequest) -> HttpResponse:
+    """
+    Модерация заявок потоком: очередь в порядке подачи (keyset по created_at, id),
+    одобрение/отклонение выбранных или всех подходящих под фильтр одной операцией.
+    """
+    if not request.user.has_perm("core.change_volunteerapplication"):
+        return HttpResponse("Forbidden", status=403)
+
+    filters = ModerationFilterForm(request.GET)
+    filters.is_valid()  # поле с ошибкой просто не фильтрует
+    queryset = _moderation_queryset(filters)
+
+    if request.method == "POST":
+        status = request.POST.get("status")
+        if status not in (VolunteerApplication.Status.APPROVED, VolunteerApplication.Status.REJECTED):
+            return HttpResponse("Bad request", status=400)
+        if request.POST.get("scope") == "all":
+            ids = list(queryset.order_by("created_at", "pk").values_list("pk", flat=True)[: settings.MODERATION_MAX_BATCH])
+        else:
+            ids = [int(pk) for pk in request.POST.getlist("ids") if pk.isdigit()]
+        _report_moderation(request, moderate_applications(ids, status, request.user), status)
+        return redirect(request.get_full_path())
+
+    try:
+        page = paginate_keyset(
+            queryset.select_related("user", "event").only(
+                "created_at", "status", "motivation", "user__username",
+                "event__title", "event__event_date", "event__capacity", "event__seats_taken",
+            ),
+            keys=("created_at", "id"),
+            per_page=settings.MODERATION_PAGE_SIZE,
+            cursor=request.GET.get("cursor") or None,
+            descending=False,
+        )
+    except InvalidCursor:
+        return redirect(request.path)
+
+    event_id = filters.cleaned_data.get("event")
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    return TemplateResponse(
+        request,
+        "admin/moderation.html",
+        {
+            "title": "Модерация заявок",
+            "filters": filters,
+            "page": page,
+            "event": Event.objects.filter(pk=event_id).first() if event_id else None,
+            "query": params.urlencode(),
+            "max_batch": settings.MODERATION_MAX_BATCH,
+            "statuses": VolunteerApplication.Status,
+        },
+    )
+
+
+def perf_view(request: HttpRequest) -> HttpResponse:
+    """Латентность и SQL по вьюхам (окно последних запросов этого процесса)."""
+    return TemplateResponse(
+        request,
+        "admin/perf.html",
+        {
+            "title": "Производительность",
+            "stats": perf.registry.snapshot(),
+            "budgets": settings.PERF_QUERY_BUDGETS,
+        },
+    )
+
+
+def perf_metrics_view(request: HttpRequest) -> HttpResponse:
+    """Те же метрики в текстовом формате Prometheus: для staff или по PERF_METRICS_TOKEN."""
+    token = settings.PERF_METRICS_TOKEN
+    authorized = request.user.is_active and request.user.is_staff
+    if token and not authorized:
+        authorized = constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    if not authorized:
+        return HttpResponse("Forbidden", status=403)
+    return HttpResponse(perf.prometheus_text(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # Просто добавляем URL в существующий admin.site через обёртку.
@@ -231,6 +497,15 @@ def _patched_get_urls():
     urls = _original_get_urls()
     custom = [
         path("export-xlsx/", admin.site.admin_view(export_xlsx_view), name="export_xlsx"),
+        path("export-xlsx/jobs/<int:pk>/", admin.site.admin_view(export_job_view), name="export_job"),
+        path(
+            "export-xlsx/jobs/<int:pk>/download/",
+            admin.site.admin_view(export_job_download),
+            name="export_job_download",
+        ),
+        path("moderation/", admin.site.admin_view(moderation_view), name="moderation"),
+        path("perf/", admin.site.admin_view(perf_view), name="perf"),
+        path("perf/metrics/", perf_metrics_view, name="perf_metrics"),
     ]
     return custom + urls
 
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401  (регистрация обработчиков)
+        from .perf import install_query_recorder, install_template_timer
+
+        install_query_recorder()
+        install_template_timer()
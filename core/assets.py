@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import re
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+# Фронтенд собирается из файлов в репозитории, без CDN и без сети:
+# assets/vendor/ — закреплённые версии сторонних библиотек (скачиваются один раз
+# командой build_assets --fetch и коммитятся), static/css/app.css — свои стили.
+# Сборка кладёт по одному файлу на тип в static/dist/; хеш в имени
+# и .gz/.br-варианты добавляет collectstatic (CompressedManifestStaticFilesStorage).
+VENDOR_DIR = Path(settings.BASE_DIR) / "assets" / "vendor"
+SOURCE_DIR = Path(settings.BASE_DIR) / "static"
+BUILD_DIR = SOURCE_DIR / "dist"
+
+
+@dataclass(frozen=True)
+class VendorFile:
+    path: str
+    url: str
+    # SRI-хеш опубликованного файла: --fetch проверяет, что скачано именно это
+    # (и по нему же сверяется закоммиченная копия в assets/vendor/)
+    integrity: str
+
+
+VENDOR_FILES = (
+    VendorFile(
+        "bootstrap/bootstrap.min.css",
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist/css/bootstrap.min.css",
+        "sha384-sRIl4kxILFvY47J16cr9ZwB07vP4J8+LH7qKQnuqkuIAvNWLzeN8tE5YBujZqJLB",
+    ),
+    VendorFile(
+        "bootstrap/bootstrap.bundle.min.js",
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist/js/bootstrap.bundle.min.js",
+        "sha384-FKyoEForCGlyvwx9Hj09JcYn3nv7wiPVlz7YYwJrWVcXK/BmnVDxM+D2scQbITxI",
+    ),
+)
+
+# бандл -> исходники в порядке подключения ("vendor/..." — из VENDOR_DIR, остальное — из static/)
+BUNDLES = {
+    "app.css": ["vendor/bootstrap/bootstrap.min.css", "css/app.css"],
+    "app.js": ["vendor/bootstrap/bootstrap.bundle.min.js"],
+}
+
+# ссылка на .map, которого нет рядом с бандлом: ManifestStaticFilesStorage на ней падает
+_SOURCE_MAP = re.compile(r"^\s*(/\*#\s*sourceMappingURL=.*?\*/|//#\s*sourceMappingURL=.*)$", re.MULTILINE)
+_CSS_COMMENT = re.compile(r"/\*(?!!).*?\*/", re.DOTALL)  # /*! ... */ — лицензии, оставляем
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_CSS_BLOCK = re.compile(r"\{[^{}]*\}")
+_CSS_COLON = re.compile(r"\s*:\s*")
+
+
+class AssetError(Exception):
+    pass
+
+
+def minify_css(css: str) -> str:
+    """Простая минификация своих стилей: комментарии и лишние пробелы."""
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_SPACE.sub(" ", css)
+    css = _CSS_PUNCT.sub(r"\1", css)
+    # «свойство: значение» только внутри блоков: в селекторах «a :hover» ≠ «a:hover»
+    css = _CSS_BLOCK.sub(lambda block: _CSS_COLON.sub(":", block.group()), css)
+    return css.replace(";}", "}").strip()
+
+
+def _source_path(name: str) -> Path:
+    if name.startswith("vendor/"):
+        return VENDOR_DIR / name.removeprefix("vendor/")
+    return SOURCE_DIR / name
+
+
+def _read_source(name: str) -> str:
+    path = _source_path(name)
+    if not path.exists():
+        hint = " (run build_assets --fetch and commit assets/vendor/)" if name.startswith("vendor/") else ""
+        raise AssetError(f"{path} not found{hint}")
+    data = path.read_bytes()
+    vendor = next((v for v in VENDOR_FILES if f"vendor/{v.path}" == name), None)
+    if vendor is not None and _integrity(data) != vendor.integrity:
+        raise AssetError(f"{path}: integrity mismatch with VENDOR_FILES (re-run build_assets --fetch)")
+    text = _SOURCE_MAP.sub("", data.decode("utf-8"))
+    # уже минифицированные файлы не трогаем
+    if name.endswith(".css") and ".min." not in name:
+        text = minify_css(text)
+    return text.strip()
+
+
+def build_bundles() -> dict[str, int]:
+    """Собирает BUNDLES в BUILD_DIR. Возвращает {имя бандла: байт}."""
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for bundle, sources in BUNDLES.items():
+        separator = "\n" if bundle.endswith(".css") else ";\n"
+        content = separator.join(_read_source(name) for name in sources) + "\n"
+        data = content.encode("utf-8")
+        target = BUILD_DIR / bundle
+        # без изменений — не переписываем (mtime не дёргает collectstatic)
+        if not target.exists() or target.read_bytes() != data:
+            target.write_bytes(data)
+        sizes[bundle] = len(data)
+    return sizes
+
+
+def _integrity(data: bytes) -> str:
+    return "sha384-" + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+def fetch_vendor_files(timeout: float = 30.0) -> list[str]:
+    """Скачивает VENDOR_FILES (единственный шаг, которому нужна сеть) и сверяет SRI-хеши."""
+    fetched = []
+    for vendor in VENDOR_FILES:
+        with urllib.request.urlopen(vendor.url, timeout=timeout) as response:
+            data = response.read()
+        if _integrity(data) != vendor.integrity:
+            raise AssetError(f"{vendor.url}: integrity mismatch")
+        path = VENDOR_DIR / vendor.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        fetched.append(vendor.path)
+    return fetched
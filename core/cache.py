@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from functools import wraps
+from typing import Awaitable, Callable, Iterable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+
+# Инвалидация через версии: ключи страниц/фрагментов содержат номер версии,
+# изменение данных просто увеличивает версию — старые записи вытесняются сами.
+LIST_VERSION_KEY = "events:list:version"
+CATEGORIES_VERSION_KEY = "events:categories:version"
+
+
+def _event_version_key(event_id: int) -> str:
+    return f"events:event:{event_id}:version"
+
+
+def _initial_version() -> int:
+    # если ключ версии вытеснили из кэша, новая версия не совпадёт ни с одной прежней
+    return time.time_ns()
+
+
+def _get_versions(keys: list[str]) -> dict[str, int]:
+    versions = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return versions
+
+
+def _bump(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def get_list_version() -> int:
+    return _get_versions([LIST_VERSION_KEY])[LIST_VERSION_KEY]
+
+
+def get_event_versions(event_ids: Iterable[int]) -> dict[int, int]:
+    ids = list(event_ids)
+    versions = _get_versions([_event_version_key(pk) for pk in ids])
+    return {pk: versions[_event_version_key(pk)] for pk in ids}
+
+
+def attach_card_cache_keys(events: Iterable) -> None:
+    """
+    event.card_cache_key — часть ключа фрагмента карточки в шаблоне:
+    версия мероприятия + версия категорий. Одним get_many на страницу.
+    """
+    events = list(events)
+    versions = get_event_versions(e.pk for e in events)
+    categories_version = _get_versions([CATEGORIES_VERSION_KEY])[CATEGORIES_VERSION_KEY]
+    for event in events:
+        event.card_cache_key = f"{versions[event.pk]}.{categories_version}"
+
+
+def invalidate_event(event_id: int) -> None:
+    """Изменилось мероприятие (или его лайки/заявки): его страница, карточка и списки."""
+    _bump(_event_version_key(event_id))
+    _bump(LIST_VERSION_KEY)
+
+
+def invalidate_event_lists() -> None:
+    """Изменился порядок в лентах (например, рейтинг «в тренде»), сами мероприятия — нет."""
+    _bump(LIST_VERSION_KEY)
+
+
+def invalidate_categories() -> None:
+    _bump(CATEGORIES_VERSION_KEY)
+    _bump(LIST_VERSION_KEY)
+
+
+def _page_cache_key(request: HttpRequest, kwargs: dict) -> str:
+    parts = [str(get_list_version())]
+    if "pk" in kwargs:
+        parts.append(str(get_event_versions([kwargs["pk"]])[kwargs["pk"]]))
+    path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"page:{':'.join(parts)}:{path_hash}"
+
+
+def is_cacheable_request(request: HttpRequest) -> bool:
+    # только гости: у пользователя на странице своё состояние (лайки, CSRF-формы);
+    # len() не помечает сообщения прочитанными
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _cacheable_page_key(request: HttpRequest, kwargs: dict) -> str | None:
+    return _page_cache_key(request, kwargs) if is_cacheable_request(request) else None
+
+
+def cache_anonymous_page(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    """Кэширует отрендеренную страницу для гостей (ключ — версии данных + URL)."""
+    if iscoroutinefunction(view):
+        return _cache_anonymous_page_async(view)
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        key = _cacheable_page_key(request, kwargs)
+        if key is None:
+            return view(request, *args, **kwargs)
+
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, (response.content, response["Content-Type"]), settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
+
+
+def _cache_anonymous_page_async(view: Callable[..., Awaitable[HttpResponse]]) -> Callable[..., Awaitable[HttpResponse]]:
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        # пользователь — через async-путь (вьюха возьмёт его из кэша request.auser),
+        # сессия с сообщениями читается синхронно — одним переходом в поток
+        request.user = await request.auser()
+        key = await sync_to_async(_cacheable_page_key)(request, kwargs)
+        if key is None:
+            return await view(request, *args, **kwargs)
+
+        cached = await cache.aget(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            await cache.aset(key, (response.content, response["Content-Type"]), settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
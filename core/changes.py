@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import heapq
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Event, EventLike, Tombstone, VolunteerApplication
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+
+# Ленты изменений для партнёров: строки по возрастанию (updated_at, id) после
+# курсора вперемешку с удалениями (Tombstone, ключ (deleted_at, object_id)) —
+# оба потока идут по своим индексам и сливаются heapq.merge.
+# updated_at ставится в Python до коммита: строка, чья транзакция ещё идёт,
+# может появиться позже с меньшим updated_at. Поэтому отдаём только строки старше
+# CHANGES_FEED_LAG_SECONDS (как водяной знак в core/trending.py) — курсор их не перескочит.
+# Tombstone живут CHANGES_FEED_TOMBSTONE_RETENTION_DAYS: курсор старше мог пропустить
+# уже удалённые следы, такой партнёр получает CursorExpired и синхронизируется с нуля.
+
+KEYS = ("updated_at", "id")
+
+
+@dataclass(frozen=True)
+class Feed:
+    kind: str
+    model: type
+    fields: tuple[str, ...]
+    # FileField: в записи — URL, а не путь в хранилище
+    file_fields: tuple[str, ...] = ()
+
+
+FEEDS = {
+    feed.kind: feed
+    for feed in (
+        Feed(
+            Tombstone.Kind.EVENT,
+            Event,
+            ("id", "category_id", "title", "description", "location", "event_date", "capacity", "image", "created_at", "updated_at"),
+            file_fields=("image",),
+        ),
+        Feed(Tombstone.Kind.LIKE, EventLike, ("id", "user_id", "event_id", "created_at", "updated_at")),
+        Feed(
+            Tombstone.Kind.APPLICATION,
+            VolunteerApplication,
+            ("id", "user_id", "event_id", "status", "created_at", "updated_at"),
+        ),
+    )
+}
+
+
+def record_deletion(kind: str, object_id: int) -> None:
+    Tombstone.objects.create(kind=kind, object_id=object_id, deleted_at=timezone.now())
+
+
+class CursorExpired(Exception):
+    """Курсор старше срока хранения Tombstone: удаления за этот период могли быть потеряны."""
+
+
+def tombstone_cutoff() -> datetime:
+    days = settings.CHANGES_FEED_TOMBSTONE_RETENTION_DAYS
+    if days < 1:
+        raise ImproperlyConfigured(f"CHANGES_FEED_TOMBSTONE_RETENTION_DAYS must be at least 1, got {days!r}")
+    return timezone.now() - timedelta(days=days)
+
+
+def delete_expired_tombstones(batch_size: int, pause: float = 0.0) -> int:
+    """
+    Удаляет Tombstone старше срока хранения пачками по batch_size (по индексу
+    (kind, deleted_at)): каждая пачка — короткий DELETE в своей транзакции,
+    как у cleanup_sessions.
+    """
+    cutoff = tombstone_cutoff()
+    deleted = 0
+    for kind in Tombstone.Kind.values:
+        while True:
+            expired = Tombstone.objects.filter(kind=kind, deleted_at__lt=cutoff).order_by("deleted_at")
+            keys = list(expired.values_list("pk", flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += Tombstone.objects.filter(pk__in=keys).delete()[0]
+            if len(keys) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return deleted
+
+
+def _after(ts_field: str, id_field: str, cursor: list[Any] | None) -> Q:
+    if cursor is None:
+        return Q()
+    ts, pk = cursor
+    return Q(**{f"{ts_field}__gte": ts}) & (Q(**{f"{ts_field}__gt": ts}) | Q(**{ts_field: ts, f"{id_field}__gt": pk}))
+
+
+class ChangePage:
+    """
+    Страница ленты: итерация отдаёт не больше limit записей
+    {"op": "upsert"|"delete", "id", "updated_at", ["data"]}; после неё известны
+    next_cursor (продолжать с него) и has_more. Курсор проверяется сразу
+    (InvalidCursor, CursorExpired) — до того, как ответ начнёт стримиться.
+    """
+
+    def __init__(self, feed: Feed, cursor: str | None, limit: int) -> None:
+        self.feed = feed
+        self.limit = limit
+        self.after = decode_cursor(cursor, feed.model, KEYS) if cursor else None
+        if self.after is not None:
+            # encode_cursor пишет время с поясом; без пояса — курсор подделан
+            if timezone.is_naive(self.after[0]):
+                raise InvalidCursor("cursor timestamp has no timezone")
+            if self.after[0] < tombstone_cutoff():
+                raise CursorExpired(cursor)
+        self.next_cursor = cursor
+        self.has_more = False
+
+    def _upserts(self, upper: datetime) -> Iterator[tuple[tuple, dict]]:
+        rows = (
+            self.feed.model.objects
+            .filter(_after("updated_at", "id", self.after), updated_at__lt=upper)
+            .order_by(*KEYS)
+            .values(*self.feed.fields)[: self.limit + 1]
+        )
+        for row in rows.iterator(chunk_size=settings.CHANGES_FEED_CHUNK_SIZE):
+            for name in self.feed.file_fields:
+                row[name] = default_storage.url(row[name]) if row[name] else ""
+            yield (row["updated_at"], row["id"]), {"op": "upsert", "id": row["id"], "updated_at": row["updated_at"], "data": row}
+
+    def _deletes(self, upper: datetime) -> Iterator[tuple[tuple, dict]]:
+        rows = (
+            Tombstone.objects
+            .filter(_after("deleted_at", "object_id", self.after), kind=self.feed.kind, deleted_at__lt=upper)
+            .order_by("deleted_at", "object_id")
+            .values_list("deleted_at", "object_id")[: self.limit + 1]
+        )
+        for deleted_at, object_id in rows.iterator(chunk_size=settings.CHANGES_FEED_CHUNK_SIZE):
+            yield (deleted_at, object_id), {"op": "delete", "id": object_id, "updated_at": deleted_at}
+
+    def __iter__(self) -> Iterator[dict]:
+        upper = timezone.now() - timedelta(seconds=settings.CHANGES_FEED_LAG_SECONDS)
+        merged = heapq.merge(self._upserts(upper), self._deletes(upper), key=lambda item: item[0])
+        for i, (key, record) in enumerate(islice(merged, self.limit + 1)):
+            if i == self.limit:
+                self.has_more = True
+                break
+            self.next_cursor = encode_cursor(key)
+            yield record
+
+
+def iter_json(page: ChangePage) -> Iterator[str]:
+    """JSON-ответ по частям: записи сериализуются по одной, по мере чтения из БД."""
+    yield f'{{"kind": {json.dumps(page.feed.kind)}, "results": ['
+    for i, record in enumerate(page):
+        yield ("," if i else "") + json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+    yield f'], "next_cursor": {json.dumps(page.next_cursor)}, "has_more": {json.dumps(page.has_more)}}}'
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Event, EventLike, NextEventVersion, VolunteerApplication, VolunteerStats
+
+# колонки VolunteerStats: заявки по статусам и лайки
+STATS_FIELDS = [f"applications_{status}" for status in VolunteerApplication.Status.values] + ["likes_count"]
+
+
+def application_stats_field(status: str) -> str:
+    return f"applications_{status}"
+
+
+def _shifted(field: str, delta: int):
+    # уменьшение не уходит ниже нуля (CHECK у PositiveIntegerField), даже если
+    # счётчик успел разойтись с данными — такое чинит recount_counters
+    if delta < 0:
+        return Greatest(F(field) + delta, Value(0))
+    return F(field) + delta
+
+
+def adjust_event_counters(event_id: int, *, likes: int = 0, applications: int = 0, seats: int = 0) -> None:
+    """
+    Атомарно сдвигает счётчики мероприятия одним UPDATE (F-выражения),
+    без чтения строки в Python.
+    """
+    changes = {}
+    if likes:
+        changes["likes_count"] = _shifted("likes_count", likes)
+    if applications:
+        changes["applications_count"] = _shifted("applications_count", applications)
+    if seats:
+        changes["seats_taken"] = _shifted("seats_taken", seats)
+    if changes:
+        Event.objects.filter(pk=event_id).update(**changes, version=NextEventVersion())
+
+
+def _count_subquery(model, **filters) -> Coalesce:
+    counts = (
+        model.objects
+        .filter(event=OuterRef("pk"), **filters)
+        .order_by()
+        .values("event")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def recount_event_counters(queryset: QuerySet[Event] | None = None, *, dry_run: bool = False) -> int:
+    """
+    Пересчитывает likes_count/applications_count/seats_taken из исходных таблиц.
+    Обновляются только строки с расхождением; возвращает их количество.
+    """
+    qs = (queryset if queryset is not None else Event.objects.all()).annotate(
+        real_likes=_count_subquery(EventLike),
+        real_applications=_count_subquery(VolunteerApplication),
+        real_seats=_count_subquery(VolunteerApplication, status__in=VolunteerApplication.SEAT_STATUSES),
+    )
+    drifted = qs.filter(
+        ~Q(likes_count=F("real_likes"))
+        | ~Q(applications_count=F("real_applications"))
+        | ~Q(seats_taken=F("real_seats"))
+    )
+
+    if dry_run:
+        return drifted.count()
+
+    # один UPDATE ... SET col = (SELECT COUNT(*) ...) по рассинхронизированным строкам
+    return Event.objects.filter(pk__in=drifted.values("pk")).update(
+        likes_count=_count_subquery(EventLike),
+        applications_count=_count_subquery(VolunteerApplication),
+        seats_taken=_count_subquery(VolunteerApplication, status__in=VolunteerApplication.SEAT_STATUSES),
+        version=NextEventVersion(),
+    )
+
+
+# --- сводка кабинета волонтёра (VolunteerStats) ---
+
+
+def shift_user_stats(deltas: Mapping[int, Mapping[str, int]]) -> None:
+    """
+    Сдвигает счётчики VolunteerStats сразу у многих пользователей одним UPDATE
+    (unnest массивов по колонкам). deltas: {user_id: {колонка: сдвиг}}.
+    Строка есть у каждого пользователя (создаётся вместе с ним); у созданных
+    мимо сигналов её посчитает get_volunteer_stats.
+    """
+    rows = {user_id: changes for user_id, changes in deltas.items() if any(changes.values())}
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    sql = "UPDATE {table} AS s SET {sets} FROM unnest({arrays}) AS d(user_id, {names}) WHERE s.user_id = d.user_id".format(
+        table=qn(VolunteerStats._meta.db_table),
+        sets=", ".join(f"{c} = GREATEST(s.{c} + d.{c}, 0)" for c in STATS_FIELDS),
+        arrays=", ".join(["%s::bigint[]"] + ["%s::integer[]"] * len(STATS_FIELDS)),
+        names=", ".join(STATS_FIELDS),
+    )
+    params = [list(rows)] + [[changes.get(c, 0) for changes in rows.values()] for c in STATS_FIELDS]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def create_user_stats(user_ids: Sequence[int]) -> None:
+    """
+    Строки VolunteerStats, посчитанные по заявкам и лайкам, для пользователей
+    без строки — одним INSERT ... SELECT (подзапросы по индексам (user, created_at)).
+    """
+    qn = connection.ops.quote_name
+    statuses = VolunteerApplication.Status.values
+    sql = """
+        INSERT INTO {stats} (user_id, {fields})
+        SELECT u.id, {counts}
+        FROM unnest(%(user_ids)s::bigint[]) AS u(id)
+        ON CONFLICT (user_id) DO NOTHING
+    """.format(
+        stats=qn(VolunteerStats._meta.db_table),
+        fields=", ".join(STATS_FIELDS),
+        counts=", ".join(
+            [
+                f"(SELECT count(*) FROM {qn(VolunteerApplication._meta.db_table)} AS a"
+                f" WHERE a.user_id = u.id AND a.status = %(status_{i})s)"
+                for i in range(len(statuses))
+            ]
+            + [f"(SELECT count(*) FROM {qn(EventLike._meta.db_table)} AS l WHERE l.user_id = u.id)"]
+        ),
+    )
+    params = {"user_ids": list(user_ids), **{f"status_{i}": status for i, status in enumerate(statuses)}}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def get_volunteer_stats(user) -> VolunteerStats:
+    """
+    Сводка кабинета: одна строка по первичному ключу. Строка появляется вместе
+    с пользователем (core/signals.py); нет её только у созданных мимо сигналов —
+    тогда считаем по заявкам и лайкам.
+    """
+    stats = VolunteerStats.objects.filter(user=user).first()
+    if stats is not None:
+        return stats
+    with transaction.atomic():
+        # вставка лайка или заявки берёт FOR KEY SHARE на строку пользователя (внешний
+        # ключ): FOR UPDATE дожидается их коммита, а новые ждут, пока строка не появится,
+        # и их сдвиг (shift_user_stats) уже её застанет
+        list(get_user_model().objects.select_for_update().filter(pk=user.pk).values_list("pk"))
+        create_user_stats([user.pk])
+        return VolunteerStats.objects.get(user=user)
+
+
+def _user_count_subquery(model, **filters) -> Coalesce:
+    counts = (
+        model.objects
+        .filter(user=OuterRef("user"), **filters)
+        .order_by()
+        .values("user")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def recount_user_stats(*, dry_run: bool = False) -> int:
+    """Сверяет существующие строки VolunteerStats с заявками и лайками; возвращает число расхождений."""
+    real = {
+        **{
+            application_stats_field(status): _user_count_subquery(VolunteerApplication, status=status)
+            for status in VolunteerApplication.Status.values
+        },
+        "likes_count": _user_count_subquery(EventLike),
+    }
+    qs = VolunteerStats.objects.annotate(**{f"real_{field}": expr for field, expr in real.items()})
+    drift = Q()
+    for field in STATS_FIELDS:
+        drift |= ~Q(**{field: F(f"real_{field}")})
+    drifted = qs.filter(drift)
+
+    if dry_run:
+        return drifted.count()
+    return VolunteerStats.objects.filter(pk__in=drifted.values("pk")).update(**real)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+REPLICA_ALIAS = "replica"
+PIN_COOKIE = "db_primary_pin"
+
+# Сессии, пользователи и права читаются только с primary: вход/выход и смена
+# пароля должны быть видны сразу
+PRIMARY_ONLY_APPS = {"sessions", "auth", "contenttypes", "admin"}
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+def replica_configured() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись — всегда в default (primary). Чтение — с реплики только внутри
+    вьюх, помеченных @replica_reads, и только вне транзакции.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        # внутри atomic() читаем там же, где пишем
+        if connections["default"].in_atomic_block:
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплика — копия primary, связи между объектами с разных алиасов допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # схема на реплику приходит репликацией
+        return db != REPLICA_ALIAS
+
+
+def _is_pinned(request: HttpRequest) -> bool:
+    return PIN_COOKIE in request.COOKIES
+
+
+def replica_reads(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    """
+    Чтения ORM внутри вьюхи идут на реплику (если она настроена), кроме
+    клиентов, недавно что-то записавших (см. PrimaryPinMiddleware).
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            # ORM в sync_to_async-потоках видит копию контекста — флаг доходит и туда
+            token = _replica_reads.set(replica_configured() and not _is_pinned(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        token = _replica_reads.set(replica_configured() and not _is_pinned(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+class PrimaryPinMiddleware:
+    """
+    После изменяющего запроса (POST/PUT/PATCH/DELETE) ставит короткоживущую cookie:
+    пока она есть, @replica_reads-вьюхи читают с primary (read-your-writes при
+    отставании реплики). Без реплики ничего не делает.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._pin(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        return self._pin(request, await self.get_response(request))
+
+    def _pin(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if replica_configured() and request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and response.status_code < 500:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+                secure=request.is_secure(),
+            )
+        return response
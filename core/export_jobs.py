@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import secrets
+import traceback
+from datetime import timedelta
+from typing import Any, Iterable, Iterator
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpRequest
+from django.utils import timezone
+
+from .exports import (
+    build_export_file,
+    get_admin_columns_and_headers,
+    get_export_model_admins,
+    get_exporter,
+    get_export_queryset,
+    iter_admin_rows,
+    select_columns,
+)
+from .models import ExportJob
+
+
+def enqueue_export(user, model_label: str, columns: list[str], export_format: str = "xlsx") -> ExportJob:
+    return ExportJob.objects.create(
+        requested_by=user,
+        model_label=model_label,
+        columns=columns,
+        format=export_format,
+    )
+
+
+def claim_next_job() -> ExportJob | None:
+    """
+    Забирает следующую задачу из очереди.
+
+    SELECT ... FOR UPDATE SKIP LOCKED: несколько воркеров не получат одну задачу
+    и не ждут друг друга. Зависшие RUNNING-задачи (нет прогресса дольше
+    EXPORT_JOB_STALE_AFTER секунд — воркер упал) возвращаются в работу.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_STALE_AFTER)
+    with transaction.atomic():
+        job = (
+            ExportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ExportJob.Status.QUEUED)
+                | Q(status=ExportJob.Status.RUNNING, updated_at__lt=stale_before)
+            )
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = ExportJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.rows_processed = 0
+        job.error = ""
+        job.save(update_fields=["status", "started_at", "rows_processed", "error", "updated_at"])
+    return job
+
+
+def _report_progress(job: ExportJob, rows: Iterable[list[Any]]) -> Iterator[list[Any]]:
+    # прогресс пишется раз в чанк; updated_at служит heartbeat'ом воркера
+    every = settings.EXPORT_CHUNK_SIZE
+    processed = 0
+    for row in rows:
+        yield row
+        processed += 1
+        if processed % every == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_processed=processed, updated_at=timezone.now())
+    job.rows_processed = processed
+
+
+def run_export_job(job: ExportJob) -> ExportJob:
+    """Строит файл выгрузки в формате job.format и сохраняет его в EXPORT_ROOT (не в MEDIA_ROOT)."""
+    try:
+        model_admin = get_export_model_admins().get(job.model_label)
+        if model_admin is None:
+            raise ValueError(f"Unknown model: {job.model_label}")
+        exporter = get_exporter(job.format)
+
+        # ModelAdmin ожидает request — воркер действует от имени инициатора
+        request = HttpRequest()
+        request.user = job.requested_by or AnonymousUser()
+
+        all_columns, all_headers = get_admin_columns_and_headers(request, model_admin)
+        columns, headers = select_columns(all_columns, all_headers, job.columns)
+
+        qs = get_export_queryset(request, model_admin, columns)
+        job.rows_total = qs.count()
+        job.save(update_fields=["rows_total", "updated_at"])
+
+        rows = _report_progress(job, iter_admin_rows(model_admin, qs, columns))
+        with build_export_file(exporter, job.model_label.split(".")[-1], columns, headers, rows) as result:
+            # имя не угадать по pk: файл с персональными данными
+            job.file.save(f"export-{secrets.token_urlsafe(24)}.{exporter.extension}", File(result), save=False)
+
+        job.status = ExportJob.Status.DONE
+    except Exception:
+        job.status = ExportJob.Status.FAILED
+        job.error = traceback.format_exc()
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
@@ -0,0 +1,582 @@
+from __future__ import annotations
+
+import csv
+import json
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from itertools import islice
+from typing import IO, Any, AsyncIterator, Callable, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.utils import label_for_field, lookup_field
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from django.http import HttpRequest
+from django.utils import dateformat, formats
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from .models import Category, Event, EventLike, VolunteerApplication
+
+# Модели, доступные для выгрузки (ключ — то, что выбирается в форме)
+EXPORT_MODELS: dict[str, type[models.Model]] = {
+    "core.Category": Category,
+    "core.Event": Event,
+    "core.VolunteerApplication": VolunteerApplication,
+    "core.EventLike": EventLike,
+}
+
+
+def get_export_model_admins() -> dict[str, admin.ModelAdmin]:
+    """Текущие ModelAdmin из стандартного admin.site для выгружаемых моделей."""
+    model_admins = {label: admin.site._registry.get(model) for label, model in EXPORT_MODELS.items()}
+    return {k: v for k, v in model_admins.items() if v is not None}
+
+
+def select_columns(
+    all_columns: list[str],
+    all_headers: list[str],
+    selected: Iterable[str] | None,
+) -> tuple[list[str], list[str]]:
+    """Выбранные колонки в порядке list_display (пусто = все) и их заголовки."""
+    selected = set(selected or [])
+    columns = [c for c in all_columns if c in selected] if selected else list(all_columns)
+    headers_map = dict(zip(all_columns, all_headers))
+    return columns, [headers_map.get(c, c) for c in columns]
+
+
+def format_admin_value(value: Any) -> Any:
+    if value is None:
+        return ""
+
+    if isinstance(value, bool):
+        return "Да" if value else "Нет"
+
+    if isinstance(value, models.Model):
+        return str(value)
+
+    # datetime/date: локализованный формат как в админке
+    if hasattr(value, "strftime"):
+        try:
+            return formats.localize(value)
+        except Exception:
+            return str(value)
+
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(x) for x in value)
+
+    return value
+
+
+def get_admin_columns_and_headers(
+    request: HttpRequest,
+    model_admin: admin.ModelAdmin,
+) -> tuple[list[str], list[str]]:
+    """
+    Базовые колонки (как в list_display) + заголовки.
+    """
+    columns = list(model_admin.get_list_display(request))
+    headers: list[str] = []
+
+    for col in columns:
+        try:
+            header = label_for_field(col, model_admin.model, model_admin=model_admin, return_attr=False)
+        except Exception:
+            header = col
+        headers.append(str(header))
+
+    return columns, headers
+
+
+def get_admin_row_values(
+    model_admin: admin.ModelAdmin,
+    obj: models.Model,
+    columns: list[str],
+) -> list[Any]:
+    row: list[Any] = []
+
+    for col in columns:
+        try:
+            _, _, value = lookup_field(col, obj, model_admin)
+        except ObjectDoesNotExist:
+            value = ""
+        except Exception:
+            value = ""
+
+        row.append(format_admin_value(value))
+
+    return row
+
+
+def get_select_related_for_columns(model: type[models.Model], columns: Iterable[Any]) -> list[str]:
+    """
+    FK/One-to-one пути, которые понадобятся колонкам list_display:
+    "event" -> "event", "event__category__name" -> "event__category".
+    Колонки-методы ModelAdmin/модели пропускаются.
+    """
+    related: list[str] = []
+
+    for col in columns:
+        if not isinstance(col, str):
+            continue
+
+        opts = model._meta
+        path: list[str] = []
+        for part in col.split("__"):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not (field.is_relation and field.concrete and (field.many_to_one or field.one_to_one)):
+                break
+            path.append(part)
+            opts = field.related_model._meta
+
+        if path:
+            joined = "__".join(path)
+            if joined not in related:
+                related.append(joined)
+
+    return related
+
+
+def get_export_queryset(
+    request: HttpRequest,
+    model_admin: admin.ModelAdmin,
+    columns: list[str],
+) -> models.QuerySet:
+    qs = model_admin.get_queryset(request)
+    related = get_select_related_for_columns(model_admin.model, columns)
+    if related:
+        qs = qs.select_related(*related)
+    return qs.order_by("id")
+
+
+def _plain(value: Any) -> Any:
+    return "" if value is None else value
+
+
+def _format_bool(value: Any) -> Any:
+    if value is None:
+        return ""
+    return "Да" if value else "Нет"
+
+
+def _temporal_formatter(field: models.Field) -> Callable[[Any], Any]:
+    """
+    Как formats.localize, но формат (DATETIME_FORMAT/DATE_FORMAT/TIME_FORMAT)
+    разрешается один раз на колонку, а не на каждую ячейку.
+    """
+    if isinstance(field, models.DateTimeField):
+        fmt, render = formats.get_format("DATETIME_FORMAT"), dateformat.format
+    elif isinstance(field, models.DateField):
+        fmt, render = formats.get_format("DATE_FORMAT"), dateformat.format
+    else:
+        fmt, render = formats.get_format("TIME_FORMAT"), dateformat.time_format
+
+    def format_temporal(value: Any) -> Any:
+        if value is None:
+            return ""
+        try:
+            return render(value, fmt)
+        except Exception:
+            return str(value)
+
+    return format_temporal
+
+
+_PLAIN_FIELDS = (
+    models.CharField,
+    models.TextField,
+    models.IntegerField,
+    models.FloatField,
+    models.DecimalField,
+    models.AutoField,
+    models.UUIDField,
+)
+
+
+def _formatter_for_field(field: models.Field) -> Callable[[Any], Any]:
+    """Форматтер подбирается один раз по типу поля — так же, как format_admin_value."""
+    if isinstance(field, models.BooleanField):
+        return _format_bool
+    if isinstance(field, (models.DateField, models.TimeField)):  # DateTimeField — подкласс DateField
+        return _temporal_formatter(field)
+    if isinstance(field, _PLAIN_FIELDS):
+        return _plain
+    return format_admin_value
+
+
+@dataclass
+class CompiledColumn:
+    """
+    Колонка выгрузки, разобранная один раз на всю выгрузку.
+
+    path      — путь для values_list (значение берётся из кортежа строки);
+    fk_model  — для FK: в path лежит id, подпись — str() из карты id -> объект;
+    getter    — колонка-вызываемое (метод ModelAdmin/модели): нужен сам объект.
+    """
+
+    name: str
+    formatter: Callable[[Any], Any] = format_admin_value
+    path: str | None = None
+    fk_model: type[models.Model] | None = None
+    getter: Callable[[models.Model], Any] | None = None
+
+
+def _compile_field_path(model: type[models.Model], name: str) -> CompiledColumn | None:
+    opts = model._meta
+    parts = name.split("__")
+    field = None
+    for i, part in enumerate(parts):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        # обратные связи/M2M/GenericFK — не колонка values_list
+        if field.is_relation and not (field.concrete and (field.many_to_one or field.one_to_one)):
+            return None
+        if field.is_relation and i < len(parts) - 1:
+            opts = field.related_model._meta
+
+    if field.is_relation:
+        prefix = "__".join(parts[:-1] + [field.attname]) if len(parts) > 1 else field.attname
+        return CompiledColumn(name=name, path=prefix, fk_model=field.related_model, formatter=_plain)
+
+    return CompiledColumn(name=name, path=name, formatter=_formatter_for_field(field))
+
+
+def _safe_call(func: Callable[[models.Model], Any]) -> Callable[[models.Model], Any]:
+    # вызываемые колонки — чужой код: ошибка превращается в пустую ячейку, как у lookup_field
+    def getter(obj: models.Model) -> Any:
+        try:
+            return func(obj)
+        except Exception:
+            return ""
+
+    return getter
+
+
+def _object_attr(name: str) -> Callable[[models.Model], Any]:
+    def getter(obj: models.Model) -> Any:
+        attr = getattr(obj, name)
+        return attr() if callable(attr) else attr
+
+    return getter
+
+
+def compile_columns(model_admin: admin.ModelAdmin, columns: list[Any]) -> list[CompiledColumn]:
+    """
+    Один раз на выгрузку превращает колонки list_display в прямые аксессоры
+    (повторяя порядок разрешения lookup_field): поле модели -> путь values_list,
+    FK -> id + подпись из карты, вызываемое/метод ModelAdmin/атрибут модели -> getter.
+    """
+    compiled: list[CompiledColumn] = []
+    for col in columns:
+        if callable(col):
+            compiled.append(CompiledColumn(name=str(col), getter=_safe_call(col)))
+            continue
+
+        column = _compile_field_path(model_admin.model, col)
+        if column is not None:
+            compiled.append(column)
+        elif hasattr(model_admin, col) and col != "__str__":
+            compiled.append(CompiledColumn(name=col, getter=_safe_call(getattr(model_admin, col))))
+        else:
+            compiled.append(CompiledColumn(name=col, getter=_safe_call(_object_attr(col))))
+    return compiled
+
+
+def _fk_labels(model: type[models.Model], ids: set[Any]) -> dict[Any, str]:
+    return {pk: str(obj) for pk, obj in model._default_manager.in_bulk(ids).items()}
+
+
+def _iter_value_rows(
+    queryset: models.QuerySet,
+    compiled: list[CompiledColumn],
+    chunk_size: int,
+) -> Iterator[list[Any]]:
+    """Все колонки — поля: строки из values_list, FK-подписи — одним запросом на чанк."""
+    fk_positions = [i for i, c in enumerate(compiled) if c.fk_model is not None]
+    formatters = [c.formatter for c in compiled]
+    tuples = queryset.values_list(*[c.path for c in compiled]).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(tuples, chunk_size))
+        if not chunk:
+            return
+
+        labels = {
+            i: _fk_labels(compiled[i].fk_model, {row[i] for row in chunk if row[i] is not None})
+            for i in fk_positions
+        }
+        for row in chunk:
+            values = [fmt(value) for fmt, value in zip(formatters, row)]
+            for i in fk_positions:
+                values[i] = "" if row[i] is None else labels[i].get(row[i], "")
+            yield values
+
+
+def _iter_object_rows(
+    queryset: models.QuerySet,
+    compiled: list[CompiledColumn],
+    chunk_size: int,
+) -> Iterator[list[Any]]:
+    """Есть вызываемые колонки: нужны объекты (FK уже подтянуты select_related)."""
+    getters: list[Callable[[models.Model], Any]] = []
+    for column in compiled:
+        if column.getter is not None:
+            getters.append(lambda obj, g=column.getter: format_admin_value(g(obj)))
+        elif column.fk_model is not None:
+            getters.append(_safe_call(lambda obj, n=column.name: format_admin_value(_follow(obj, n))))
+        else:
+            getters.append(lambda obj, n=column.name, f=column.formatter: f(_follow(obj, n)))
+
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield [get(obj) for get in getters]
+
+
+def _follow(obj: Any, path: str) -> Any:
+    for part in path.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, part)
+    return obj
+
+
+def iter_admin_rows(
+    model_admin: admin.ModelAdmin,
+    queryset: models.QuerySet,
+    columns: list[str],
+    chunk_size: int | None = None,
+) -> Iterator[list[Any]]:
+    """
+    Строки выгрузки по одной: колонки компилируются один раз, дальше — без
+    lookup_field и try/except на каждую ячейку; queryset читается чанками.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    compiled = compile_columns(model_admin, columns)
+
+    if all(c.path is not None for c in compiled):
+        return _iter_value_rows(queryset, compiled, chunk_size)
+    return _iter_object_rows(queryset, compiled, chunk_size)
+
+
+def iter_admin_rows_lookup(
+    model_admin: admin.ModelAdmin,
+    queryset: models.QuerySet,
+    columns: list[str],
+    chunk_size: int | None = None,
+) -> Iterator[list[Any]]:
+    """Эталон: lookup_field на каждую ячейку (для сверки и замеров в bench_export)."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield get_admin_row_values(model_admin, obj, columns)
+
+
+class Exporter(ABC):
+    """
+    Базовый формат выгрузки: write() пишет всю выгрузку в файл (фоновая задача).
+    Форматы, которые можно отдавать кусками, наследуют StreamingExporter.
+    """
+
+    name: str = ""
+    label: str = ""
+    extension: str = ""
+    content_type: str = "application/octet-stream"
+    streaming: bool = False
+
+    @abstractmethod
+    def write(
+        self,
+        fileobj: IO[bytes],
+        title: str,
+        columns: list[str],
+        headers: list[str],
+        rows: Iterable[list[Any]],
+    ) -> None:
+        ...
+
+
+class StreamingExporter(Exporter):
+    """Формат, который iter_chunks() отдаёт кусками байтов для StreamingHttpResponse."""
+
+    streaming = True
+
+    @abstractmethod
+    def iter_chunks(self, columns: list[str], headers: list[str], rows: Iterable[list[Any]]) -> Iterator[bytes]:
+        ...
+
+    def write(
+        self,
+        fileobj: IO[bytes],
+        title: str,
+        columns: list[str],
+        headers: list[str],
+        rows: Iterable[list[Any]],
+    ) -> None:
+        for chunk in self.iter_chunks(columns, headers, rows):
+            fileobj.write(chunk)
+
+
+EXPORTERS: dict[str, Exporter] = {}
+
+
+def register_exporter(cls: type[Exporter]) -> type[Exporter]:
+    EXPORTERS[cls.name] = cls()
+    return cls
+
+
+def get_exporter(name: str) -> Exporter:
+    return EXPORTERS[name]
+
+
+def _batched_lines(lines: Iterable[str], batch_size: int = 500) -> Iterator[bytes]:
+    # по строке на yield — слишком мелкие куски для WSGI, склеиваем пачками
+    batch: list[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield "".join(batch).encode("utf-8")
+            batch = []
+    if batch:
+        yield "".join(batch).encode("utf-8")
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: writerow() сразу возвращает строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+@register_exporter
+class XlsxExporter(Exporter):
+    name = "xlsx"
+    label = "Excel (XLSX)"
+    extension = "xlsx"
+    content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def write(
+        self,
+        fileobj: IO[bytes],
+        title: str,
+        columns: list[str],
+        headers: list[str],
+        rows: Iterable[list[Any]],
+    ) -> None:
+        """
+        Write-only книга openpyxl: строки сбрасываются на диск по мере записи,
+        память не растёт с числом строк.
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=title[:31])
+
+        # ширины колонок в write-only режиме задаются до первой строки
+        for i, header in enumerate(headers, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = max(12, min(45, len(str(header)) + 6))
+
+        ws.append(headers)
+        for row in rows:
+            ws.append(row)
+
+        wb.save(fileobj)
+
+
+@register_exporter
+class CsvExporter(StreamingExporter):
+    name = "csv"
+    label = "CSV"
+    extension = "csv"
+    content_type = "text/csv; charset=utf-8"
+
+    def iter_chunks(self, columns: list[str], headers: list[str], rows: Iterable[list[Any]]) -> Iterator[bytes]:
+        writer = csv.writer(_Echo())
+        # BOM — чтобы Excel сразу открыл кириллицу в UTF-8
+        yield "\ufeff".encode("utf-8")
+        yield writer.writerow(headers).encode("utf-8")
+        yield from _batched_lines(writer.writerow(row) for row in rows)
+
+
+@register_exporter
+class JsonLinesExporter(StreamingExporter):
+    name = "jsonl"
+    label = "JSON Lines"
+    extension = "jsonl"
+    content_type = "application/x-ndjson; charset=utf-8"
+
+    def iter_chunks(self, columns: list[str], headers: list[str], rows: Iterable[list[Any]]) -> Iterator[bytes]:
+        dumps = json.JSONEncoder(ensure_ascii=False, default=str).encode
+        yield from _batched_lines(dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+def _parquet_text(value: Any) -> str | None:
+    return None if value is None or value == "" else str(value)
+
+
+@register_exporter
+class ParquetExporter(Exporter):
+    name = "parquet"
+    label = "Parquet"
+    extension = "parquet"
+    content_type = "application/vnd.apache.parquet"
+
+    def write(
+        self,
+        fileobj: IO[bytes],
+        title: str,
+        columns: list[str],
+        headers: list[str],
+        rows: Iterable[list[Any]],
+    ) -> None:
+        """
+        Колоночный Parquet (zstd, словарное кодирование): строки копятся по
+        EXPORT_PARQUET_ROW_GROUP_SIZE и уходят в файл row group'ами, память
+        не растёт с числом строк. Колонки названы как в JSONL, значения те же,
+        что в CSV, — строками, пустые ячейки — null; заголовки — в метаданных.
+        """
+        # pyarrow тяжёлый — импортируется только там, где файл действительно строится
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        names = [str(column) for column in columns]
+        schema = pa.schema(
+            [pa.field(name, pa.string()) for name in names],
+            metadata={"headers": json.dumps(dict(zip(names, headers)), ensure_ascii=False)},
+        )
+        rows = iter(rows)
+        with pq.ParquetWriter(fileobj, schema, compression="zstd") as writer:
+            while batch := list(islice(rows, settings.EXPORT_PARQUET_ROW_GROUP_SIZE)):
+                arrays = [pa.array([_parquet_text(row[i]) for row in batch], pa.string()) for i in range(len(names))]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def build_export_file(
+    exporter: Exporter,
+    title: str,
+    columns: list[str],
+    headers: list[str],
+    rows: Iterable[list[Any]],
+) -> IO[bytes]:
+    """Выгрузка во временном файле: в памяти до EXPORT_SPOOL_MAX_SIZE, дальше — на диске."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_MAX_SIZE)
+    exporter.write(spooled, title, columns, headers, rows)
+    spooled.seek(0)
+    return spooled
+
+
+async def aiter_chunks(chunks: Iterable[bytes], batch: int = 64) -> AsyncIterator[bytes]:
+    """
+    Синхронные чанки выгрузки → асинхронный итератор для ASGI. Синхронный
+    итератор Django под ASGI сначала собирает в память целиком (list), а здесь
+    queryset читается пачками в потоке запроса (thread_sensitive).
+    """
+    iterator = iter(chunks)
+    take = sync_to_async(lambda: list(islice(iterator, batch)))
+    while part := await take():
+        for chunk in part:
+            yield chunk
@@ -4,7 +4,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
-from .models import VolunteerApplication
+from .models import Category, VolunteerApplication
 
 
 class SignUpForm(UserCreationForm):
@@ -25,12 +25,45 @@ class VolunteerApplicationForm(forms.ModelForm):
         }
 
 
+class EventFilterForm(forms.Form):
+    """Фильтры ленты мероприятий (GET-параметры)."""
+    WHEN_ALL = ""
+    WHEN_UPCOMING = "upcoming"
+    WHEN_PAST = "past"
+
+    category = forms.ModelChoiceField(
+        label="Категория",
+        required=False,
+        queryset=Category.objects.order_by("name"),
+        empty_label="Все категории",
+    )
+    when = forms.ChoiceField(
+        label="Когда",
+        required=False,
+        choices=[(WHEN_ALL, "Все"), (WHEN_UPCOMING, "Предстоящие"), (WHEN_PAST, "Прошедшие")],
+    )
+    SORT_DATE = ""
+    SORT_TRENDING = "trending"
+
+    sort = forms.ChoiceField(
+        label="Порядок",
+        required=False,
+        choices=[(SORT_DATE, "По дате"), (SORT_TRENDING, "В тренде")],
+    )
+
+
+class EventSearchForm(forms.Form):
+    """Полнотекстовый поиск мероприятий (GET-параметр q)."""
+    q = forms.CharField(label="Поиск", max_length=200, required=False)
+
+
 class AdminExportForm(forms.Form):
     """
-    Экспорт XLSX:
+    Экспорт данных:
     1) выбрать модель
     2) выбрать поля (колонки) для выгрузки
        (по умолчанию — все доступные колонки)
+    3) выбрать формат (XLSX, CSV, JSON Lines)
     """
     model = forms.ChoiceField(
         label="Таблица (модель)",
@@ -44,3 +77,21 @@ class AdminExportForm(forms.Form):
         widget=forms.CheckboxSelectMultiple,
         choices=[],  # заполняется в admin.py после выбора модели
     )
+
+    format = forms.ChoiceField(
+        label="Формат",
+        required=True,
+        initial="xlsx",
+        choices=[],  # заполняется в admin.py из реестра форматов
+    )
+
+
+class ModerationFilterForm(forms.Form):
+    """Экран модерации заявок: какая очередь показывается (GET-параметры)."""
+    event = forms.IntegerField(label="ID мероприятия", required=False, min_value=1)
+    status = forms.ChoiceField(
+        label="Статус",
+        required=False,
+        choices=VolunteerApplication.Status.choices,
+        initial=VolunteerApplication.Status.NEW,
+    )
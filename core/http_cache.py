@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+from typing import Awaitable, Callable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from .cache import is_cacheable_request
+from .forms import EventFilterForm
+from .models import Category, Event, Tombstone, TrendingWatermark
+
+# Условный GET для публичных страниц: ETag гостевой страницы считается одним
+# коротким запросом по индексам (Event.version, см. NextEventVersion), и при
+# совпадении с If-None-Match ответ 304 уходит до кэша страниц и до вьюхи.
+# ETag считается раньше рендера: если данные поменялись между ними, страница
+# новее своего ETag — следующий запрос просто получит 200 ещё раз.
+# Гостевые ответы может хранить общий прокси (s-maxage), но с проверкой у нас
+# через max-age=0; страницы пользователей — только private, no-cache.
+
+ETagFunc = Callable[..., "str | None"]
+
+
+def _etag(*parts) -> str:
+    # HTTP_ETAG_SALT меняется с релизом: новая вёрстка не прячется за старым ETag
+    raw = ":".join(str(part) for part in (settings.HTTP_ETAG_SALT, *parts))
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def event_detail_etag(request: HttpRequest, pk: int) -> str | None:
+    """Версия мероприятия и его категории; None — мероприятия нет (404 отдаст вьюха)."""
+    row = Event.objects.filter(pk=pk).values_list("version", "category__updated_at").first()
+    return _etag("event", pk, *row) if row is not None else None
+
+
+def event_list_etag(request: HttpRequest) -> str:
+    """
+    Состояние ленты одним запросом из скалярных подзапросов, каждый — чтение
+    индекса или маленькой таблицы: последняя версия мероприятия (любое изменение
+    любого мероприятия), последнее удаление, категории (фильтр и бейджи),
+    ближайшее предстоящее мероприятие (когда оно начнётся, «предстоящие»
+    и «прошедшие» поменяются), для «в тренде» — последний пересчёт рейтинга.
+    """
+    qn = connection.ops.quote_name
+    trending = request.GET.get("sort") == EventFilterForm.SORT_TRENDING
+    sql = """
+        SELECT (SELECT max(version) FROM {events}),
+               (SELECT max(deleted_at) FROM {tombstones} WHERE kind = %s),
+               (SELECT max(updated_at) FROM {categories}),
+               (SELECT count(*) FROM {categories}),
+               (SELECT min(event_date) FROM {events} WHERE event_date >= %s),
+               {trending}
+    """.format(
+        events=qn(Event._meta.db_table),
+        tombstones=qn(Tombstone._meta.db_table),
+        categories=qn(Category._meta.db_table),
+        trending=f"(SELECT max(updated_at) FROM {qn(TrendingWatermark._meta.db_table)})" if trending else "NULL",
+    )
+    # реплика — если лента читается с неё (@replica_reads)
+    with connections[Event.objects.all().db].cursor() as cursor:
+        cursor.execute(sql, [Tombstone.Kind.EVENT, timezone.now()])
+        row = cursor.fetchone()
+    return _etag("list", *row)
+
+
+def _patch_headers(request: HttpRequest, response: HttpResponse, etag: str | None) -> HttpResponse:
+    if etag is not None and response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+        # Set-Cookie (например, csrftoken) в общий кэш попасть не должен
+        if response.cookies:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=0, s_maxage=settings.HTTP_SHARED_MAX_AGE)
+    elif request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    # вход/выход меняют страницу по тому же URL
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+def conditional_page(etag_func: ETagFunc) -> Callable:
+    """
+    ETag и ответ 304 Not Modified для гостей; ставится над @cache_anonymous_page.
+    etag_func(request, *args, **kwargs) -> ETag или None (без условного GET).
+    """
+
+    def decorator(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+        if iscoroutinefunction(view):
+            return _conditional_page_async(view, etag_func)
+
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            etag = etag_func(request, *args, **kwargs) if is_cacheable_request(request) else None
+            response = get_conditional_response(request, etag=etag) if etag is not None else None
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _patch_headers(request, response, etag)
+
+        return wrapper
+
+    return decorator
+
+
+def _conditional_page_async(
+    view: Callable[..., Awaitable[HttpResponse]], etag_func: ETagFunc
+) -> Callable[..., Awaitable[HttpResponse]]:
+    def guest_etag(request: HttpRequest, *args, **kwargs) -> str | None:
+        return etag_func(request, *args, **kwargs) if is_cacheable_request(request) else None
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        request.user = await request.auser()
+        # проверка сообщений в сессии и запрос ETag — одним переходом в поток
+        etag = await sync_to_async(guest_etag)(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag) if etag is not None else None
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        return _patch_headers(request, response, etag)
+
+    return wrapper
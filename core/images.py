@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps, features
+
+from .cache import invalidate_event
+from .models import Event, NextEventVersion
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = "events/variants"
+
+# порядок важен для <picture>: браузер берёт первый поддерживаемый <source>
+_FORMATS: list[tuple[str, str, str, dict[str, Any]]] = [
+    # (ключ, формат Pillow, расширение, параметры сохранения)
+    ("avif", "AVIF", "avif", {"quality": 55}),
+    ("webp", "WEBP", "webp", {"method": 4}),
+    ("jpeg", "JPEG", "jpg", {"optimize": True, "progressive": True}),
+]
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def available_formats() -> list[tuple[str, str, str, dict[str, Any]]]:
+    """AVIF/WebP — только если Pillow собран с их поддержкой; JPEG есть всегда."""
+    return [f for f in _FORMATS if f[0] == "jpeg" or features.check(f[0])]
+
+
+def _target_widths(width: int) -> list[int]:
+    widths = [w for w in settings.IMAGE_VARIANT_WIDTHS if w < width]
+    # исходник уже узкий — одна копия в исходной ширине, но в сжатых форматах
+    if not widths or width <= max(settings.IMAGE_VARIANT_WIDTHS):
+        widths.append(width)
+    return sorted(set(widths))
+
+
+def _encode(image: Image.Image, pil_format: str, params: dict[str, Any]) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, quality=params.pop("quality", settings.IMAGE_VARIANT_QUALITY), **params)
+    return buffer.getvalue()
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+
+
+def _without_alpha(image: Image.Image) -> Image.Image:
+    """Для JPEG: прозрачное кладётся на белый фон (просто convert("RGB") даёт чёрный)."""
+    if image.mode != "RGBA":
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def generate_variants(name: str) -> dict[str, Any]:
+    """
+    Строит производные изображения: ширины IMAGE_VARIANT_WIDTHS (не больше
+    исходной) × форматы. Имена файлов содержат хеш содержимого, поэтому их можно
+    кэшировать навсегда, а одинаковые файлы не пишутся повторно.
+    """
+    with default_storage.open(name, "rb") as fh:
+        with Image.open(fh) as original:
+            source = ImageOps.exif_transpose(original)
+            # альфа-канал сохраняется для AVIF/WebP, в RGB сводится только JPEG
+            source = source.convert("RGBA" if _has_alpha(source) else "RGB")
+
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    formats = available_formats()
+    result: dict[str, Any] = {
+        "source": name,
+        "width": source.width,
+        "height": source.height,
+        "formats": [key for key, *_ in formats],
+        "widths": {},
+    }
+    for width in _target_widths(source.width):
+        height = max(1, round(source.height * width / source.width))
+        resized = source if width == source.width else source.resize((width, height), Image.Resampling.LANCZOS)
+        files = {}
+        for key, pil_format, extension, params in formats:
+            data = _encode(_without_alpha(resized) if pil_format == "JPEG" else resized, pil_format, dict(params))
+            digest = hashlib.sha256(data).hexdigest()[:16]
+            path = f"{VARIANTS_DIR}/{stem}-{width}w-{digest}.{extension}"
+            if not default_storage.exists(path):
+                path = default_storage.save(path, ContentFile(data))
+            files[key] = path
+        result["widths"][str(width)] = files
+    return result
+
+
+def srcset_data(variants: dict[str, Any]) -> dict[str, Any] | None:
+    """
+    Данные для <picture>: {"sources": [(mime, srcset)], "fallback": srcset,
+    "src": путь средней ширины, "width", "height"} или None, если производных нет.
+    """
+    widths = variants.get("widths")
+    if not widths:
+        return None
+    url = default_storage.url
+    ordered = sorted(widths.items(), key=lambda item: int(item[0]))
+
+    def srcset(key: str) -> str:
+        return ", ".join(f"{url(files[key])} {width}w" for width, files in ordered if key in files)
+
+    middle = ordered[len(ordered) // 2][1]
+    return {
+        "sources": [(f"image/{key}", srcset(key)) for key in variants.get("formats", []) if key != "jpeg"],
+        "fallback": srcset("jpeg"),
+        "src": url(middle["jpeg"]),
+        "width": variants["width"],
+        "height": variants["height"],
+    }
+
+
+def variant_paths(variants: dict[str, Any]) -> set[str]:
+    return {path for files in variants.get("widths", {}).values() for path in files.values()}
+
+
+def build_event_variants(event_id: int) -> bool:
+    """
+    Производные для текущего Event.image. Возвращает True, если они обновились.
+    Пишется через update() с условием на image: если картинку успели заменить,
+    результат для старой просто отбрасывается.
+    """
+    event = Event.objects.filter(pk=event_id).only("image", "image_variants").first()
+    if event is None:
+        return False
+    name = event.image.name if event.image else ""
+    old = event.image_variants or {}
+    if old.get("source", "") == name:
+        return False
+
+    variants = generate_variants(name) if name else {}
+    same_image = Q(image=name) if name else Q(image="") | Q(image__isnull=True)
+    updated = Event.objects.filter(same_image, pk=event_id).update(image_variants=variants, version=NextEventVersion())
+    if not updated:
+        return False
+
+    for path in variant_paths(old) - variant_paths(variants):
+        default_storage.delete(path)
+    invalidate_event(event_id)
+    return True
+
+
+def _build_in_background(event_id: int) -> None:
+    try:
+        build_event_variants(event_id)
+    except Exception:
+        logger.exception("Image variants failed for event %s", event_id)
+    finally:
+        # поток пула живёт дольше запроса — соединение возвращаем сами
+        close_old_connections()
+
+
+def schedule_variants(event_id: int) -> None:
+    """
+    После коммита — сборка производных в фоновом потоке процесса
+    (IMAGE_VARIANT_WORKERS=0 — синхронно). Потерянные при перезапуске задачи
+    доделывает команда build_image_variants.
+    """
+    def run() -> None:
+        global _executor
+        if settings.IMAGE_VARIANT_WORKERS <= 0:
+            build_event_variants(event_id)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                thread_name_prefix="image-variants",
+            )
+        _executor.submit(_build_in_background, event_id)
+
+    transaction.on_commit(run)
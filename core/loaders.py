@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db.models import Exists, OuterRef, QuerySet, Subquery
+from django.http import HttpRequest
+
+from .models import Event, EventLike, VolunteerApplication
+
+
+class UserEventStateLoader:
+    """
+    Состояние текущего пользователя по мероприятиям (лайк + статус заявки).
+
+    Живёт в рамках одного запроса: для любого набора мероприятий недостающие id
+    догружаются одним запросом, уже известные берутся из памяти.
+    """
+
+    def __init__(self, user) -> None:
+        self.user = user
+        self._liked: dict[int, bool] = {}
+        self._statuses: dict[int, str | None] = {}
+
+    def _missing(self, event_ids: Iterable[int]) -> set[int]:
+        return {pk for pk in event_ids if pk not in self._liked}
+
+    def _query(self, missing: set[int]) -> QuerySet:
+        return (
+            Event.objects
+            .filter(pk__in=missing)
+            .order_by()
+            .annotate(
+                user_liked=Exists(EventLike.objects.filter(user=self.user, event=OuterRef("pk"))),
+                user_status=Subquery(
+                    VolunteerApplication.objects.filter(user=self.user, event=OuterRef("pk")).values("status")[:1]
+                ),
+            )
+            .values_list("pk", "user_liked", "user_status")
+        )
+
+    def _store(self, missing: set[int], rows: Iterable[tuple[int, bool, str | None]]) -> None:
+        for pk, liked, status in rows:
+            self._liked[pk] = liked
+            self._statuses[pk] = status
+
+        # гость или удалённые между запросами мероприятия — просто "нет состояния"
+        for pk in missing - self._liked.keys():
+            self._liked[pk] = False
+            self._statuses[pk] = None
+
+    def load(self, event_ids: Iterable[int]) -> None:
+        missing = self._missing(event_ids)
+        if not missing:
+            return
+        rows = self._query(missing) if self.user.is_authenticated else []
+        self._store(missing, rows)
+
+    async def aload(self, event_ids: Iterable[int]) -> None:
+        """load() через async ORM; user должен быть уже загружен (await request.auser())."""
+        missing = self._missing(event_ids)
+        if not missing:
+            return
+        rows = [row async for row in self._query(missing)] if self.user.is_authenticated else []
+        self._store(missing, rows)
+
+    def attach(self, events: Iterable[Event]) -> None:
+        """Проставляет event.liked и event.my_application_status."""
+        events = list(events)
+        self.load(e.pk for e in events)
+        self._set_attributes(events)
+
+    async def aattach(self, events: Iterable[Event]) -> None:
+        events = list(events)
+        await self.aload(e.pk for e in events)
+        self._set_attributes(events)
+
+    def _set_attributes(self, events: list[Event]) -> None:
+        for event in events:
+            event.liked = self._liked[event.pk]
+            event.my_application_status = self._statuses[event.pk]
+
+
+def get_event_state_loader(request: HttpRequest) -> UserEventStateLoader:
+    loader = getattr(request, "_event_state_loader", None)
+    if loader is None or loader.user is not request.user:
+        loader = UserEventStateLoader(request.user)
+        request._event_state_loader = loader
+    return loader
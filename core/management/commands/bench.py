@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import time
+from contextlib import ExitStack
+from typing import Callable
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.export_jobs import claim_next_job, run_export_job
+from core.models import Event
+from core.perf import QUANTILES, RequestMetrics, percentile
+
+SCENARIOS = (
+    "event_list",
+    "event_list_user",
+    "event_list_deep",
+    "event_list_trending",
+    "event_list_revalidate",
+    "event_detail",
+    "toggle_like",
+    "apply_to_event",
+    "my_dashboard",
+    "admin_applications",
+    "admin_likes",
+    "admin_events",
+    "admin_status_changes",
+    "export_csv",
+    "export_xlsx",
+)
+EXPORT_SCENARIOS = ("export_csv", "export_xlsx")
+
+NEXT_CURSOR_RE = re.compile(r'href="\?cursor=([^"&]+)"')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _AsgiClient:
+    """AsyncClient (запрос идёт через ASGIHandler) с синхронными get/post для сценариев."""
+
+    def __init__(self) -> None:
+        self._client = AsyncClient(raise_request_exception=False)
+        self.get = async_to_sync(self._client.get)
+        self.post = async_to_sync(self._client.post)
+        self.force_login = self._client.force_login
+
+
+def _drain(response: HttpResponse) -> None:
+    if response.is_async:
+        async def consume() -> None:
+            async for _ in response.streaming_content:
+                pass
+
+        async_to_sync(consume)()
+    else:
+        for _ in response.streaming_content:
+            pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон основных страниц через тестовый клиент Django: "
+        "пропускная способность, перцентили задержки и число SQL-запросов. Результат — JSON."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--scenario",
+            dest="scenarios",
+            action="append",
+            choices=SCENARIOS,
+            help="Сценарий (можно несколько раз; по умолчанию — все).",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий.")
+        parser.add_argument("--export-requests", type=int, default=3, help="Запросов на сценарий выгрузки.")
+        parser.add_argument("--warmup", type=int, default=10, help="Прогревочных запросов (не учитываются).")
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Гнать запросы через ASGI-обработчик (вместе с VIEW_MODE=async — async-вьюхи).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Не откатывать изменения (по умолчанию весь прогон — в транзакции с откатом).",
+        )
+        parser.add_argument("--output", help="Записать JSON в файл вместо stdout.")
+
+    def handle(self, *args, **options) -> None:
+        self.rng = random.Random(options["seed"])
+        self.event_ids = list(Event.objects.values_list("id", flat=True))
+        if not self.event_ids:
+            raise CommandError("No events, run seed or seed_bulk first.")
+
+        results = {
+            "database": connection.vendor,
+            "handler": "asgi" if options["asgi"] else "wsgi",
+            "view_mode": settings.VIEW_MODE,
+            "events": len(self.event_ids),
+            "requests": options["requests"],
+            "scenarios": {},
+        }
+        hosts = ["testserver", *settings.ALLOWED_HOSTS]
+        try:
+            with override_settings(ALLOWED_HOSTS=hosts), transaction.atomic():
+                self.user = self._bench_user()
+                make_client = _AsgiClient if options["asgi"] else lambda: Client(raise_request_exception=False)
+                self.guest = make_client()
+                self.client = make_client()
+                self.client.force_login(self.user)
+
+                for name in options["scenarios"] or SCENARIOS:
+                    count = options["export_requests"] if name in EXPORT_SCENARIOS else options["requests"]
+                    step = getattr(self, f"_step_{name}")()
+                    results["scenarios"][name] = self._run(name, step, count, options["warmup"])
+
+                if not options["keep"]:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def _bench_user(self) -> User:
+        user, _ = User.objects.get_or_create(
+            username="_bench",
+            defaults={"is_staff": True, "is_superuser": True, "email": "bench@example.com"},
+        )
+        return user
+
+    def _run(self, name: str, step: Callable[[int], HttpResponse], count: int, warmup: int) -> dict:
+        self.stderr.write(f"{name}: {count} requests...")
+        for i in range(min(warmup, count)):
+            step(i)
+
+        latencies: list[float] = []
+        queries: list[int] = []
+        db_seconds = 0.0
+        statuses: dict[str, int] = {}
+        started = time.perf_counter()
+        for i in range(count):
+            metrics = RequestMetrics()
+            request_started = time.perf_counter()
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(metrics.db_wrapper))
+                response = step(warmup + i)
+            latencies.append(time.perf_counter() - request_started)
+            queries.append(metrics.queries)
+            db_seconds += metrics.db_seconds
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        total = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "requests": count,
+            "seconds": round(total, 4),
+            "rps": round(count / total, 2) if total else None,
+            "latency_ms": {
+                **{f"p{int(q * 100)}": round(percentile(latencies, q) * 1000, 3) for q in QUANTILES},
+                "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            },
+            "queries": {
+                "mean": round(sum(queries) / count, 2) if count else 0.0,
+                "max": max(queries, default=0),
+            },
+            "db_ms_mean": round(db_seconds / count * 1000, 3) if count else 0.0,
+            "statuses": statuses,
+        }
+
+    # --- сценарии: каждый возвращает функцию «сделать i-й запрос» ---
+
+    def _random_event(self) -> int:
+        return self.rng.choice(self.event_ids)
+
+    def _step_event_list(self):
+        return lambda i: self.guest.get(reverse("event_list"))
+
+    def _step_event_list_user(self):
+        return lambda i: self.client.get(reverse("event_list"))
+
+    def _step_event_list_deep(self):
+        # листаем ленту по курсору; дошли до конца — начинаем сначала
+        state = {"cursor": None}
+
+        def step(i: int) -> HttpResponse:
+            url = reverse("event_list")
+            if state["cursor"]:
+                url += f"?cursor={state['cursor']}"
+            response = self.client.get(url)
+            match = NEXT_CURSOR_RE.search(response.content.decode())
+            state["cursor"] = match.group(1) if match else None
+            return response
+
+        return step
+
+    def _step_event_list_trending(self):
+        return lambda i: self.client.get(reverse("event_list") + "?sort=trending")
+
+    def _step_event_list_revalidate(self):
+        # гость с ETag прошлого ответа: условный GET (304, пока лента не менялась)
+        state = {"etag": None}
+
+        def step(i: int) -> HttpResponse:
+            headers = {"If-None-Match": state["etag"]} if state["etag"] else {}
+            response = self.guest.get(reverse("event_list"), headers=headers)
+            state["etag"] = response.get("ETag", state["etag"])
+            return response
+
+        return step
+
+    def _step_event_detail(self):
+        return lambda i: self.client.get(reverse("event_detail", args=[self._random_event()]))
+
+    def _step_toggle_like(self):
+        return lambda i: self.client.post(reverse("toggle_like", args=[self._random_event()]))
+
+    def _step_apply_to_event(self):
+        # каждое обращение — новое мероприятие, чтобы мерить именно создание заявки
+        order = self.event_ids[:]
+        self.rng.shuffle(order)
+        return lambda i: self.client.post(
+            reverse("apply_to_event", args=[order[i % len(order)]]),
+            {"motivation": "Нагрузочный тест"},
+        )
+
+    def _step_my_dashboard(self):
+        return lambda i: self.client.get(reverse("my_dashboard"))
+
+    # changelist'ы админки: без параметров, фильтр по мероприятию, поиск по
+    # началу имени пользователя и по названию мероприятия
+
+    def _changelist_step(self, url_name: str, *, event_filter: bool = True, search: bool = True):
+        url = reverse(url_name)
+        variants: list[Callable[[], str]] = [lambda: url]
+        if event_filter:
+            variants.append(lambda: f"{url}?event__id__exact={self._random_event()}")
+        if search:
+            variants.append(lambda: f"{url}?q={self.user.username[:4]}")
+            variants.append(lambda: f"{url}?q=волонт")
+        return lambda i: self.client.get(variants[i % len(variants)]())
+
+    def _step_admin_applications(self):
+        return self._changelist_step("admin:core_volunteerapplication_changelist")
+
+    def _step_admin_likes(self):
+        return self._changelist_step("admin:core_eventlike_changelist")
+
+    def _step_admin_events(self):
+        return self._changelist_step("admin:core_event_changelist", event_filter=False)
+
+    def _step_admin_status_changes(self):
+        return self._changelist_step("admin:core_applicationstatuschange_changelist", event_filter=False, search=False)
+
+    def _step_export_csv(self):
+        def step(i: int) -> HttpResponse:
+            response = self.client.post(
+                reverse("admin:export_xlsx"),
+                {"model": "core.Event", "format": "csv", "download": "1"},
+            )
+            if response.streaming:
+                _drain(response)
+            return response
+
+        return step
+
+    def _step_export_xlsx(self):
+        # постановка в очередь + сборка файла воркером в том же процессе
+        def step(i: int) -> HttpResponse:
+            response = self.client.post(
+                reverse("admin:export_xlsx"),
+                {"model": "core.Event", "format": "xlsx", "download": "1"},
+            )
+            job = claim_next_job()
+            if job is not None:
+                run_export_job(job)
+                if job.file:
+                    job.file.delete(save=False)
+            return response
+
+        return step
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpRequest
+
+from core.exports import (
+    EXPORTERS,
+    get_admin_columns_and_headers,
+    get_export_model_admins,
+    get_export_queryset,
+    iter_admin_rows,
+    iter_admin_rows_lookup,
+)
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость форматов выгрузки (строк/сек) на данных из БД. Результат — JSON."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--model", default="core.Event", help="Таблица для выгрузки (по умолчанию core.Event).")
+        parser.add_argument("--limit", type=int, default=20000, help="Сколько строк взять (по умолчанию 20000).")
+        parser.add_argument("--repeat", type=int, default=3, help="Повторов на формат, берётся лучший.")
+        parser.add_argument(
+            "--format",
+            dest="formats",
+            action="append",
+            choices=sorted(EXPORTERS),
+            help="Формат для замера (можно несколько раз; по умолчанию — все).",
+        )
+        parser.add_argument("--output", help="Записать JSON в файл вместо stdout.")
+
+    def handle(self, *args, **options) -> None:
+        model_admin = get_export_model_admins().get(options["model"])
+        if model_admin is None:
+            raise CommandError(f"Unknown model: {options['model']}")
+
+        request = HttpRequest()
+        request.user = User.objects.filter(is_superuser=True).first() or AnonymousUser()
+        columns, headers = get_admin_columns_and_headers(request, model_admin)
+        qs = get_export_queryset(request, model_admin, columns)[: options["limit"]]
+
+        # выборка из БД меряется отдельно, форматы сравниваются на одних и тех же строках;
+        # совпадение с эталонным lookup_field проверяет core.tests.ExportRowsTests
+        started = time.perf_counter()
+        rows = list(iter_admin_rows(model_admin, qs, columns))
+        fetch_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        reference = list(iter_admin_rows_lookup(model_admin, qs, columns))
+        lookup_seconds = time.perf_counter() - started
+
+        results = {
+            "model": options["model"],
+            "rows": len(rows),
+            "columns": columns,
+            "fetch": _rate(len(rows), fetch_seconds),
+            "fetch_lookup_field": _rate(len(reference), lookup_seconds),
+            "formats": {},
+        }
+
+        title = options["model"].split(".")[-1]
+        for name in options["formats"] or sorted(EXPORTERS):
+            exporter = EXPORTERS[name]
+            best = None
+            size = 0
+            for _ in range(max(1, options["repeat"])):
+                with tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024) as sink:
+                    started = time.perf_counter()
+                    exporter.write(sink, title, columns, headers, rows)
+                    elapsed = time.perf_counter() - started
+                    size = sink.tell()
+                best = elapsed if best is None else min(best, elapsed)
+            results["formats"][name] = {**_rate(len(rows), best), "bytes": size}
+
+        payload = json.dumps(results, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            self.stdout.write(self.style.SUCCESS(f"Done! Results written to {options['output']}."))
+        else:
+            self.stdout.write(payload)
+
+
+def _rate(rows: int, seconds: float) -> dict:
+    return {
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+    }
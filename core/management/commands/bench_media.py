@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.views.static import serve
+
+from core.media import serve_media
+from core.perf import QUANTILES, percentile
+
+BENCH_DIR = "bench"
+RANGE_BYTES = 64 * 1024
+
+
+def _consume(response: HttpResponse) -> int:
+    """Читает тело так, как это делает WSGI-сервер без sendfile(): блоками из итератора."""
+    size = sum(len(chunk) for chunk in response)
+    response.close()
+    return size
+
+
+def _sendfile(response: HttpResponse, sink: int) -> int:
+    """
+    Как gunicorn с wsgi.file_wrapper: os.sendfile() из дескриптора файла
+    (с текущей позиции, ровно Content-Length байт) — без чтения в Python.
+    """
+    filelike = response.file_to_stream
+    count = int(response["Content-Length"])
+    offset = os.lseek(filelike.fileno(), 0, os.SEEK_CUR)
+    sent = 0
+    while sent < count:
+        chunk = os.sendfile(sink, filelike.fileno(), offset + sent, count - sent)
+        if not chunk:
+            break
+        sent += chunk
+    response.close()
+    return sent
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает отдачу /media/: старый django.views.static.serve против core.media.serve_media "
+        "(целиком, sendfile, 304, Range, X-Accel-Redirect). Результат — JSON."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--size",
+            dest="sizes",
+            action="append",
+            type=int,
+            help="Размер тестового файла в КБ (можно несколько раз; по умолчанию 50 и 2048).",
+        )
+        parser.add_argument("--requests", type=int, default=300, help="Запросов на сценарий.")
+        parser.add_argument("--output", help="Записать JSON в файл вместо stdout.")
+
+    def handle(self, *args, **options) -> None:
+        directory = Path(settings.MEDIA_ROOT) / BENCH_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        factory = RequestFactory()
+        results = {"requests": options["requests"], "files": {}}
+        try:
+            with open(os.devnull, "wb") as devnull:
+                for kb in options["sizes"] or (50, 2048):
+                    name = f"{BENCH_DIR}/bench-{kb}k.jpg"
+                    (Path(settings.MEDIA_ROOT) / name).write_bytes(os.urandom(kb * 1024))
+                    results["files"][name] = self._bench_file(factory, name, kb * 1024, devnull.fileno(), options)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def _bench_file(self, factory: RequestFactory, name: str, size: int, sink: int, options) -> dict:
+        etag = serve_media(factory.get("/"), name)["ETag"]
+        scenarios: dict[str, Callable[[], int]] = {
+            "static_serve": lambda: _consume(serve(factory.get("/"), name, document_root=settings.MEDIA_ROOT)),
+            "serve_media": lambda: _consume(serve_media(factory.get("/"), name)),
+            "serve_media_sendfile": lambda: _sendfile(serve_media(factory.get("/"), name), sink),
+            "serve_media_304": lambda: _consume(serve_media(factory.get("/", HTTP_IF_NONE_MATCH=etag), name)),
+            "serve_media_range_64k": lambda: _consume(
+                serve_media(factory.get("/", HTTP_RANGE=f"bytes=0-{RANGE_BYTES - 1}"), name)
+            ),
+        }
+        if not hasattr(os, "sendfile"):
+            del scenarios["serve_media_sendfile"]
+
+        result = {"size": size}
+        for scenario, run in scenarios.items():
+            result[scenario] = self._measure(run, options["requests"])
+        with override_settings(MEDIA_ACCEL="x-accel-redirect"):
+            result["serve_media_accel"] = self._measure(
+                lambda: _consume(serve_media(factory.get("/"), name)), options["requests"]
+            )
+
+        baseline = result["static_serve"]["rps"]
+        for scenario in list(result):
+            if scenario not in ("size", "static_serve") and baseline:
+                result[scenario]["speedup"] = round(result[scenario]["rps"] / baseline, 2)
+        return result
+
+    @staticmethod
+    def _measure(run: Callable[[], int], count: int) -> dict:
+        run()  # прогрев (кэш страниц ОС)
+        latencies = []
+        transferred = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            request_started = time.perf_counter()
+            transferred += run()
+            latencies.append(time.perf_counter() - request_started)
+        total = time.perf_counter() - started
+        latencies.sort()
+        return {
+            "rps": round(count / total, 2) if total else None,
+            "mb_per_s": round(transferred / total / 2**20, 2) if total else None,
+            "latency_ms": {f"p{int(q * 100)}": round(percentile(latencies, q) * 1000, 3) for q in QUANTILES},
+        }
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Callable
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q, QuerySet
+
+from core.models import Event
+from core.perf import QUANTILES, percentile
+from core.search import prefix_query, search_events, web_query, with_headline
+
+DEFAULT_TERMS = ("субботник", "приют животных", "набережная", "донорская акция", "Томск", "квест")
+
+
+def _ilike(term: str) -> QuerySet[Event]:
+    return Event.objects.filter(
+        Q(title__icontains=term) | Q(location__icontains=term) | Q(description__icontains=term)
+    )
+
+
+def _fts(term: str) -> QuerySet[Event]:
+    query = web_query(term)
+    return with_headline(search_events(Event.objects.select_related("category"), query), query)
+
+
+def _prefix(term: str) -> QuerySet[Event]:
+    return Event.objects.filter(search_vector=prefix_query(term))
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск мероприятий: ILIKE '%...%' (как было в админке) против "
+        "полнотекстового поиска по GIN-индексу. Результат — JSON."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--term", dest="terms", action="append", help="Поисковый запрос (можно несколько раз).")
+        parser.add_argument("--repeat", type=int, default=20, help="Повторов на запрос.")
+        parser.add_argument("--output", help="Записать JSON в файл вместо stdout.")
+
+    def handle(self, *args, **options) -> None:
+        per_page = settings.EVENTS_PAGE_SIZE
+        # страница: ILIKE и админка — по дате (как changelist), поиск — по релевантности
+        methods: dict[str, Callable[[str], QuerySet[Event]]] = {
+            "ilike": lambda t: _ilike(t).order_by("-event_date", "-id"),
+            "fts_ranked": lambda t: _fts(t).order_by("-rank", "-id"),
+            "fts_prefix_admin": lambda t: _prefix(t).order_by("-event_date", "-id"),
+        }
+
+        results = {"events": Event.objects.count(), "repeat": options["repeat"], "terms": {}}
+        for term in options["terms"] or DEFAULT_TERMS:
+            term_result = {}
+            for name, build in methods.items():
+                term_result[name] = {
+                    "matches": build(term).count(),
+                    "page_ms": self._measure(lambda: list(build(term)[:per_page]), options["repeat"]),
+                    "count_ms": self._measure(lambda: build(term).count(), options["repeat"]),
+                }
+            ilike_p50 = term_result["ilike"]["page_ms"]["p50"]
+            fts_p50 = term_result["fts_ranked"]["page_ms"]["p50"]
+            term_result["page_speedup_p50"] = round(ilike_p50 / fts_p50, 2) if fts_p50 else None
+            results["terms"][term] = term_result
+
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def _measure(run: Callable[[], object], repeat: int) -> dict[str, float]:
+        run()  # прогрев (план, кэш страниц)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return {f"p{int(q * 100)}": round(percentile(timings, q) * 1000, 3) for q in QUANTILES}
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import BUILD_DIR, AssetError, build_bundles, fetch_vendor_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает Bootstrap и static/css/app.css в бандлы static/dist/app.css и app.js "
+        "из файлов репозитория (без сети). Дальше — collectstatic: хеш в имени, .gz и .br."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--fetch",
+            action="store_true",
+            help="Сначала скачать закреплённые версии библиотек в assets/vendor/ (нужна сеть; результат коммитится).",
+        )
+
+    def handle(self, *args, **options) -> None:
+        try:
+            if options["fetch"]:
+                for path in fetch_vendor_files():
+                    self.stdout.write(f"Fetched assets/vendor/{path}")
+            sizes = build_bundles()
+        except (AssetError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for bundle, size in sizes.items():
+            self.stdout.write(f"{BUILD_DIR.name}/{bundle}: {size} bytes")
+        self.stdout.write(self.style.SUCCESS("Done! Assets built; run collectstatic to hash and compress them."))
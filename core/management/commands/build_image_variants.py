@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.images import build_event_variants
+from core.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит производные изображений мероприятий (миниатюры AVIF/WebP/JPEG), "
+        "которых ещё нет: после загрузки старых данных или потерянных фоновых задач."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--event", type=int, action="append", help="Только эти мероприятия (id).")
+        parser.add_argument("--rebuild", action="store_true", help="Пересобрать все (например, после смены IMAGE_VARIANT_WIDTHS).")
+
+    def handle(self, *args, **options) -> None:
+        events = Event.objects.exclude(Q(image="") | Q(image__isnull=True)).order_by("id")
+        if options["event"]:
+            events = events.filter(pk__in=options["event"])
+        if options["rebuild"]:
+            events.update(image_variants={})
+
+        built = failed = 0
+        for event_id in events.values_list("id", flat=True).iterator():
+            try:
+                built += build_event_variants(event_id)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Event {event_id}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"Done! Variants built for {built} events, failed: {failed}."))
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+# движки, хранящие сессии в django_session
+DB_ENGINES = ("django.contrib.sessions.backends.db", "django.contrib.sessions.backends.cached_db")
+
+
+def delete_expired_sessions(batch_size: int, pause: float = 0.0) -> int:
+    """
+    Удаляет истёкшие строки django_session пачками по batch_size (по индексу
+    expire_date): каждая пачка — короткий DELETE в своей транзакции, без долгих
+    блокировок и разрастания WAL, как у одного DELETE на миллионы строк.
+    """
+    deleted = 0
+    now = timezone.now()
+    while True:
+        keys = list(Session.objects.filter(expire_date__lt=now).values_list("pk", flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += Session.objects.filter(pk__in=keys).delete()[0]
+        if len(keys) < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет истёкшие сессии пачками (вместо clearsessions одним DELETE). "
+        "Для кэша и signed cookies удалять нечего — истечение проверяется само."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=5000, help="Строк в одном DELETE.")
+        parser.add_argument("--pause", type=float, default=0.1, help="Пауза между пачками, секунд.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.0,
+            help="Повторять каждые N секунд (0 — один проход и выход; удобно для cron).",
+        )
+
+    def handle(self, *args, **options) -> None:
+        while True:
+            close_old_connections()
+            if settings.SESSION_ENGINE in DB_ENGINES:
+                deleted = delete_expired_sessions(options["batch_size"], options["pause"])
+                self.stdout.write(self.style.SUCCESS(f"Done! Expired sessions deleted: {deleted}."))
+            else:
+                # cache / signed_cookies / сторонние движки — их собственная очистка
+                try:
+                    import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+                except NotImplementedError:
+                    pass
+                self.stdout.write(f"{settings.SESSION_ENGINE}: expired sessions are not stored in the DB.")
+                return
+
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.changes import delete_expired_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет следы удалений (Tombstone) старше CHANGES_FEED_TOMBSTONE_RETENTION_DAYS пачками. "
+        "Партнёр с курсором старше этого срока получает 410 cursor_expired и синхронизируется с нуля."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=5000, help="Строк в одном DELETE.")
+        parser.add_argument("--pause", type=float, default=0.1, help="Пауза между пачками, секунд.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.0,
+            help="Повторять каждые N секунд (0 — один проход и выход; удобно для cron).",
+        )
+
+    def handle(self, *args, **options) -> None:
+        while True:
+            close_old_connections()
+            try:
+                deleted = delete_expired_tombstones(options["batch_size"], options["pause"])
+            except ImproperlyConfigured as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f"Done! Expired tombstones deleted: {deleted}."))
+
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.cache import invalidate_event_lists
+from core.trending import rebuild_popularity, update_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Обновляет рейтинг «в тренде»: добавляет к EventPopularity только лайки и заявки "
+        "новее водяного знака. Запускать периодически (cron или --interval)."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, help="Строк источника за одну транзакцию.")
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Пересчитать с нуля (после смены весов/полураспада; учитывает снятые лайки).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.0,
+            help="Повторять каждые N секунд (0 — один проход и выход).",
+        )
+
+    def handle(self, *args, **options) -> None:
+        rebuild = options["rebuild"]
+        while True:
+            close_old_connections()
+            started = time.perf_counter()
+            try:
+                if rebuild:
+                    processed = rebuild_popularity(options["batch_size"])
+                    rebuild = False
+                else:
+                    processed = update_popularity(options["batch_size"])
+            except ImproperlyConfigured as exc:
+                raise CommandError(str(exc))
+            if any(processed.values()):
+                invalidate_event_lists()
+
+            summary = ", ".join(f"{name}: {count}" for name, count in processed.items())
+            self.stdout.write(self.style.SUCCESS(f"Done! Rows processed — {summary} ({time.perf_counter() - started:.1f}s)."))
+
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
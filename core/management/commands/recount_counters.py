@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.counters import recount_event_counters, recount_user_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает денормализованные счётчики мероприятий (лайки/заявки/места) и кабинетов волонтёров."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать мероприятия с расхождениями, ничего не изменяя.",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options) -> None:
+        if options["dry_run"]:
+            drifted = recount_event_counters(dry_run=True)
+            users = recount_user_stats(dry_run=True)
+            self.stdout.write(self.style.WARNING(f"Events with drifted counters: {drifted}, volunteer stats: {users}"))
+            return
+
+        fixed = recount_event_counters()
+        users = recount_user_stats()
+        self.stdout.write(self.style.SUCCESS(f"Done! Counters repaired for {fixed} event(s) and {users} volunteer(s)."))
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.export_jobs import claim_next_job, run_export_job
+from core.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = "Воркер фоновых выгрузок: опрашивает очередь ExportJob в БД (без брокера) и строит файлы."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--once", action="store_true", help="Обработать очередь и выйти.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Пауза между опросами пустой очереди, секунд (по умолчанию 2).",
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.stdout.write(self.style.WARNING("Export worker started."))
+
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            self.stdout.write(f"Job #{job.pk}: {job.model_label}...")
+            job = run_export_job(job)
+            if job.status == ExportJob.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(f"Job #{job.pk}: done, {job.rows_processed} rows."))
+            else:
+                self.stdout.write(self.style.ERROR(f"Job #{job.pk}: failed.\n{job.error}"))
+
+        self.stdout.write(self.style.SUCCESS("Done! Queue is empty."))
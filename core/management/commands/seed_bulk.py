@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.utils import timezone
+
+from core.cache import invalidate_categories
+from core.counters import create_user_stats, recount_event_counters
+from core.models import Category, Event, EventLike, VolunteerApplication
+
+
+# словарь для названий/описаний: текст должен быть разнообразным, иначе поиск
+# и его замеры (bench_search) бессмысленны
+ACTIVITIES = (
+    "Субботник", "Уборка", "Посадка деревьев", "Сбор вещей", "Помощь приюту", "Фестиваль",
+    "Благотворительный марафон", "Мастер-класс", "Донорская акция", "Экологический квест",
+)
+PLACES = (
+    "в парке", "на набережной", "в детском доме", "в библиотеке", "в приюте для животных",
+    "у реки", "в доме престарелых", "в лесу", "на стадионе", "в школе",
+)
+CITIES = ("Москва", "Казань", "Новосибирск", "Екатеринбург", "Самара", "Пермь", "Томск", "Сочи")
+DETAILS = (
+    "Нужны волонтёры для организации и встречи гостей.",
+    "Инвентарь и перчатки выдадим на месте.",
+    "Подойдёт тем, кто любит работать с детьми.",
+    "Помогаем животным найти новый дом.",
+    "После работы — общий обед и фотосессия.",
+    "Собираем тёплую одежду, книги и игрушки.",
+    "Требуется помощь с регистрацией участников.",
+    "Сажаем саженцы и убираем мусор вдоль берега.",
+)
+
+
+@contextmanager
+def _manual_timestamps(*model_classes: type[models.Model]):
+    """
+    Отключает auto_now/auto_now_add на время генерации: created_at/updated_at
+    размазываются по прошлому, иначе у всех строк была бы одна и та же дата.
+    """
+    saved = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateTimeField) and (field.auto_now or field.auto_now_add):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _zipf_counts(total: int, buckets: int, exponent: float, cap: int) -> list[int]:
+    """
+    Сколько строк достаётся каждому рангу популярности: n_r ~ 1 / r^s, но не больше
+    cap (пар без повторов). Излишек упёршихся в cap раздаётся остальным по тем же весам.
+    """
+    weights = [1.0 / (rank ** exponent) for rank in range(1, buckets + 1)]
+    counts = [0] * buckets
+    remaining = total
+    open_ranks = list(range(buckets))
+    while remaining > 0 and open_ranks:
+        scale = remaining / sum(weights[r] for r in open_ranks)
+        assigned = 0
+        for r in open_ranks:
+            n = min(cap - counts[r], int(round(weights[r] * scale)))
+            counts[r] += n
+            assigned += n
+        if not assigned:
+            break
+        remaining -= assigned
+        open_ranks = [r for r in open_ranks if counts[r] < cap]
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует большой синтетический набор данных через bulk_create "
+        "(мероприятия, пользователи, лайки и заявки с Zipf-распределением популярности)."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--events", type=int, default=100_000)
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--likes", type=int, default=10_000_000)
+        parser.add_argument("--applications", type=int, default=1_000_000)
+        parser.add_argument("--zipf", type=float, default=1.1, help="Показатель Zipf для популярности мероприятий.")
+        parser.add_argument("--days", type=int, default=365, help="На сколько дней в прошлое размазывать даты.")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="bulk", help="Префикс имён (для повторных прогонов).")
+
+    def handle(self, *args, **options) -> None:
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.days = options["days"]
+        prefix = options["prefix"]
+
+        if User.objects.filter(username__startswith=f"{prefix}_user_").exists():
+            raise CommandError(f"Users with prefix '{prefix}' already exist, pass another --prefix.")
+
+        started = time.perf_counter()
+        self.stdout.write(self.style.WARNING("Seeding bulk data..."))
+
+        with _manual_timestamps(Category, Event, EventLike, VolunteerApplication, User):
+            category_ids = self._create_categories(prefix, options["categories"])
+            event_ids = self._create_events(category_ids, options["events"])
+            user_ids = self._create_users(prefix, options["users"])
+            self._create_likes(event_ids, user_ids, options["likes"], options["zipf"])
+            self._create_applications(event_ids, user_ids, options["applications"], options["zipf"])
+
+        self.stdout.write("Recounting event counters...")
+        recount_event_counters(Event.objects.filter(pk__in=event_ids))
+        # bulk_create мимо сигналов: сводки кабинетов — по уже созданным заявкам и лайкам
+        for start in range(0, len(user_ids), self.batch_size):
+            create_user_stats(user_ids[start:start + self.batch_size].tolist())
+        invalidate_categories()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Done! Bulk data created in {elapsed:.1f}s."))
+
+    # --- helpers ---
+
+    def _past(self) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def _bulk(self, model: type[models.Model], objects: Iterable[models.Model], total: int) -> array:
+        """bulk_create пачками; возвращает id созданных строк (array — компактно для миллионов)."""
+        ids = array("q")
+        batch: list[models.Model] = []
+        done = 0
+
+        def flush() -> None:
+            nonlocal done
+            created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+            ids.extend(obj.pk for obj in created if obj.pk is not None)
+            done += len(batch)
+            batch.clear()
+            self.stdout.write(f"  {model.__name__}: {done}/{total}", ending="\r")
+
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                flush()
+        if batch:
+            flush()
+        self.stdout.write(f"  {model.__name__}: {done}")
+        return ids
+
+    def _create_categories(self, prefix: str, count: int) -> array:
+        return self._bulk(
+            Category,
+            (
+                Category(name=f"{prefix} category {i}", created_at=self.now, updated_at=self.now)
+                for i in range(count)
+            ),
+            count,
+        )
+
+    def _create_events(self, category_ids: array, count: int) -> array:
+        def events() -> Iterator[Event]:
+            for i in range(count):
+                created = self._past()
+                activity, place = self.rng.choice(ACTIVITIES), self.rng.choice(PLACES)
+                yield Event(
+                    category_id=self.rng.choice(category_ids),
+                    title=f"{activity} {place} #{i}",
+                    description=" ".join(self.rng.sample(DETAILS, 3)),
+                    # половина — в будущем, половина — в прошлом
+                    event_date=self.now + timedelta(days=self.rng.randrange(-self.days, self.days)),
+                    location=f"{self.rng.choice(CITIES)}, площадка {self.rng.randrange(1000)}",
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        return self._bulk(Event, events(), count)
+
+    def _create_users(self, prefix: str, count: int) -> array:
+        # один хеш на всех: PBKDF2 на миллион пользователей заняло бы часы
+        password = make_password(f"{prefix}12345")
+
+        def users() -> Iterator[User]:
+            for i in range(count):
+                joined = self._past()
+                yield User(
+                    username=f"{prefix}_user_{i}",
+                    email=f"{prefix}_user_{i}@example.com",
+                    password=password,
+                    date_joined=joined,
+                )
+
+        return self._bulk(User, users(), count)
+
+    def _popular_pairs(self, event_ids: array, user_ids: array, total: int, exponent: float) -> Iterator[tuple[int, int]]:
+        """
+        Пары (event_id, user_id) без повторов: мероприятие ранга r получает ~1/r^s
+        от общего числа строк, пользователи внутри мероприятия — без повторов.
+        """
+        ranked = list(event_ids)
+        self.rng.shuffle(ranked)
+        counts = _zipf_counts(total, len(ranked), exponent, cap=len(user_ids))
+        for event_id, n in zip(ranked, counts):
+            if n <= 0:
+                continue
+            for index in self.rng.sample(range(len(user_ids)), n):
+                yield event_id, user_ids[index]
+
+    def _create_likes(self, event_ids: array, user_ids: array, total: int, exponent: float) -> None:
+        if not event_ids or not user_ids:
+            return
+
+        def likes() -> Iterator[EventLike]:
+            for event_id, user_id in self._popular_pairs(event_ids, user_ids, total, exponent):
+                created = self._past()
+                yield EventLike(event_id=event_id, user_id=user_id, created_at=created, updated_at=created)
+
+        self._bulk(EventLike, likes(), total)
+
+    def _create_applications(self, event_ids: array, user_ids: array, total: int, exponent: float) -> None:
+        if not event_ids or not user_ids:
+            return
+
+        # лист ожидания бывает только у мероприятий с лимитом мест, а их seed_bulk не создаёт
+        statuses = [s.value for s in VolunteerApplication.Status if s != VolunteerApplication.Status.WAITLISTED]
+
+        def applications() -> Iterator[VolunteerApplication]:
+            for event_id, user_id in self._popular_pairs(event_ids, user_ids, total, exponent):
+                created = self._past()
+                yield VolunteerApplication(
+                    event_id=event_id,
+                    user_id=user_id,
+                    motivation="Хочу помочь.",
+                    status=self.rng.choice(statuses),
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._bulk(VolunteerApplication, applications(), total)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import IO
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .exports import aiter_chunks
+from .images import VARIANTS_DIR
+
+# старые сборки Python не знают этих типов
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("image/webp", ".webp")
+
+# файлы с хешем содержимого в имени не меняются никогда
+IMMUTABLE_PREFIXES = (f"{VARIANTS_DIR}/",)
+# каталоги, которые /media/ не отдаёт: старые выгрузки (до EXPORT_ROOT) лежали в MEDIA_ROOT/exports/
+PRIVATE_DIRS = frozenset({"exports"})
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class MediaFileResponse(FileResponse):
+    # без sendfile файл читается в Python — блоками побольше стандартных 4 КБ
+    block_size = 64 * 1024
+
+
+class _FileRange:
+    """
+    Кусок файла [start, start + length) для FileResponse. fileno() — от исходного
+    файла, позиция уже выставлена на start: gunicorn отдаёт такой файл через
+    sendfile() ровно на Content-Length байт, остальные серверы читают через read().
+    """
+
+    def __init__(self, fh: IO[bytes], start: int, length: int) -> None:
+        fh.seek(start)
+        self._fh = fh
+        self._remaining = length
+        self.name = fh.name
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size < 0 else min(size, self._remaining)
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self._fh.fileno()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def _etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _cache_control(path: str) -> str:
+    if path.startswith(IMMUTABLE_PREFIXES):
+        return "public, max-age=31536000, immutable"
+    return f"public, max-age={settings.MEDIA_MAX_AGE}"
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Один диапазон "bytes=a-b" / "bytes=a-" / "bytes=-n" → (start, end) включительно.
+    None — заголовок игнорируется (нет, несколько диапазонов, синтаксическая ошибка):
+    отдаём файл целиком, как разрешает RFC 9110.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if match is None or size == 0:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _range_applies(request: HttpRequest, etag: str, last_modified: str) -> bool:
+    # If-Range: диапазон — только если у клиента та же версия файла
+    if_range = request.headers.get("If-Range")
+    return if_range is None or if_range in (etag, last_modified)
+
+
+def _accel_response(path: str, fullpath: Path, content_type: str) -> HttpResponse:
+    """Отдачу файла делает прокси: nginx (X-Accel-Redirect) или Apache/lighttpd (X-Sendfile)."""
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_ACCEL == "x-accel-redirect":
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + quote(path)
+    else:
+        response["X-Sendfile"] = str(fullpath)
+    return response
+
+
+def _file_response(request: HttpRequest, fh: IO[bytes], length: int, content_type: str, status: int = 200):
+    if isinstance(request, ASGIRequest):
+        # под ASGI синхронный итератор Django сначала собрал бы в память целиком
+        chunks = iter(lambda: fh.read(MediaFileResponse.block_size), b"")
+        response = StreamingHttpResponse(aiter_chunks(chunks, batch=4), content_type=content_type, status=status)
+        response._resource_closers.append(fh.close)
+    else:
+        response = MediaFileResponse(fh, content_type=content_type, status=status)
+    response["Content-Length"] = length
+    return response
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    Отдача MEDIA_ROOT.
+
+    - ETag (mtime + размер) и Last-Modified: If-None-Match / If-Modified-Since → 304
+      без открытия файла; Cache-Control «навсегда» для производных изображений;
+    - MEDIA_ACCEL — сам файл отдаёт прокси (X-Accel-Redirect / X-Sendfile),
+      воркер Python занят только проверкой заголовков;
+    - иначе FileResponse: под gunicorn это sendfile() без копирования через Python;
+      Range (один диапазон) → 206, If-Range учитывается.
+    """
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    # сравниваем уже нормализованный путь: «a/../exports/...» тоже не пройдёт
+    relative = fullpath.relative_to(os.path.abspath(settings.MEDIA_ROOT))
+    if relative.parts and relative.parts[0] in PRIVATE_DIRS:
+        raise Http404
+    try:
+        stat = fullpath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not fullpath.is_file():
+        raise Http404
+
+    etag = _etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": _cache_control(path)}
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(fullpath.name)
+    content_type = content_type or "application/octet-stream"
+
+    if settings.MEDIA_ACCEL:
+        response = _accel_response(path, fullpath, content_type)
+    else:
+        size = stat.st_size
+        try:
+            byte_range = parse_range(request.headers.get("Range", ""), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if byte_range and not _range_applies(request, etag, last_modified):
+            byte_range = None
+
+        fh = fullpath.open("rb")
+        if byte_range is None:
+            response = _file_response(request, fh, size, content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = _file_response(request, _FileRange(fh, start, length), length, content_type, status=206)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Accept-Ranges"] = "bytes"
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
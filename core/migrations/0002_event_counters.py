@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:52
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Event = apps.get_model("core", "Event")
+    EventLike = apps.get_model("core", "EventLike")
+    VolunteerApplication = apps.get_model("core", "VolunteerApplication")
+
+    def count_of(model):
+        counts = (
+            model.objects
+            .filter(event=OuterRef("pk"))
+            .order_by()
+            .values("event")
+            .annotate(c=Count("pk"))
+            .values("c")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    Event.objects.update(
+        likes_count=count_of(EventLike),
+        applications_count=count_of(VolunteerApplication),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Заявок'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Лайков'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
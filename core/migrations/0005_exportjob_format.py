@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='format',
+            field=models.CharField(default='xlsx', max_length=20, verbose_name='Формат'),
+        ),
+    ]
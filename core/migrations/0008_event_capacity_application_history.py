@@ -0,0 +1,77 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_seats_taken(apps, schema_editor):
+    Event = apps.get_model("core", "Event")
+    VolunteerApplication = apps.get_model("core", "VolunteerApplication")
+    approved = (
+        VolunteerApplication.objects
+        .filter(event=OuterRef("pk"), status="approved")
+        .order_by()
+        .values("event")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    Event.objects.filter(applications__status="approved").update(
+        seats_taken=Coalesce(Subquery(approved, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_event_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(choices=[('new', 'Новая'), ('approved', 'Одобрена'), ('rejected', 'Отклонена')], max_length=20, verbose_name='Было')),
+                ('new_status', models.CharField(choices=[('new', 'Новая'), ('approved', 'Одобрена'), ('rejected', 'Отклонена')], max_length=20, verbose_name='Стало')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Когда')),
+            ],
+            options={
+                'verbose_name': 'Смена статуса заявки',
+                'verbose_name_plural': 'История статусов заявок',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Мест'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Занято мест'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='application_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['event', 'status', 'created_at', 'id'], name='application_event_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='applicationstatuschange',
+            name='application',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='core.volunteerapplication', verbose_name='Заявка'),
+        ),
+        migrations.AddField(
+            model_name='applicationstatuschange',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Модератор'),
+        ),
+        migrations.RunPython(fill_seats_taken, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:20
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def recount_seats(apps, schema_editor):
+    # место теперь занимают и новые заявки, не только одобренные
+    Event = apps.get_model("core", "Event")
+    VolunteerApplication = apps.get_model("core", "VolunteerApplication")
+    seats = (
+        VolunteerApplication.objects
+        .filter(event=OuterRef("pk"), status__in=["new", "approved"])
+        .order_by()
+        .values("event")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    Event.objects.update(seats_taken=Coalesce(Subquery(seats, output_field=IntegerField()), Value(0)))
+
+    # новые заявки сверх лимита — в лист ожидания (последние поданные)
+    for event in Event.objects.filter(capacity__isnull=False, seats_taken__gt=F("capacity")):
+        excess = (
+            VolunteerApplication.objects
+            .filter(event=event, status="new")
+            .order_by("-created_at", "-id")
+            .values_list("pk", flat=True)[: event.seats_taken - event.capacity]
+        )
+        moved = VolunteerApplication.objects.filter(pk__in=list(excess)).update(status="waitlisted")
+        Event.objects.filter(pk=event.pk).update(seats_taken=F("seats_taken") - moved)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_event_capacity_application_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='applicationstatuschange',
+            name='new_status',
+            field=models.CharField(choices=[('new', 'Новая'), ('approved', 'Одобрена'), ('rejected', 'Отклонена'), ('waitlisted', 'В листе ожидания')], max_length=20, verbose_name='Стало'),
+        ),
+        migrations.AlterField(
+            model_name='applicationstatuschange',
+            name='old_status',
+            field=models.CharField(choices=[('new', 'Новая'), ('approved', 'Одобрена'), ('rejected', 'Отклонена'), ('waitlisted', 'В листе ожидания')], max_length=20, verbose_name='Было'),
+        ),
+        migrations.AlterField(
+            model_name='volunteerapplication',
+            name='status',
+            field=models.CharField(choices=[('new', 'Новая'), ('approved', 'Одобрена'), ('rejected', 'Отклонена'), ('waitlisted', 'В листе ожидания')], default='new', max_length=20, verbose_name='Статус'),
+        ),
+        migrations.RunPython(recount_seats, migrations.RunPython.noop),
+    ]
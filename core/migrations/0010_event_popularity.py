@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_application_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingWatermark',
+            fields=[
+                ('source', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventPopularity',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='core.event')),
+                ('score', models.FloatField(default=0.0, verbose_name='Рейтинг')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Популярность мероприятия',
+                'verbose_name_plural': 'Популярность мероприятий',
+                'indexes': [models.Index(fields=['score', 'event'], name='popularity_score_idx')],
+            },
+        ),
+    ]
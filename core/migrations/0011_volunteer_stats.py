@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0010_event_popularity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='volunteer_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('applications_new', models.PositiveIntegerField(default=0)),
+                ('applications_approved', models.PositiveIntegerField(default=0)),
+                ('applications_rejected', models.PositiveIntegerField(default=0)),
+                ('applications_waitlisted', models.PositiveIntegerField(default=0)),
+                ('likes_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Статистика волонтёра',
+                'verbose_name_plural': 'Статистика волонтёров',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='eventlike',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='like_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='application_user_created_idx'),
+        ),
+    ]
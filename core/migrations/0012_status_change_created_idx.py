@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_volunteer_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicationstatuschange',
+            index=models.Index(fields=['created_at', 'id'], name='status_change_created_idx'),
+        ),
+    ]
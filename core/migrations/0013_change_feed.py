@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_status_change_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('events', 'Мероприятие'), ('likes', 'Лайк'), ('applications', 'Заявка')], max_length=20, verbose_name='Тип')),
+                ('object_id', models.BigIntegerField(verbose_name='Id удалённой строки')),
+                ('deleted_at', models.DateTimeField(verbose_name='Удалено')),
+            ],
+            options={
+                'verbose_name': 'Удалённая запись',
+                'verbose_name_plural': 'Удалённые записи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['updated_at', 'id'], name='event_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventlike',
+            index=models.Index(fields=['updated_at', 'id'], name='like_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['updated_at', 'id'], name='application_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['kind', 'deleted_at', 'object_id'], name='tombstone_kind_deleted_idx'),
+        ),
+    ]
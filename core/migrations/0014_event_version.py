@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:10
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE SEQUENCE IF NOT EXISTS core_event_version_seq",
+            "DROP SEQUENCE IF EXISTS core_event_version_seq",
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='version',
+            field=models.BigIntegerField(db_default=core.models.NextEventVersion(), editable=False, verbose_name='Версия'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['version'], name='event_version_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:05
+
+import posixpath
+import secrets
+
+import core.models
+from django.core.files.storage import default_storage, storages
+from django.db import migrations, models
+
+
+def move_exports(apps, schema_editor):
+    # готовые выгрузки из публичного MEDIA_ROOT/exports/ — в EXPORT_ROOT под случайным именем
+    ExportJob = apps.get_model("core", "ExportJob")
+    private = storages["exports"]
+    for job in ExportJob.objects.exclude(file="").iterator():
+        old_name = job.file.name
+        if not default_storage.exists(old_name):
+            continue
+        extension = posixpath.splitext(old_name)[1]
+        with default_storage.open(old_name, "rb") as fh:
+            new_name = private.save(f"export-{secrets.token_urlsafe(24)}{extension}", fh)
+        ExportJob.objects.filter(pk=job.pk).update(file=new_name)
+        default_storage.delete(old_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_event_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file',
+            field=models.FileField(blank=True, storage=core.models.export_storage, upload_to='', verbose_name='Файл'),
+        ),
+        migrations.RunPython(move_exports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:40
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_missing_stats(apps, schema_editor):
+    # сводка кабинета теперь есть у каждого пользователя: досчитываем тех, кто не открывал кабинет
+    qn = schema_editor.connection.ops.quote_name
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    VolunteerStats = apps.get_model("core", "VolunteerStats")
+    VolunteerApplication = apps.get_model("core", "VolunteerApplication")
+    EventLike = apps.get_model("core", "EventLike")
+    statuses = ["new", "approved", "rejected", "waitlisted"]
+    sql = """
+        INSERT INTO {stats} (user_id, {status_fields}, likes_count)
+        SELECT u.id, {status_counts}, COALESCE(l.c, 0)
+        FROM {users} AS u
+        LEFT JOIN (
+            SELECT user_id, {status_filters} FROM {applications} GROUP BY user_id
+        ) AS a ON a.user_id = u.id
+        LEFT JOIN (SELECT user_id, count(*) AS c FROM {likes} GROUP BY user_id) AS l ON l.user_id = u.id
+        ON CONFLICT (user_id) DO NOTHING
+    """.format(
+        stats=qn(VolunteerStats._meta.db_table),
+        users=qn(User._meta.db_table),
+        applications=qn(VolunteerApplication._meta.db_table),
+        likes=qn(EventLike._meta.db_table),
+        status_fields=", ".join(f"applications_{status}" for status in statuses),
+        status_counts=", ".join(f"COALESCE(a.{status}, 0)" for status in statuses),
+        status_filters=", ".join(f"count(*) FILTER (WHERE status = '{status}') AS {status}" for status in statuses),
+    )
+    schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_export_private_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:10
+
+from django.conf import settings
+from django.db import migrations
+
+# прежняя эпоха баллов (2026-01-01 UTC), секунды Unix-эпохи
+OLD_EPOCH = 1767225600
+
+
+def to_log_score(apps, schema_editor):
+    # score = Σ вес × 2^((t − OLD_EPOCH) / полураспад) -> log2 Σ вес × 2^(t / полураспад);
+    # полураспад — текущий из настроек (после его смены всё равно нужен --rebuild)
+    EventPopularity = apps.get_model("core", "EventPopularity")
+    table = schema_editor.connection.ops.quote_name(EventPopularity._meta.db_table)
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600.0
+    schema_editor.execute(f"DELETE FROM {table} WHERE score <= 0")
+    schema_editor.execute(
+        f"UPDATE {table} SET score = ln(score) / ln(2.0::float8) + %s::float8 / %s::float8",
+        [OLD_EPOCH, half_life],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_volunteer_stats_backfill'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_log_score, migrations.RunPython.noop),
+    ]
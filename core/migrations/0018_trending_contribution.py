@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+def backfill_contributions(apps, schema_editor):
+    # уже учтённые строки (id не выше водяного знака) — их пары больше вклада не дают
+    qn = schema_editor.connection.ops.quote_name
+    TrendingContribution = apps.get_model("core", "TrendingContribution")
+    TrendingWatermark = apps.get_model("core", "TrendingWatermark")
+    sources = {"likes": apps.get_model("core", "EventLike"), "applications": apps.get_model("core", "VolunteerApplication")}
+    for mark in TrendingWatermark.objects.filter(source__in=sources):
+        schema_editor.execute(
+            """
+            INSERT INTO {contributions} (source, user_id, event_id)
+            SELECT %s, user_id, event_id FROM {rows} WHERE id <= %s
+            ON CONFLICT DO NOTHING
+            """.format(
+                contributions=qn(TrendingContribution._meta.db_table),
+                rows=qn(sources[mark.source]._meta.db_table),
+            ),
+            [mark.source, mark.last_id],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_popularity_log_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingContribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50)),
+                ('user_id', models.BigIntegerField()),
+                ('event_id', models.BigIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'user_id', 'event_id'), name='trending_contribution_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_contributions, migrations.RunPython.noop),
+    ]
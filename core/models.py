@@ -1,8 +1,27 @@
 from __future__ import annotations
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.files.storage import storages
 from django.db import models
 
+# Конфигурация полнотекстового поиска PostgreSQL (стемминг, стоп-слова)
+SEARCH_CONFIG = "russian"
+
+# Версии мероприятий берутся из одной последовательности: у каждого
+# мероприятия своя версия, но они сравнимы между собой, и max(version) по
+# индексу меняется при любом изменении любого мероприятия (core/http_cache.py).
+EVENT_VERSION_SEQUENCE = "core_event_version_seq"
+
+
+class NextEventVersion(models.Func):
+    """nextval() последовательности версий: для Event.version в UPDATE и по умолчанию."""
+
+    template = f"nextval('{EVENT_VERSION_SEQUENCE}')"
+    output_field = models.BigIntegerField()
+
+
 class TimeStampedModel(models.Model):
     """Абстрактная базовая модель: общие поля created_at/updated_at."""
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
@@ -23,6 +42,13 @@ class Category(TimeStampedModel):
         return self.name
 
 
+class EventManager(models.Manager):
+    """search_vector нужен только в условиях поиска — в объекты его не читаем."""
+
+    def get_queryset(self) -> models.QuerySet:
+        return super().get_queryset().defer("search_vector")
+
+
 class Event(TimeStampedModel):
     category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="events", verbose_name="Категория")
     title = models.CharField(max_length=200, verbose_name="Название")
@@ -30,11 +56,55 @@ class Event(TimeStampedModel):
     event_date = models.DateTimeField(verbose_name="Дата и время")
     location = models.CharField(max_length=200, verbose_name="Место")
     image = models.ImageField(upload_to="events/", blank=True, null=True, verbose_name="Изображение")
+    # Производные изображения (ширины × форматы, core/images.py); строятся в фоне
+    # после сохранения, source — для какого файла image они построены
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Денормализованные счётчики: поддерживаются сигналами (core/signals.py),
+    # сверяются командой recount_counters.
+    likes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Лайков")
+    applications_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Заявок")
+
+    # Лимит мест (пусто — без ограничения). seats_taken — число заявок, занимающих
+    # место (новые и одобренные, см. VolunteerApplication.SEAT_STATUSES); меняется
+    # только атомарно вместе со статусами заявок (core/moderation.py), поэтому не
+    # превышает capacity. Не влезшие заявки ждут в листе ожидания.
+    capacity = models.PositiveIntegerField(null=True, blank=True, verbose_name="Мест")
+    seats_taken = models.PositiveIntegerField(default=0, editable=False, verbose_name="Занято мест")
+
+    # Версия страницы мероприятия для ETag: новое значение из EVENT_VERSION_SEQUENCE
+    # при сохранении и тем же UPDATE, что сдвигает счётчики (лайки, заявки, места)
+    version = models.BigIntegerField(db_default=NextEventVersion(), editable=False, verbose_name="Версия")
+
+    # Поисковый вектор — генерируемая колонка: PostgreSQL пересчитывает её сам при
+    # любом INSERT/UPDATE (в т.ч. bulk_create и update()), без сигналов.
+    # Вес: название — A, место — B, описание — C.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("location", weight="B", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = EventManager()
 
     class Meta:
         verbose_name = "Мероприятие"
         verbose_name_plural = "Мероприятия"
         ordering = ["-event_date"]
+        indexes = [
+            # keyset-пагинация ленты: (event_date, id) и то же внутри категории
+            models.Index(fields=["event_date", "id"], name="event_date_id_idx"),
+            models.Index(fields=["category", "event_date", "id"], name="event_category_date_id_idx"),
+            GinIndex(fields=["search_vector"], name="event_search_vector_idx"),
+            # ленты изменений /api/changes/ (core/changes.py): курсор (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="event_updated_id_idx"),
+            # ETag ленты: max(version) — одно чтение индекса
+            models.Index(fields=["version"], name="event_version_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -45,6 +115,10 @@ class VolunteerApplication(TimeStampedModel):
         NEW = "new", "Новая"
         APPROVED = "approved", "Одобрена"
         REJECTED = "rejected", "Отклонена"
+        WAITLISTED = "waitlisted", "В листе ожидания"
+
+    # статусы, занимающие место на мероприятии (Event.seats_taken)
+    SEAT_STATUSES = frozenset({Status.NEW, Status.APPROVED})
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="volunteer_applications")
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="applications")
@@ -55,11 +129,56 @@ class VolunteerApplication(TimeStampedModel):
         verbose_name = "Заявка волонтёра"
         verbose_name_plural = "Заявки волонтёров"
         unique_together = ("user", "event")  # один пользователь — одна заявка на мероприятие
+        indexes = [
+            # экран модерации: очередь заявок по статусу (и внутри мероприятия) в порядке подачи
+            models.Index(fields=["status", "created_at", "id"], name="application_status_created_idx"),
+            models.Index(fields=["event", "status", "created_at", "id"], name="application_event_status_idx"),
+            # кабинет волонтёра: свои заявки от новых к старым (keyset)
+            models.Index(fields=["user", "created_at", "id"], name="application_user_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="application_updated_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} -> {self.event} ({self.status})"
 
 
+class ApplicationStatusChange(models.Model):
+    """
+    Журнал смены статусов заявок: только добавление (пишется пачкой через
+    bulk_create в core/moderation.py), в админке — только просмотр.
+    """
+
+    application = models.ForeignKey(
+        VolunteerApplication,
+        on_delete=models.CASCADE,
+        related_name="status_changes",
+        verbose_name="Заявка",
+    )
+    old_status = models.CharField(max_length=20, choices=VolunteerApplication.Status.choices, verbose_name="Было")
+    new_status = models.CharField(max_length=20, choices=VolunteerApplication.Status.choices, verbose_name="Стало")
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Модератор",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Когда")
+
+    class Meta:
+        verbose_name = "Смена статуса заявки"
+        verbose_name_plural = "История статусов заявок"
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # changelist в админке: ORDER BY created_at DESC, id DESC LIMIT ...
+            models.Index(fields=["created_at", "id"], name="status_change_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.application_id}: {self.old_status} -> {self.new_status}"
+
+
 class EventLike(TimeStampedModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="event_likes")
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="likes")
@@ -68,6 +187,182 @@ class EventLike(TimeStampedModel):
         verbose_name = "Лайк"
         verbose_name_plural = "Лайки"
         unique_together = ("user", "event")
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="like_user_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="like_updated_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} likes {self.event}"
+
+
+class EventPopularity(models.Model):
+    """
+    Рейтинг «в тренде» (core/trending.py): log2 суммы вкладов лайков и заявок,
+    каждый — вес × 2^(время / период полураспада). Вклад растёт со временем
+    экспоненциально, поэтому старые баллы сравнимы с новыми без пересчёта всей
+    таблицы, а логарифм не переполняет double. Пополняется командой compute_trending.
+    """
+
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name="popularity")
+    score = models.FloatField(default=0.0, verbose_name="Рейтинг")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    class Meta:
+        verbose_name = "Популярность мероприятия"
+        verbose_name_plural = "Популярность мероприятий"
+        indexes = [
+            # лента «в тренде»: top-K и keyset по (score, event_id)
+            models.Index(fields=["score", "event"], name="popularity_score_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event_id}: {self.score:g}"
+
+
+class TrendingWatermark(models.Model):
+    """До какого id таблица-источник (лайки, заявки) уже учтена в EventPopularity."""
+
+    source = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.source} <= {self.last_id}"
+
+
+class TrendingContribution(models.Model):
+    """
+    Пара (пользователь, мероприятие), уже давшая вклад в EventPopularity от
+    источника: повторный лайк после снятия (новая строка, новый id) баллов
+    не добавляет.
+    """
+
+    source = models.CharField(max_length=50)
+    user_id = models.BigIntegerField()
+    event_id = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source", "user_id", "event_id"], name="trending_contribution_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.source}: {self.user_id} -> {self.event_id}"
+
+
+class VolunteerStats(models.Model):
+    """
+    Сводка кабинета волонтёра: заявки по статусам и число лайков. Строка
+    создаётся вместе с пользователем (core/signals.py), дальше счётчики
+    сдвигаются вместе с заявками и лайками (core/counters.py), сверяются
+    командой recount_counters.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="volunteer_stats",
+    )
+    applications_new = models.PositiveIntegerField(default=0)
+    applications_approved = models.PositiveIntegerField(default=0)
+    applications_rejected = models.PositiveIntegerField(default=0)
+    applications_waitlisted = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Статистика волонтёра"
+        verbose_name_plural = "Статистика волонтёров"
+
+    def __str__(self) -> str:
+        return f"stats of {self.user_id}"
+
+    @property
+    def applications_total(self) -> int:
+        return self.applications_new + self.applications_approved + self.applications_rejected + self.applications_waitlisted
+
+
+class Tombstone(models.Model):
+    """
+    След удалённой строки для лент изменений (core/changes.py): партнёр,
+    синхронизирующийся по курсору, узнаёт об удалении. Пишется сигналами
+    post_delete и SQL лайков в core/services.py.
+    """
+
+    class Kind(models.TextChoices):
+        EVENT = "events", "Мероприятие"
+        LIKE = "likes", "Лайк"
+        APPLICATION = "applications", "Заявка"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices, verbose_name="Тип")
+    object_id = models.BigIntegerField(verbose_name="Id удалённой строки")
+    deleted_at = models.DateTimeField(verbose_name="Удалено")
+
+    class Meta:
+        verbose_name = "Удалённая запись"
+        verbose_name_plural = "Удалённые записи"
+        indexes = [
+            models.Index(fields=["kind", "deleted_at", "object_id"], name="tombstone_kind_deleted_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.object_id} deleted"
+
+
+def export_storage():
+    # хранилище задаётся настройками (STORAGES["exports"]), а не путём в миграции
+    return storages["exports"]
+
+
+class ExportJob(TimeStampedModel):
+    """Фоновая выгрузка из админки (обрабатывается командой run_export_worker)."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "В очереди"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Готово"
+        FAILED = "failed", "Ошибка"
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="export_jobs",
+        verbose_name="Инициатор",
+    )
+    model_label = models.CharField(max_length=100, verbose_name="Таблица (модель)")
+    columns = models.JSONField(default=list, blank=True, verbose_name="Колонки")
+    format = models.CharField(max_length=20, default="xlsx", verbose_name="Формат")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED, verbose_name="Статус")
+    rows_total = models.PositiveIntegerField(null=True, blank=True, verbose_name="Всего строк")
+    rows_processed = models.PositiveIntegerField(default=0, verbose_name="Обработано строк")
+    # имя файла — случайный токен (core/export_jobs.py), отдаёт только export_job_download
+    file = models.FileField(storage=export_storage, blank=True, verbose_name="Файл")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начато")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершено")
+
+    class Meta:
+        verbose_name = "Задача экспорта"
+        verbose_name_plural = "Задачи экспорта"
+        ordering = ["-created_at"]
+        indexes = [
+            # выборка очереди воркером: status + FIFO
+            models.Index(fields=["status", "created_at"], name="exportjob_status_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model_label} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    @property
+    def progress_percent(self) -> int:
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.rows_total:
+            return 0
+        return min(100, self.rows_processed * 100 // self.rows_total)
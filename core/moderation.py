@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import invalidate_event
+from .counters import application_stats_field, shift_user_stats
+from .models import ApplicationStatusChange, Event, NextEventVersion, VolunteerApplication
+
+# Места на мероприятии: Event.seats_taken — число заявок в SEAT_STATUSES (новые и
+# одобренные). Счётчик меняется только здесь, атомарно:
+# - подача заявки занимает место условным UPDATE ... WHERE seats_taken < capacity
+#   (блокировка строки мероприятия до конца транзакции — параллельные заявки
+#   выстраиваются в очередь и не переполняют лимит); мест нет — лист ожидания;
+# - модерация пачками: один UPDATE ... WHERE id = ANY(...) на все заявки, журнал —
+#   одним bulk_create, счётчики — одним UPDATE по всем мероприятиям, строки
+#   мероприятий заблокированы (SELECT ... FOR UPDATE);
+# - освободившееся место (отказ, удаление заявки) сразу отдаётся первому
+#   из листа ожидания (FIFO по времени подачи).
+# Сводки кабинетов (VolunteerStats) сдвигаются тем же проходом, одним UPDATE.
+
+Status = VolunteerApplication.Status
+SEAT_STATUSES = VolunteerApplication.SEAT_STATUSES
+
+
+@dataclass
+class ModerationResult:
+    changed: int = 0
+    # заявки, не получившие место из-за лимита: {event_id: сколько}
+    no_seats: dict[int, int] = field(default_factory=dict)
+    # заявки, переведённые из листа ожидания на освободившиеся места
+    promoted: int = 0
+
+    @property
+    def skipped_for_capacity(self) -> int:
+        return sum(self.no_seats.values())
+
+
+def _sql_names() -> dict[str, str]:
+    qn = connection.ops.quote_name
+    return {
+        "applications": qn(VolunteerApplication._meta.db_table),
+        "events": qn(Event._meta.db_table),
+        "next_version": NextEventVersion.template,
+    }
+
+
+def _lock_events(event_ids: Iterable[int]) -> dict[int, int | None]:
+    """{event_id: свободных мест (None — без лимита)} с блокировкой строк; порядок по id — без дедлоков."""
+    rows = (
+        Event.objects.filter(pk__in=list(event_ids))
+        .order_by("pk")
+        .select_for_update()
+        .values_list("pk", "capacity", "seats_taken")
+    )
+    return {pk: None if capacity is None else max(capacity - taken, 0) for pk, capacity, taken in rows}
+
+
+def _within_capacity(application_ids: list[int], status: str, free: dict[int, int | None], result: ModerationResult) -> list[int]:
+    """
+    Какие заявки можно перевести в status, занимающий место: уже занимающие — все,
+    остальные — по каждому мероприятию в порядке подачи, пока есть места.
+    """
+    candidates = (
+        VolunteerApplication.objects.filter(pk__in=application_ids)
+        .exclude(status=status)
+        .order_by("created_at", "pk")
+        .values_list("pk", "event_id", "status")
+    )
+    allowed = []
+    for pk, event_id, current in candidates:
+        if current in SEAT_STATUSES or free[event_id] is None:
+            allowed.append(pk)
+        elif free[event_id] > 0:
+            free[event_id] -= 1
+            allowed.append(pk)
+        else:
+            result.no_seats[event_id] = result.no_seats.get(event_id, 0) + 1
+    return allowed
+
+
+def _update_statuses(application_ids: list[int], status: str) -> list[tuple[int, int, int, str]]:
+    """
+    Один оператор: новый статус всем заявкам из списка (кроме уже имеющих его).
+    Возвращает (id, event_id, user_id, прежний статус) реально изменённых.
+    """
+    sql = """
+        WITH old AS (
+            SELECT id, status FROM {applications}
+            WHERE id = ANY(%s) AND status <> %s
+            FOR UPDATE
+        )
+        UPDATE {applications} AS a
+        SET status = %s, updated_at = %s
+        FROM old
+        WHERE a.id = old.id
+        RETURNING a.id, a.event_id, a.user_id, old.status
+    """.format(**_sql_names())
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [application_ids, status, status, now])
+        return cursor.fetchall()
+
+
+def _shift_seats(deltas: Counter) -> None:
+    """seats_taken += delta сразу для всех мероприятий (unnest двух массивов)."""
+    deltas = {event_id: delta for event_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    sql = """
+        UPDATE {events} AS e
+        SET seats_taken = GREATEST(e.seats_taken + d.delta, 0), version = {next_version}
+        FROM unnest(%s::bigint[], %s::integer[]) AS d(id, delta)
+        WHERE e.id = d.id
+    """.format(**_sql_names())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [list(deltas), list(deltas.values())])
+
+
+def _seat_delta(old: str, new: str) -> int:
+    return (new in SEAT_STATUSES) - (old in SEAT_STATUSES)
+
+
+def _shift_user_stats(changed: list[tuple[int, int, int, str]], status: str) -> None:
+    deltas: dict[int, Counter] = {}
+    for _, _, user_id, old in changed:
+        user_deltas = deltas.setdefault(user_id, Counter())
+        user_deltas[application_stats_field(old)] -= 1
+        user_deltas[application_stats_field(status)] += 1
+    shift_user_stats(deltas)
+
+
+def _apply(application_ids: list[int], status: str, moderator) -> list[tuple[int, int, int, str]]:
+    """Смена статуса + журнал + счётчики мест и сводок. Строки мероприятий уже заблокированы."""
+    changed = _update_statuses(application_ids, status) if application_ids else []
+    if not changed:
+        return changed
+
+    ApplicationStatusChange.objects.bulk_create(
+        ApplicationStatusChange(application_id=pk, old_status=old, new_status=status, changed_by=moderator)
+        for pk, _, _, old in changed
+    )
+    deltas: Counter = Counter()
+    for _, event_id, _, old in changed:
+        deltas[event_id] += _seat_delta(old, status)
+    _shift_seats(deltas)
+    _shift_user_stats(changed, status)
+    return changed
+
+
+def _promote_waitlisted(free: dict[int, int | None]) -> list[tuple[int, int, int, str]]:
+    """Первые из листа ожидания — на свободные места ({event_id: мест, None — без лимита})."""
+    ids: list[int] = []
+    for event_id, seats in free.items():
+        if seats == 0:
+            continue
+        waiting = (
+            VolunteerApplication.objects.filter(event_id=event_id, status=Status.WAITLISTED)
+            .order_by("created_at", "pk")
+            .values_list("pk", flat=True)
+        )
+        ids.extend(waiting if seats is None else waiting[:seats])
+    return _apply(ids, Status.NEW, None)
+
+
+def _invalidate_on_commit(event_ids: set[int]) -> None:
+    if event_ids:
+        transaction.on_commit(lambda: [invalidate_event(event_id) for event_id in event_ids])
+
+
+def moderate_applications(application_ids: Iterable[int], status: str, moderator=None) -> ModerationResult:
+    """
+    Переводит заявки в статус status. Статусы, занимающие место, соблюдают
+    capacity: не влезшие заявки остаются как были (ModerationResult.no_seats).
+    Освободившиеся места тут же занимает лист ожидания.
+    """
+    ids = list(dict.fromkeys(application_ids))
+    result = ModerationResult()
+    if not ids:
+        return result
+
+    with transaction.atomic():
+        event_ids = set(VolunteerApplication.objects.filter(pk__in=ids).values_list("event_id", flat=True))
+        free = _lock_events(event_ids)
+        if status in SEAT_STATUSES:
+            ids = _within_capacity(ids, status, free, result)
+
+        changed = _apply(ids, status, moderator)
+        released = {event_id for _, event_id, _, old in changed if _seat_delta(old, status) < 0}
+        promoted = _promote_waitlisted(_lock_events(released)) if released else []
+
+        _invalidate_on_commit({event_id for _, event_id, _, _ in changed})
+
+    result.changed = len(changed)
+    result.promoted = len(promoted)
+    return result
+
+
+def fill_free_seats(event_id: int) -> int:
+    """
+    Отдаёт свободные места мероприятия листу ожидания (после освобождения места
+    или увеличения capacity). Возвращает число переведённых заявок.
+    """
+    free = _lock_events([event_id])
+    if event_id not in free:  # мероприятие удаляется вместе с заявками
+        return 0
+    promoted = _promote_waitlisted(free)
+    _invalidate_on_commit({event_id})
+    return len(promoted)
+
+
+def release_seat(event_id: int) -> int:
+    """Место освободилось мимо moderate_applications (заявку удалили)."""
+    Event.objects.filter(pk=event_id).update(
+        seats_taken=Greatest(F("seats_taken") - 1, Value(0)), version=NextEventVersion()
+    )
+    return fill_free_seats(event_id)
+
+
+def submit_application(user, event: Event, motivation: str) -> VolunteerApplication | None:
+    """
+    Подача заявки без гонок «проверил — вставил»: повтор (в т.ч. параллельный)
+    даёт None вместо IntegrityError, место занимается условным UPDATE, а без
+    свободного места заявка встаёт в лист ожидания.
+    """
+    try:
+        with transaction.atomic():
+            # сначала место (UPDATE блокирует строку мероприятия — подачи идут по очереди),
+            # потом заявка сразу в нужном статусе; повтор откатывает и занятое место
+            has_seat = (
+                Event.objects.filter(pk=event.pk)
+                .filter(Q(capacity__isnull=True) | Q(seats_taken__lt=F("capacity")))
+                .update(seats_taken=F("seats_taken") + 1, version=NextEventVersion())
+            )
+            application = VolunteerApplication(
+                user=user,
+                event=event,
+                motivation=motivation,
+                status=Status.NEW if has_seat else Status.WAITLISTED,
+            )
+            application.seat_reserved = True  # место уже учтено, сигнал его не добавит
+            application.save(force_insert=True)
+            return application
+    except IntegrityError:
+        return None
+
+
+def waitlist_position(application: VolunteerApplication) -> int:
+    """Место в листе ожидания (1 — следующий на освободившееся место)."""
+    ahead = VolunteerApplication.objects.filter(
+        Q(created_at__lt=application.created_at) | Q(created_at=application.created_at, pk__lt=application.pk),
+        event_id=application.event_id,
+        status=Status.WAITLISTED,
+    )
+    return ahead.count() + 1
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, Mapping, Sequence, TypeVar
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+T = TypeVar("T")
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или не подходит к набору ключей."""
+
+
+@dataclass
+class KeysetPage(Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def _resolve_field(model: type[models.Model], path: str) -> models.Field:
+    """Поле модели по пути вида "popularity__score" (для приведения типов курсора)."""
+    opts = model._meta
+    parts = path.split("__")
+    for part in parts[:-1]:
+        opts = opts.get_field(part).related_model._meta
+    name = parts[-1]
+    return opts.pk if name == "pk" else opts.get_field(name)
+
+
+def _key_field(model: type[models.Model], key: str, annotations: Mapping[str, Any]) -> models.Field:
+    # аннотация (например, rank поиска) — тип берём из её output_field
+    if key in annotations:
+        return annotations[key].output_field
+    return _resolve_field(model, key)
+
+
+def _json_default(value: Any) -> Any:
+    # DjangoJSONEncoder обрезает микросекунды у datetime — для курсора нужна
+    # точная граница, иначе строки с одинаковой миллисекундой теряются
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    model: type[models.Model],
+    keys: Sequence[str],
+    annotations: Mapping[str, Any] | None = None,
+) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor("cursor does not match keys")
+
+    try:
+        return [_key_field(model, key, annotations or {}).to_python(value) for key, value in zip(keys, values)]
+    except (FieldDoesNotExist, ValidationError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+
+
+def _after(keys: Sequence[str], values: Sequence[Any], descending: bool) -> Q:
+    """
+    Условие "строго после курсора" для кортежа (k1, k2, ...).
+    Дополнительный k1 <= v1 (k1 >= v1) даёт планировщику диапазон по индексу.
+    """
+    op = "lt" if descending else "gt"
+    first_bound = Q(**{f"{keys[0]}__{op}e": values[0]})
+
+    condition = Q()
+    for i, key in enumerate(keys):
+        equal_prefix = {keys[j]: values[j] for j in range(i)}
+        condition |= Q(**equal_prefix, **{f"{key}__{op}": values[i]})
+    return first_bound & condition
+
+
+def _keyset_queryset(queryset: QuerySet[T], keys: Sequence[str], cursor: str | None, descending: bool) -> QuerySet[T]:
+    ordering = [f"-{k}" if descending else k for k in keys]
+    qs = queryset.order_by(*ordering)
+
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, keys, queryset.query.annotations)
+        qs = qs.filter(_after(keys, values, descending))
+    return qs
+
+
+def _keyset_page(items: list[T], keys: Sequence[str], per_page: int) -> KeysetPage[T]:
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([_key_value(last, k) for k in keys])
+    return KeysetPage(items=items, next_cursor=next_cursor)
+
+
+def paginate_keyset(
+    queryset: QuerySet[T],
+    *,
+    keys: Sequence[str],
+    per_page: int,
+    cursor: str | None = None,
+    descending: bool = True,
+) -> KeysetPage[T]:
+    """
+    Keyset-пагинация (seek method): страница берётся по индексу на keys,
+    без OFFSET, поэтому стоимость не зависит от глубины страницы.
+    Последний ключ должен быть уникальным (обычно "id").
+    """
+    qs = _keyset_queryset(queryset, keys, cursor, descending)
+    # +1 строка — чтобы узнать, есть ли следующая страница, без COUNT(*)
+    return _keyset_page(list(qs[: per_page + 1]), keys, per_page)
+
+
+async def apaginate_keyset(
+    queryset: QuerySet[T],
+    *,
+    keys: Sequence[str],
+    per_page: int,
+    cursor: str | None = None,
+    descending: bool = True,
+) -> KeysetPage[T]:
+    """То же, что paginate_keyset, через async ORM (для async-вьюх)."""
+    qs = _keyset_queryset(queryset, keys, cursor, descending)
+    return _keyset_page([obj async for obj in qs[: per_page + 1]], keys, per_page)
+
+
+def _key_value(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):  # queryset.values()
+        return obj[key]
+    for part in key.split("__"):
+        obj = getattr(obj, part)
+    return obj
+
+
+# --- оценка числа строк для больших changelist'ов админки ---
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """
+    Число строк по оценке планировщика PostgreSQL (EXPLAIN без выполнения,
+    по статистике pg_class/pg_statistic). Не PostgreSQL — None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для changelist'ов на миллионах строк: точный COUNT(*) читает всю
+    таблицу (или весь отфильтрованный диапазон индекса). Если оценка не меньше
+    ADMIN_ESTIMATED_COUNT_THRESHOLD — показываем её (число страниц приблизительное),
+    меньше — считаем точно: на малых выборках COUNT дешёвый, а оценка грубая.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Вьюха выполнила больше SQL-запросов, чем разрешено PERF_QUERY_BUDGETS."""
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль (nearest-rank) по уже отсортированной выборке."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    db_seconds: float = 0.0
+    template_seconds: float = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("perf_request_metrics", default=None)
+
+
+class _Series:
+    """Скользящее окно последних значений + накопительные count/sum для Prometheus."""
+
+    def __init__(self, window: int) -> None:
+        self.values: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict:
+        ordered = sorted(self.values)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            **{f"p{int(q * 100)}": percentile(ordered, q) for q in QUANTILES},
+        }
+
+
+METRICS = ("wall_seconds", "db_seconds", "template_seconds", "queries")
+
+
+class PerfRegistry:
+    """Статистика по вьюхам в памяти процесса (у каждого воркера своя)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._series: dict[str, dict[str, _Series]] = {}
+
+    def record(self, view_name: str, **values: float) -> None:
+        window = settings.PERF_WINDOW
+        with self._lock:
+            series = self._series.setdefault(view_name, {m: _Series(window) for m in METRICS})
+            for metric, value in values.items():
+                series[metric].add(value)
+
+    def snapshot(self) -> dict[str, dict[str, dict]]:
+        with self._lock:
+            return {
+                view: {metric: s.summary() for metric, s in series.items()}
+                for view, series in sorted(self._series.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+registry = PerfRegistry()
+
+
+def prometheus_text(snapshot: dict[str, dict[str, dict]] | None = None) -> str:
+    """Экспозиция в текстовом формате Prometheus (summary по каждой метрике)."""
+    snapshot = registry.snapshot() if snapshot is None else snapshot
+    lines: list[str] = []
+    names = {
+        "wall_seconds": ("volunteer_view_duration_seconds", "Wall time per request"),
+        "db_seconds": ("volunteer_view_db_seconds", "Total SQL time per request"),
+        "template_seconds": ("volunteer_view_template_seconds", "Template render time per request"),
+        "queries": ("volunteer_view_queries", "SQL queries per request"),
+    }
+    for metric, (name, help_text) in names.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} summary")
+        for view, series in snapshot.items():
+            data = series[metric]
+            label = view.replace("\\", "\\\\").replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'{name}{{view="{label}",quantile="{q}"}} {data[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'{name}_sum{{view="{label}"}} {data["sum"]:.6f}')
+            lines.append(f'{name}_count{{view="{label}"}} {data["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.db_wrapper(execute, sql, params, many, context)
+
+
+def _add_query_recorder(sender, connection, **kwargs) -> None:
+    # соединения у каждого потока свои (в ASGI ORM работает в потоках sync_to_async),
+    # поэтому обёртка ставится на каждое новое соединение, а метрики запроса
+    # находятся через contextvar
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_recorder() -> None:
+    connection_created.connect(_add_query_recorder, dispatch_uid="core.perf.query_recorder")
+
+
+def install_template_timer() -> None:
+    """
+    Оборачивает рендер шаблонов Django-бэкенда: время копится в метриках текущего
+    запроса. Вложенные шаблоны (include/extends) не считаются повторно.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "_perf_wrapped", False):
+        return
+    original = Template.render
+    depth: ContextVar[int] = ContextVar("perf_template_depth", default=0)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None or depth.get():
+            return original(self, context, request)
+        token = depth.set(1)
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            metrics.template_seconds += time.perf_counter() - started
+            depth.reset(token)
+
+    render._perf_wrapped = True  # type: ignore[attr-defined]
+    Template.render = render  # type: ignore[method-assign]
+
+
+def _server_timing(metrics: RequestMetrics, wall_seconds: float) -> str:
+    return ", ".join(
+        [
+            f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.queries} queries"',
+            f"tpl;dur={metrics.template_seconds * 1000:.1f}",
+            f"total;dur={wall_seconds * 1000:.1f}",
+        ]
+    )
+
+
+def _check_budget(view_name: str, queries: int) -> None:
+    budget = settings.PERF_QUERY_BUDGETS.get(view_name)
+    if budget is None or queries <= budget:
+        return
+    message = f"{view_name}: {queries} SQL queries, budget is {budget}"
+    if settings.PERF_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class PerformanceMiddleware:
+    """
+    Метрики на каждый запрос: число SQL-запросов, время SQL, время рендера
+    шаблонов, полное время. Заголовок Server-Timing, окна p50/p95/p99 по имени
+    вьюхи (/admin/perf/) и проверка бюджетов запросов PERF_QUERY_BUDGETS.
+    Работает и в WSGI, и в ASGI (не заставляет Django оборачивать async-вьюхи).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, started)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, started)
+
+    def _finish(self, request: HttpRequest, response: HttpResponse, metrics: RequestMetrics, started: float) -> HttpResponse:
+        wall_seconds = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else "<unresolved>"
+        registry.record(
+            view_name,
+            wall_seconds=wall_seconds,
+            db_seconds=metrics.db_seconds,
+            template_seconds=metrics.template_seconds,
+            queries=metrics.queries,
+        )
+        response["Server-Timing"] = _server_timing(metrics, wall_seconds)
+        _check_budget(view_name, metrics.queries)
+        return response
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import re
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, FloatField, QuerySet
+from django.db.models.functions import Cast
+
+from .models import SEARCH_CONFIG, Event
+
+# Маркеры подсветки в ts_headline: управляющие символы не встречаются в тексте,
+# поэтому фрагмент можно экранировать целиком и только потом вставить <mark>
+# (см. фильтр highlight в core_extras).
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def web_query(text: str) -> SearchQuery:
+    """Запрос посетителя: синтаксис websearch ("фраза", or, -исключить)."""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+
+def prefix_query(text: str) -> SearchQuery | None:
+    """
+    Запрос по началу слов (для админки, где вводят «волонт», «моск»):
+    каждое слово превращается в word:*, слова соединяются через &.
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    return SearchQuery(" & ".join(f"{word}:*" for word in words), config=SEARCH_CONFIG, search_type="raw")
+
+
+def search_events(queryset: QuerySet[Event], query: SearchQuery) -> QuerySet[Event]:
+    """Фильтр по GIN-индексу search_vector и релевантность в аннотации rank."""
+    # ts_rank возвращает real (float4), а значение из курсора приходит как float8:
+    # строка на границе страницы не равна своему же курсору и выпадает из
+    # keyset-условия — сравниваем double с double
+    rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+    return queryset.filter(search_vector=query).annotate(rank=rank)
+
+
+def with_headline(queryset: QuerySet[Event], query: SearchQuery) -> QuerySet[Event]:
+    """
+    Фрагмент описания с подсвеченными совпадениями (аннотация headline).
+    ts_headline дорогой — при ORDER BY ... LIMIT PostgreSQL считает его только
+    для строк страницы.
+    """
+    return queryset.annotate(
+        headline=SearchHeadline(
+            "description",
+            query,
+            config=SEARCH_CONFIG,
+            start_sel=HIGHLIGHT_START,
+            stop_sel=HIGHLIGHT_STOP,
+            max_words=35,
+            min_words=15,
+        )
+    )
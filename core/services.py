@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_event
+from .changes import record_deletion
+from .counters import adjust_event_counters, shift_user_stats
+from .models import Event, EventLike, NextEventVersion, Tombstone
+
+# Лайки пишутся одиночными SQL-операторами (INSERT ... ON CONFLICT DO NOTHING /
+# DELETE ... RETURNING), без чтения перед записью: двойной клик или параллельные
+# запросы не дают IntegrityError по unique_together и не сбивают счётчик.
+# Сигналы EventLike при этом не срабатывают — счётчики (в т.ч. likes_count
+# в VolunteerStats), Tombstone для ленты изменений и кэш обновляются здесь.
+
+
+def _like_sql_names() -> dict[str, str]:
+    qn = connection.ops.quote_name
+    return {
+        "likes": qn(EventLike._meta.db_table),
+        "events": qn(Event._meta.db_table),
+        "tombstones": qn(Tombstone._meta.db_table),
+        "user_id": qn(EventLike._meta.get_field("user").column),
+        "event_id": qn(EventLike._meta.get_field("event").column),
+        "next_version": NextEventVersion.template,
+    }
+
+
+def _now_param():
+    return connection.ops.adapt_datetimefield_value(timezone.now())
+
+
+def _finish(user_id: int, event_id: int, delta: int) -> None:
+    if delta:
+        adjust_event_counters(event_id, likes=delta)
+        shift_user_stats({user_id: {"likes_count": delta}})
+        transaction.on_commit(lambda: invalidate_event(event_id))
+
+
+def _toggle_postgresql(user_id: int, event_id: int) -> tuple[bool, int]:
+    """Один оператор: удалить лайк, а если удалять нечего — вставить; счётчик и Tombstone — там же."""
+    sql = """
+        WITH del AS (
+            DELETE FROM {likes} WHERE {user_id} = %s AND {event_id} = %s RETURNING id
+        ), tomb AS (
+            INSERT INTO {tombstones} (kind, object_id, deleted_at)
+            SELECT %s, id, %s FROM del
+        ), ins AS (
+            INSERT INTO {likes} (created_at, updated_at, {user_id}, {event_id})
+            SELECT %s, %s, %s, %s WHERE NOT EXISTS (SELECT 1 FROM del)
+            ON CONFLICT ({user_id}, {event_id}) DO NOTHING
+            RETURNING 1
+        ), upd AS (
+            UPDATE {events}
+            SET likes_count = GREATEST(likes_count + (SELECT count(*) FROM ins) - (SELECT count(*) FROM del), 0),
+                version = {next_version}
+            WHERE id = %s
+            RETURNING likes_count
+        )
+        SELECT (SELECT count(*) FROM del), (SELECT count(*) FROM ins), (SELECT likes_count FROM upd)
+    """.format(**_like_sql_names())
+    now = _now_param()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, event_id, Tombstone.Kind.LIKE, now, now, now, user_id, event_id, event_id])
+        deleted, inserted, likes_count = cursor.fetchone()
+
+    if deleted or inserted:
+        shift_user_stats({user_id: {"likes_count": inserted - deleted}})
+        transaction.on_commit(lambda: invalidate_event(event_id))
+    # ни удаления, ни вставки — параллельный запрос только что поставил лайк
+    return not deleted, likes_count
+
+
+def _insert_like(user_id: int, event_id: int) -> bool:
+    sql = """
+        INSERT INTO {likes} (created_at, updated_at, {user_id}, {event_id})
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT ({user_id}, {event_id}) DO NOTHING
+        RETURNING 1
+    """.format(**_like_sql_names())
+    now = _now_param()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [now, now, user_id, event_id])
+        return cursor.fetchone() is not None
+
+
+def _delete_like(user_id: int, event_id: int) -> bool:
+    sql = "DELETE FROM {likes} WHERE {user_id} = %s AND {event_id} = %s RETURNING id".format(**_like_sql_names())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, event_id])
+        row = cursor.fetchone()
+    if row is None:
+        return False
+    record_deletion(Tombstone.Kind.LIKE, row[0])
+    return True
+
+
+def set_like(user, event_id: int, liked: bool) -> bool:
+    """Идемпотентно ставит/снимает лайк. Возвращает True, если что-то изменилось."""
+    with transaction.atomic():
+        if liked:
+            changed = _insert_like(user.pk, event_id)
+            _finish(user.pk, event_id, 1 if changed else 0)
+        else:
+            changed = _delete_like(user.pk, event_id)
+            _finish(user.pk, event_id, -1 if changed else 0)
+    return changed
+
+
+def toggle_like(user, event_id: int) -> tuple[bool, int]:
+    """
+    Переключает лайк. Возвращает (лайк стоит после операции, новое число лайков).
+    Несуществующее мероприятие — IntegrityError по внешнему ключу.
+    """
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            return _toggle_postgresql(user.pk, event_id)
+
+        if _delete_like(user.pk, event_id):
+            _finish(user.pk, event_id, -1)
+            liked = False
+        else:
+            liked = True
+            if _insert_like(user.pk, event_id):
+                _finish(user.pk, event_id, 1)
+
+        likes_count = Event.objects.filter(pk=event_id).values_list("likes_count", flat=True).first()
+        return liked, likes_count or 0
+
+
+def apply_like_operations(user, operations: Iterable[tuple[int, bool]]) -> dict[int, tuple[bool, int]]:
+    """
+    Пакет лайков/анлайков (офлайн-синхронизация) в одной транзакции.
+    Для каждого мероприятия побеждает последняя операция. Возвращает
+    {event_id: (лайк стоит, число лайков)} — только для существующих мероприятий.
+
+    Весь пакет — один оператор, сколько бы в нём ни было операций: вставка
+    (ON CONFLICT DO NOTHING) и удаление по массивам, Tombstone на удалённые,
+    счётчики мероприятий одним UPDATE по сгруппированным сдвигам; плюс один
+    UPDATE сводки кабинета.
+    """
+    desired: dict[int, bool] = {}
+    for event_id, liked in operations:
+        desired[event_id] = liked
+    if not desired:
+        return {}
+
+    sql = """
+        WITH ops AS (
+            SELECT d.event_id, d.liked
+            FROM unnest(%(event_ids)s::bigint[], %(liked)s::boolean[]) AS d(event_id, liked)
+            JOIN {events} AS e ON e.id = d.event_id
+        ), ins AS (
+            INSERT INTO {likes} (created_at, updated_at, {user_id}, {event_id})
+            SELECT %(now)s, %(now)s, %(user)s, event_id FROM ops WHERE liked
+            ON CONFLICT ({user_id}, {event_id}) DO NOTHING
+            RETURNING {event_id} AS event_id
+        ), del AS (
+            DELETE FROM {likes} AS l
+            USING ops
+            WHERE l.{user_id} = %(user)s AND l.{event_id} = ops.event_id AND NOT ops.liked
+            RETURNING l.id, l.{event_id} AS event_id
+        ), tomb AS (
+            INSERT INTO {tombstones} (kind, object_id, deleted_at)
+            SELECT %(kind)s, id, %(now)s FROM del
+        ), deltas AS (
+            SELECT event_id, sum(delta) AS delta
+            FROM (SELECT event_id, 1 AS delta FROM ins UNION ALL SELECT event_id, -1 FROM del) AS changes
+            GROUP BY event_id
+        ), upd AS (
+            UPDATE {events} AS e
+            SET likes_count = GREATEST(e.likes_count + deltas.delta, 0), version = {next_version}
+            FROM deltas
+            WHERE e.id = deltas.event_id
+            RETURNING e.id, e.likes_count
+        )
+        -- внутри оператора {events} читается до UPDATE: новое значение берём из upd
+        SELECT ops.event_id, ops.liked, COALESCE(upd.likes_count, e.likes_count), upd.id IS NOT NULL,
+               (SELECT count(*) FROM ins) - (SELECT count(*) FROM del)
+        FROM ops
+        JOIN {events} AS e ON e.id = ops.event_id
+        LEFT JOIN upd ON upd.id = ops.event_id
+    """.format(**_like_sql_names())
+    params = {
+        "event_ids": list(desired),
+        "liked": list(desired.values()),
+        "user": user.pk,
+        "now": _now_param(),
+        "kind": Tombstone.Kind.LIKE,
+    }
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        changed = [event_id for event_id, _, _, was_changed, _ in rows if was_changed]
+        likes_delta = rows[0][4] if rows else 0
+        shift_user_stats({user.pk: {"likes_count": likes_delta}})
+        if changed:
+            transaction.on_commit(lambda: [invalidate_event(event_id) for event_id in changed])
+
+    return {event_id: (liked, likes_count) for event_id, liked, likes_count, _, _ in rows}
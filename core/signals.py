@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_categories, invalidate_event
+from .changes import record_deletion
+from .counters import adjust_event_counters, application_stats_field, shift_user_stats
+from .images import schedule_variants
+from .moderation import release_seat
+from .models import Category, Event, EventLike, NextEventVersion, Tombstone, VolunteerApplication, VolunteerStats
+
+
+# Счётчики на Event (и сводка кабинета VolunteerStats) меняются в той же транзакции, что и сама строка:
+# сигналы срабатывают и для вьюх, и для удаления из админки, и для каскадов
+# (удаление пользователя/мероприятия).
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_created(sender, instance, created: bool, raw: bool = False, **kwargs) -> None:
+    # сводка кабинета заводится сразу: shift_user_stats только сдвигает существующие строки
+    if created and not raw:
+        VolunteerStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=EventLike)
+def like_created(sender, instance: EventLike, created: bool, raw: bool = False, **kwargs) -> None:
+    if created and not raw:
+        adjust_event_counters(instance.event_id, likes=1)
+        shift_user_stats({instance.user_id: {"likes_count": 1}})
+    _invalidate_event_on_commit(instance.event_id)
+
+
+@receiver(post_delete, sender=EventLike)
+def like_deleted(sender, instance: EventLike, **kwargs) -> None:
+    adjust_event_counters(instance.event_id, likes=-1)
+    shift_user_stats({instance.user_id: {"likes_count": -1}})
+    record_deletion(Tombstone.Kind.LIKE, instance.pk)
+    _invalidate_event_on_commit(instance.event_id)
+
+
+@receiver(post_save, sender=VolunteerApplication)
+def application_created(sender, instance: VolunteerApplication, created: bool, raw: bool = False, **kwargs) -> None:
+    if created and not raw:
+        # создана сразу с местом (seed, shell) — мимо submit_application, место учитываем здесь
+        holds_seat = instance.status in VolunteerApplication.SEAT_STATUSES and not getattr(instance, "seat_reserved", False)
+        adjust_event_counters(instance.event_id, applications=1, seats=1 if holds_seat else 0)
+        shift_user_stats({instance.user_id: {application_stats_field(instance.status): 1}})
+    _invalidate_event_on_commit(instance.event_id)
+
+
+@receiver(post_delete, sender=VolunteerApplication)
+def application_deleted(sender, instance: VolunteerApplication, **kwargs) -> None:
+    adjust_event_counters(instance.event_id, applications=-1)
+    shift_user_stats({instance.user_id: {application_stats_field(instance.status): -1}})
+    record_deletion(Tombstone.Kind.APPLICATION, instance.pk)
+    # место удалённой заявки — следующему из листа ожидания
+    if instance.status in VolunteerApplication.SEAT_STATUSES:
+        release_seat(instance.event_id)
+    _invalidate_event_on_commit(instance.event_id)
+
+
+# Кэш страниц/карточек: версии сдвигаются только после коммита — иначе
+# параллельный запрос успеет закэшировать старые данные под новой версией.
+
+def _invalidate_event_on_commit(event_id: int) -> None:
+    transaction.on_commit(lambda: invalidate_event(event_id))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance: Event, **kwargs) -> None:
+    _invalidate_event_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance: Event, created: bool, raw: bool = False, **kwargs) -> None:
+    # правка из админки/shell: новая версия для ETag (у новых строк — db_default)
+    if not created and not raw:
+        Event.objects.filter(pk=instance.pk).update(version=NextEventVersion())
+
+
+# удаления для лент изменений /api/changes/ (каскады тоже проходят через сигналы)
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance: Event, **kwargs) -> None:
+    record_deletion(Tombstone.Kind.EVENT, instance.pk)
+
+
+@receiver(post_save, sender=Event)
+def event_image_changed(sender, instance: Event, raw: bool = False, **kwargs) -> None:
+    # производные для нового файла (или очистка после удаления картинки)
+    current = instance.image.name if instance.image else ""
+    if not raw and (instance.image_variants or {}).get("source", "") != current:
+        schedule_variants(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance: Category, **kwargs) -> None:
+    transaction.on_commit(invalidate_categories)
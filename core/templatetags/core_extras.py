@@ -1,4 +1,10 @@
 from django import template
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+from core.images import srcset_data
+from core.models import VolunteerApplication
+from core.search import HIGHLIGHT_START, HIGHLIGHT_STOP
 
 register = template.Library()
 
@@ -6,3 +12,41 @@ register = template.Library()
 def has_group(user, group_name: str) -> bool:
     """Пример расширения прав (не обязателен): проверка группы."""
     return user.is_authenticated and user.groups.filter(name=group_name).exists()
+
+
+@register.filter
+def application_status_label(status: str | None) -> str:
+    """Человекочитаемый статус заявки по значению (без загрузки самой заявки)."""
+    if not status:
+        return ""
+    try:
+        return VolunteerApplication.Status(status).label
+    except ValueError:
+        return status
+
+
+@register.filter
+def highlight(fragment: str | None) -> str:
+    """Фрагмент ts_headline: текст экранируется, маркеры совпадений → <mark>."""
+    if not fragment:
+        return ""
+    return mark_safe(
+        conditional_escape(fragment)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+@register.inclusion_tag("includes/event_picture.html")
+def event_picture(event, sizes: str = "100vw", css_class: str = "", lazy: bool = True) -> dict:
+    """
+    <picture> с AVIF/WebP/JPEG-производными и srcset; пока производные не готовы —
+    обычный <img> с исходником.
+    """
+    return {
+        "event": event,
+        "picture": srcset_data(event.image_variants or {}),
+        "sizes": sizes,
+        "css_class": css_class,
+        "lazy": lazy,
+    }
@@ -0,0 +1,719 @@
+from __future__ import annotations
+
+import json
+import math
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import assets
+from .admin import AutocompleteFilter, LargeTableAdmin
+from .changes import delete_expired_tombstones
+from .counters import get_volunteer_stats
+from .export_jobs import enqueue_export, run_export_job
+from .exports import (
+    build_export_file,
+    get_admin_columns_and_headers,
+    get_export_model_admins,
+    get_export_queryset,
+    get_exporter,
+    iter_admin_rows,
+    iter_admin_rows_lookup,
+)
+from .images import generate_variants
+from .models import (
+    Category,
+    Event,
+    EventLike,
+    EventPopularity,
+    ExportJob,
+    Tombstone,
+    TrendingWatermark,
+    VolunteerApplication,
+    VolunteerStats,
+)
+from .moderation import moderate_applications, submit_application, waitlist_position
+from .pagination import encode_cursor
+from .perf import registry
+from .services import set_like
+from .trending import SOURCES, rebuild_popularity, update_popularity
+
+Status = VolunteerApplication.Status
+
+
+def make_event(**kwargs) -> Event:
+    category, _ = Category.objects.get_or_create(name="Тест")
+    defaults = {"title": "Субботник", "description": "-", "location": "Парк", "event_date": timezone.now() + timedelta(days=7)}
+    return Event.objects.create(category=category, **{**defaults, **kwargs})
+
+
+class ExportFilesTests(TestCase):
+    """Готовые выгрузки не лежат в MEDIA_ROOT и скачиваются только через админку."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = Path(tmp.name) / "media"
+        self.export_root = Path(tmp.name) / "exports"
+        overrides = override_settings(MEDIA_ROOT=self.media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # хранилище поля берётся из STORAGES["exports"] один раз, при импорте модели
+        storage = mock.patch.object(ExportJob._meta.get_field("file"), "storage", FileSystemStorage(self.export_root))
+        storage.start()
+        self.addCleanup(storage.stop)
+
+        Category.objects.create(name="Экология")
+        self.owner = User.objects.create_superuser("owner", password="x")
+        self.job = run_export_job(enqueue_export(self.owner, "core.Category", [], "csv"))
+
+    def test_file_is_outside_media_root_under_random_name(self) -> None:
+        self.assertEqual(self.job.status, "done", self.job.error)
+        path = Path(self.job.file.path)
+        self.assertTrue(path.is_relative_to(self.export_root))
+        self.assertNotEqual(path.stem, f"export-{self.job.pk}")
+        self.assertGreaterEqual(len(path.stem.removeprefix("export-")), 32)
+
+    def test_media_does_not_serve_exports(self) -> None:
+        (self.media_root / "exports").mkdir(parents=True)
+        (self.media_root / "exports" / "export-1.csv").write_text("id")
+        self.assertEqual(self.client.get("/media/exports/export-1.csv").status_code, 404)
+        self.assertEqual(self.client.get(f"/media/exports/{self.job.file.name}").status_code, 404)
+
+    def test_download_checks_permissions(self) -> None:
+        url = reverse("admin:export_job_download", args=[self.job.pk])
+        self.assertEqual(self.client.get(url).status_code, 302)  # гость — на вход в админку
+
+        self.client.force_login(User.objects.create_user("staff", password="x", is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(self.owner)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Экология", b"".join(response.streaming_content).decode("utf-8-sig"))
+
+
+class SubmitApplicationRaceTests(TransactionTestCase):
+    """Параллельная подача заявок: мест не больше capacity, лист ожидания — по порядку подачи."""
+
+    THREADS = 300
+    CAPACITY = 5
+
+    def _max_parallel_connections(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW max_connections")
+            return max(int(cursor.fetchone()[0]) - 20, 2)
+
+    def test_concurrent_submissions_never_overbook(self) -> None:
+        event = make_event(capacity=self.CAPACITY)
+        users = User.objects.bulk_create(User(username=f"volunteer{i}") for i in range(self.THREADS))
+
+        # потоков — сотни, одновременных соединений — не больше, чем даёт сервер
+        connections_left = threading.BoundedSemaphore(self._max_parallel_connections())
+        start = threading.Barrier(self.THREADS)
+        errors: list[BaseException] = []
+
+        def submit(user: User) -> None:
+            start.wait()
+            with connections_left:
+                try:
+                    # повторная подача — тоже гонка, вторая заявка не появляется
+                    submit_application(user, event, "Хочу помочь")
+                    submit_application(user, event, "Ещё раз")
+                except BaseException as exc:  # noqa: BLE001 — ошибка потока должна уронить тест
+                    errors.append(exc)
+                finally:
+                    connection.close()
+
+        threads = [threading.Thread(target=submit, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        event.refresh_from_db()
+        applications = VolunteerApplication.objects.filter(event=event)
+        self.assertEqual(applications.count(), self.THREADS)
+        self.assertEqual(event.seats_taken, self.CAPACITY)
+        self.assertEqual(applications.filter(status__in=VolunteerApplication.SEAT_STATUSES).count(), self.CAPACITY)
+
+        # лист ожидания: позиция — порядок подачи; освободившиеся места — первым в очереди
+        waiting = list(applications.filter(status=Status.WAITLISTED).order_by("created_at", "pk"))
+        self.assertEqual(len(waiting), self.THREADS - self.CAPACITY)
+        self.assertEqual([waitlist_position(a) for a in waiting[:3]], [1, 2, 3])
+
+        seated = applications.filter(status=Status.NEW).values_list("pk", flat=True)[:2]
+        result = moderate_applications(list(seated), Status.REJECTED)
+        self.assertEqual(result.promoted, 2)
+        promoted = set(applications.filter(status=Status.NEW).values_list("pk", flat=True))
+        self.assertTrue({waiting[0].pk, waiting[1].pk} <= promoted)
+        self.assertEqual(VolunteerApplication.objects.get(pk=waiting[2].pk).status, Status.WAITLISTED)
+        event.refresh_from_db()
+        self.assertEqual(event.seats_taken, self.CAPACITY)
+
+
+class AdminApplicationSeatsTests(TestCase):
+    """Заявка, добавленная в админке, занимает место только если оно есть."""
+
+    def test_admin_add_respects_capacity(self) -> None:
+        event = make_event(capacity=1)
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+        url = reverse("admin:core_volunteerapplication_add")
+        for i in range(3):
+            user = User.objects.create_user(f"user{i}")
+            data = {"user": user.pk, "event": event.pk, "motivation": "-", "status": Status.APPROVED}
+            self.assertEqual(self.client.post(url, data).status_code, 302)
+
+        event.refresh_from_db()
+        self.assertEqual(event.seats_taken, 1)
+        statuses = list(VolunteerApplication.objects.filter(event=event).order_by("pk").values_list("status", flat=True))
+        self.assertEqual(statuses, [Status.APPROVED, Status.WAITLISTED, Status.WAITLISTED])
+
+
+class LikesBatchTests(TestCase):
+    """Пакет лайков — фиксированное число запросов при любом размере пакета."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user("liker", password="x")
+        self.client.force_login(self.user)
+        self.events = [make_event(title=f"Событие {i}") for i in range(100)]
+
+    def _post(self, operations: list[dict]):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("likes_batch"), {"operations": operations}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"], len(queries)
+
+    def test_batch_applies_last_operation_per_event(self) -> None:
+        first, second = self.events[:2]
+        EventLike.objects.create(user=self.user, event=second)
+        results, _ = self._post([
+            {"event": first.pk, "action": "like"},
+            {"event": second.pk, "action": "unlike"},
+            {"event": first.pk, "action": "unlike"},
+            {"event": first.pk, "action": "like"},
+            {"event": 10**9, "action": "like"},
+        ])
+        self.assertEqual(results, [
+            {"event": first.pk, "liked": True, "likes_count": 1},
+            {"event": second.pk, "liked": False, "likes_count": 0},
+            {"event": 10**9, "error": "not_found"},
+        ])
+        self.assertEqual(list(EventLike.objects.filter(user=self.user).values_list("event_id", flat=True)), [first.pk])
+        self.assertTrue(Tombstone.objects.filter(kind=Tombstone.Kind.LIKE).exists())
+        self.assertEqual(get_volunteer_stats(self.user).likes_count, 1)
+
+    def test_query_count_does_not_grow_with_batch(self) -> None:
+        _, small = self._post([{"event": e.pk, "action": "like"} for e in self.events[:3]])
+        _, large = self._post([{"event": e.pk, "action": "like" if i % 2 else "unlike"} for i, e in enumerate(self.events)])
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, settings.PERF_QUERY_BUDGETS["likes_batch"])
+        self.assertEqual(
+            list(Event.objects.filter(pk__in=[e.pk for e in self.events]).order_by("pk").values_list("likes_count", flat=True)),
+            [i % 2 for i in range(100)],
+        )
+
+
+class VolunteerStatsTests(TestCase):
+    """Сводка кабинета заводится вместе с пользователем; без строки — считается под блокировкой."""
+
+    def test_row_created_with_user(self) -> None:
+        user = User.objects.create_user("newcomer", password="x")
+        self.assertTrue(VolunteerStats.objects.filter(user=user).exists())
+
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse("my_dashboard")).status_code, 200)
+        self.assertLessEqual(len(queries), settings.PERF_QUERY_BUDGETS["my_dashboard"])
+
+    def test_missing_row_is_counted(self) -> None:
+        user = User.objects.create_user("legacy")
+        event = make_event()
+        submit_application(user, event, "-")
+        EventLike.objects.create(user=user, event=event)
+        VolunteerStats.objects.filter(user=user).delete()
+
+        stats = get_volunteer_stats(user)
+        self.assertEqual((stats.applications_new, stats.likes_count), (1, 1))
+        self.assertEqual(VolunteerStats.objects.filter(user=user).count(), 1)
+
+
+@override_settings(PERF_BUDGET_STRICT=True)
+class QueryBudgetTests(TransactionTestCase):
+    """
+    Каждая вьюха из PERF_QUERY_BUDGETS укладывается в свой бюджет (превышение —
+    QueryBudgetExceeded). TransactionTestCase: в TestCase каждый atomic() — лишние
+    SAVEPOINT/RELEASE, которых нет в бою.
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        registry.reset()
+        self.volunteer = User.objects.create_user("volunteer", password="x")
+        self.admin = User.objects.create_superuser("admin", password="x")
+        others = [User.objects.create_user(f"other{i}") for i in range(3)]
+        self.events = [make_event(title=f"Уборка парка {i}", capacity=2) for i in range(5)]
+        for event in self.events[:3]:
+            for user in [self.volunteer, *others]:
+                submit_application(user, event, "-")
+                EventLike.objects.create(user=user, event=event)
+        VolunteerApplication.objects.filter(event=self.events[0]).delete()
+        EventLike.objects.filter(event=self.events[1]).delete()
+
+    def _get(self, url: str, **params) -> None:
+        response = self.client.get(url, params)
+        self.assertLess(response.status_code, 400, url)
+        if response.streaming:
+            b"".join(response.streaming_content)
+
+    def _post(self, url: str, data=None, **kwargs) -> None:
+        response = self.client.post(url, data, **kwargs)
+        self.assertLess(response.status_code, 400, url)
+        if response.streaming:
+            b"".join(response.streaming_content)
+
+    def test_public_pages(self) -> None:
+        event = self.events[2]
+        for _ in ("guest", "volunteer"):
+            self._get(reverse("event_list"))
+            self._get(reverse("event_list"), sort="trending")
+            self._get(reverse("event_detail", args=[event.pk]))
+            self._get(reverse("event_search"), q="уборка")
+            self.client.force_login(self.volunteer)
+
+    def test_volunteer_actions(self) -> None:
+        self.client.force_login(self.volunteer)
+        fresh = self.events[4]
+        self._get(reverse("apply_to_event", args=[fresh.pk]))
+        self._post(reverse("apply_to_event", args=[fresh.pk]), {"motivation": "Хочу помочь"})
+        self._post(reverse("toggle_like", args=[fresh.pk]))
+        self._post(reverse("toggle_like_json", args=[fresh.pk]))
+        operations = [{"event": e.pk, "action": "like"} for e in self.events]
+        self._post(reverse("likes_batch"), {"operations": operations}, content_type="application/json")
+        self._get(reverse("my_dashboard"))
+
+    def test_staff_pages(self) -> None:
+        self.client.force_login(self.admin)
+        for kind in Tombstone.Kind.values:
+            self._get(reverse("changes_feed", args=[kind]))
+        for model in ("event", "volunteerapplication", "eventlike", "applicationstatuschange"):
+            self._get(reverse(f"admin:core_{model}_changelist"))
+        self._get(reverse("admin:export_xlsx"))
+        self._post(reverse("admin:export_xlsx"), {"model": "core.Event", "format": "csv", "download": "1"})
+
+    def test_every_budget_is_exercised(self) -> None:
+        self.test_public_pages()
+        self.test_volunteer_actions()
+        self.test_staff_pages()
+        self.assertLessEqual(set(settings.PERF_QUERY_BUDGETS), set(registry.snapshot()))
+
+
+class ExportRowsTests(TestCase):
+    """Скомпилированные колонки выгрузки дают те же ячейки, что эталонный lookup_field."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin = User.objects.create_superuser("admin", password="x")
+        volunteers = [User.objects.create_user(f"volunteer{i}") for i in range(3)]
+        events = [make_event(title="Без лимита"), make_event(title="На двоих", capacity=2, location="")]
+        for event in events:
+            for user in volunteers:
+                submit_application(user, event, "-")
+                EventLike.objects.create(user=user, event=event)
+
+    def test_every_export_model_matches_lookup_field(self) -> None:
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        for label, model_admin in get_export_model_admins().items():
+            columns, _ = get_admin_columns_and_headers(request, model_admin)
+            # только поля — путь values_list; с "__str__" — путь по объектам
+            for variant in (columns, [*columns, "__str__"]):
+                with self.subTest(model=label, columns=variant):
+                    qs = get_export_queryset(request, model_admin, variant)
+                    rows = list(iter_admin_rows(model_admin, qs, variant, chunk_size=2))
+                    self.assertTrue(rows)
+                    self.assertEqual(rows, list(iter_admin_rows_lookup(model_admin, qs, variant)))
+
+    @override_settings(EXPORT_PARQUET_ROW_GROUP_SIZE=2)
+    def test_parquet_columns_match_rows(self) -> None:
+        import pyarrow.parquet as pq
+
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        model_admin = get_export_model_admins()["core.VolunteerApplication"]
+        columns, headers = get_admin_columns_and_headers(request, model_admin)
+        rows = list(iter_admin_rows(model_admin, get_export_queryset(request, model_admin, columns), columns))
+        with build_export_file(get_exporter("parquet"), "applications", columns, headers, rows) as result:
+            parquet = pq.ParquetFile(result)
+            table = parquet.read()
+            self.assertEqual(parquet.metadata.num_row_groups, 3)
+        self.assertEqual(table.column_names, columns)
+        self.assertEqual(json.loads(table.schema.metadata[b"headers"]), dict(zip(columns, headers)))
+        expected = [[None if value == "" else str(value) for value in row] for row in rows]
+        self.assertEqual([list(row.values()) for row in table.to_pylist()], expected)
+
+
+class EventStateQueriesTests(TestCase):
+    """Состояние «лайкнул / подал заявку» на страницах — фиксированное число запросов при любом размере страницы."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user("volunteer", password="x")
+
+    def _add_events(self, count: int) -> list[Event]:
+        events = [make_event(title=f"Событие {Event.objects.count()}") for _ in range(count)]
+        for event in events[::2]:
+            submit_application(self.user, event, "-")
+            EventLike.objects.create(user=self.user, event=event)
+        return events
+
+    def _get(self, url: str, queries: int):
+        cache.clear()  # гостевые страницы — мимо кэша страниц, полный путь вьюхи
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_does_not_depend_on_page_size(self) -> None:
+        for count in (3, settings.EVENTS_PAGE_SIZE):
+            events = self._add_events(count)
+            with self.subTest(events=Event.objects.count()):
+                self.client.logout()
+                self._get(reverse("event_list"), 4)
+                self._get(reverse("event_detail", args=[events[0].pk]), 2)
+
+                self.client.force_login(self.user)
+                response = self._get(reverse("event_list"), 6)
+                shown = response.context["events"]
+                self.assertEqual(len(shown), min(Event.objects.count(), settings.EVENTS_PAGE_SIZE))
+                for event in shown:
+                    applied = VolunteerApplication.objects.filter(user=self.user, event=event).first()
+                    self.assertEqual(event.liked, EventLike.objects.filter(user=self.user, event=event).exists())
+                    self.assertEqual(event.my_application_status, applied.status if applied else None)
+
+                response = self._get(reverse("event_detail", args=[events[0].pk]), 4)
+                self.assertTrue(response.context["event"].liked)
+                self._get(reverse("my_dashboard"), 7)
+
+
+class LargeTableChangelistQueriesTests(TestCase):
+    """Списки LargeTableAdmin на данных seed_bulk: число запросов не растёт с таблицей."""
+
+    # url name -> запросов без фильтров при точном COUNT(*) (сессия, пользователь,
+    # страница, подписи FK — через list_select_related, счётчики)
+    QUERIES = {
+        "admin:core_event_changelist": 6,
+        "admin:core_volunteerapplication_changelist": 5,
+        "admin:core_eventlike_changelist": 5,
+        "admin:core_applicationstatuschange_changelist": 5,
+    }
+
+    def setUp(self) -> None:
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+
+    def _seed(self, scale: int, prefix: str) -> None:
+        call_command(
+            "seed_bulk", categories=3, events=10 * scale, users=20 * scale, likes=100 * scale,
+            applications=60 * scale, batch_size=25, prefix=prefix, stdout=StringIO(),
+        )
+        ids = VolunteerApplication.objects.filter(status=Status.NEW).values_list("pk", flat=True)[: 10 * scale]
+        moderate_applications(list(ids), Status.REJECTED)
+
+    def _variants(self, model_admin: LargeTableAdmin) -> list[tuple[str, int]]:
+        # (query string, запросов сверх базовых)
+        variants = [("", 0)]
+        if any(isinstance(f, type) and issubclass(f, AutocompleteFilter) for f in model_admin.list_filter):
+            event = VolunteerApplication.objects.values_list("event_id", flat=True).first()
+            variants.append((f"event__id__exact={event}", 1))  # выбранное мероприятие в поле фильтра
+        if model_admin.search_fields:
+            variants += [("q=bulk", 0), ("q=волонт", 0)]
+        return variants
+
+    def test_every_large_table_changelist(self) -> None:
+        large = {
+            f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist": model_admin
+            for model, model_admin in admin.site._registry.items()
+            if isinstance(model_admin, LargeTableAdmin)
+        }
+        self.assertEqual(set(large), set(self.QUERIES))
+
+        for scale, prefix in ((1, "small"), (3, "large")):
+            self._seed(scale, prefix)
+            for url_name, model_admin in large.items():
+                for query, extra in self._variants(model_admin):
+                    # оценка по статистике PostgreSQL вместо COUNT(*) — на запрос меньше
+                    for threshold, saved in ((10**9, 0), (0, 1)):
+                        expected = self.QUERIES[url_name] + extra - saved
+                        with self.subTest(url_name, query=query, threshold=threshold, scale=scale):
+                            with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=threshold), self.assertNumQueries(expected):
+                                response = self.client.get(f"{reverse(url_name)}?{query}")
+                            self.assertEqual(response.status_code, 200)
+                            self.assertLessEqual(expected, settings.PERF_QUERY_BUDGETS[url_name])
+                            if not query:
+                                self.assertTrue(response.context["cl"].result_list)
+
+
+class TrendingScoreTests(TestCase):
+    """Рейтинг «в тренде» хранится в log2: нет переполнения double при коротком полураспаде."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        now = timezone.now()
+        volunteers = [User.objects.create_user(f"volunteer{i}") for i in range(4)]
+        cls.events = [make_event(title=f"Событие {i}") for i in range(3)]
+        # лайки и заявки за два года: при полураспаде 6 ч это ~3000 периодов
+        ages = {cls.events[0]: [0.5, 2, 700], cls.events[1]: [1, 1.5], cls.events[2]: [30, 400, 720]}
+        for event, days in ages.items():
+            for user, age in zip(volunteers, days):
+                like = EventLike.objects.create(user=user, event=event)
+                EventLike.objects.filter(pk=like.pk).update(created_at=now - timedelta(days=age))
+        submit_application(volunteers[0], cls.events[2], "-")
+        VolunteerApplication.objects.update(created_at=now - timedelta(days=3))
+
+    def _expected(self) -> dict[int, float]:
+        half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+        rows = [(e, settings.TRENDING_LIKE_WEIGHT, t) for e, t in EventLike.objects.values_list("event_id", "created_at")]
+        rows += [(e, settings.TRENDING_APPLICATION_WEIGHT, t) for e, t in VolunteerApplication.objects.values_list("event_id", "created_at")]
+        exponents: dict[int, list[float]] = {}
+        for event_id, weight, created_at in rows:
+            exponents.setdefault(event_id, []).append(math.log2(weight) + created_at.timestamp() / half_life)
+        return {
+            event_id: max(xs) + math.log2(sum(2 ** (x - max(xs)) for x in xs))
+            for event_id, xs in exponents.items()
+        }
+
+    @override_settings(TRENDING_HALF_LIFE_HOURS=6)
+    def test_short_half_life_incremental_equals_rebuild(self) -> None:
+        update_popularity(batch_size=1)
+        incremental = dict(EventPopularity.objects.values_list("event_id", "score"))
+        rebuild_popularity()
+        rebuilt = dict(EventPopularity.objects.values_list("event_id", "score"))
+
+        expected = self._expected()
+        self.assertEqual(set(rebuilt), set(expected))
+        for event_id, score in expected.items():
+            self.assertAlmostEqual(incremental[event_id], score, places=6)
+            self.assertAlmostEqual(rebuilt[event_id], score, places=6)
+        self.assertEqual(max(rebuilt, key=rebuilt.get), self.events[0].pk)
+
+    def test_invalid_half_life_is_rejected_before_rebuild(self) -> None:
+        update_popularity()
+        scores = dict(EventPopularity.objects.values_list("event_id", "score"))
+        for hours in (0, -6, float("nan"), float("inf")):
+            with self.subTest(hours=hours), override_settings(TRENDING_HALF_LIFE_HOURS=hours):
+                with self.assertRaises(ImproperlyConfigured):
+                    rebuild_popularity()
+        self.assertEqual(dict(EventPopularity.objects.values_list("event_id", "score")), scores)
+
+    def test_relike_adds_no_score(self) -> None:
+        user = User.objects.get(username="volunteer0")
+        event = self.events[1]
+        update_popularity()
+        score = EventPopularity.objects.get(event=event).score
+        for _ in range(5):
+            self.assertTrue(set_like(user, event.pk, False))
+            self.assertTrue(set_like(user, event.pk, True))
+            EventLike.objects.filter(user=user, event=event).update(created_at=timezone.now() - timedelta(hours=1))
+            update_popularity()
+        self.assertEqual(EventPopularity.objects.get(event=event).score, score)
+
+    def test_failed_rebuild_keeps_previous_scores(self) -> None:
+        update_popularity()
+        scores = dict(EventPopularity.objects.values_list("event_id", "score"))
+        with mock.patch("core.trending._process_batch", side_effect=[(None, 0), RuntimeError("boom")]):
+            with self.assertRaises(RuntimeError):
+                rebuild_popularity()
+        self.assertEqual(dict(EventPopularity.objects.values_list("event_id", "score")), scores)
+        self.assertEqual(TrendingWatermark.objects.count(), len(SOURCES))
+
+
+@override_settings(CHANGES_FEED_LAG_SECONDS=0)
+class ChangesFeedStreamingTests(TestCase):
+    """Под ASGI лента изменений отдаётся асинхронным потоком, а не собирается в памяти целиком."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.staff = User.objects.create_user("partner", password="x", is_staff=True)
+        cls.events = [make_event(title=f"Событие {i}") for i in range(5)]
+
+    async def test_asgi_response_is_async_stream(self) -> None:
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse("changes_feed", args=["events"]), {"limit": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        payload = json.loads(b"".join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual([row["id"] for row in payload["results"]], [event.pk for event in self.events[:3]])
+        self.assertTrue(payload["has_more"])
+
+    def test_wsgi_response_is_sync_stream(self) -> None:
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("changes_feed", args=["events"]))
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(json.loads(b"".join(response.streaming_content))["results"]), len(self.events))
+
+
+@override_settings(CHANGES_FEED_LAG_SECONDS=0, CHANGES_FEED_TOMBSTONE_RETENTION_DAYS=30)
+class TombstoneRetentionTests(TestCase):
+    """Tombstone чистятся по сроку хранения, курсор старше срока — 410 и полная синхронизация."""
+
+    def setUp(self) -> None:
+        self.client.force_login(User.objects.create_user("partner", password="x", is_staff=True))
+        now = timezone.now()
+        for kind in Tombstone.Kind.values:
+            for days in (1, 29, 31, 40, 400):
+                Tombstone.objects.create(kind=kind, object_id=days, deleted_at=now - timedelta(days=days))
+
+    def test_cleanup_deletes_only_expired_in_batches(self) -> None:
+        self.assertEqual(delete_expired_tombstones(batch_size=2), 9)
+        self.assertEqual(sorted(Tombstone.objects.values_list("object_id", flat=True).distinct()), [1, 29])
+        self.assertEqual(delete_expired_tombstones(batch_size=2), 0)
+
+    def test_invalid_retention_is_rejected(self) -> None:
+        with override_settings(CHANGES_FEED_TOMBSTONE_RETENTION_DAYS=0), self.assertRaises(ImproperlyConfigured):
+            delete_expired_tombstones(batch_size=2)
+        self.assertEqual(Tombstone.objects.count(), 15)
+
+    def _get(self, cursor_age: timedelta):
+        cursor = encode_cursor([timezone.now() - cursor_age, 0])
+        return self.client.get(reverse("changes_feed", args=["likes"]), {"cursor": cursor})
+
+    def test_cursor_older_than_retention_must_resync(self) -> None:
+        response = self._get(timedelta(days=31))
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json(), {"error": "cursor_expired"})
+
+        response = self._get(timedelta(days=29, hours=23))
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([row["id"] for row in payload["results"]], [29, 1])
+
+    def test_naive_cursor_is_invalid(self) -> None:
+        cursor = encode_cursor([timezone.now().replace(tzinfo=None).isoformat(), 0])
+        response = self.client.get(reverse("changes_feed", args=["likes"]), {"cursor": cursor})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EVENTS_PAGE_SIZE=4)
+class EventSearchPaginationTests(TestCase):
+    """Поиск листается курсором по (rank, id) без пропусков и повторов."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        # разная частота слова и длина описания — разные ts_rank, плюс одинаковые на стыках страниц
+        cls.matching = {
+            make_event(title=f"Событие {i}", description=" ".join(["парк"] * (i % 5 + 1) + ["уборка"] * (i % 7))).pk
+            for i in range(25)
+        }
+        make_event(title="Без совпадений", description="набережная", location="Набережная")
+
+    def test_walks_every_page(self) -> None:
+        seen: list[int] = []
+        params = {"q": "парк"}
+        for _ in range(len(self.matching)):
+            cache.clear()  # повтор того же курсора не должен прятаться за кэшем страниц
+            response = self.client.get(reverse("event_search"), params)
+            self.assertEqual(response.status_code, 200)
+            page = response.context["page"]
+            seen += [event.pk for event in page.items]
+            if not page.has_next:
+                break
+            self.assertTrue(page.items)
+            params["cursor"] = page.next_cursor
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), self.matching)
+
+
+class AssetBundleTests(TestCase):
+    """Бандлы собираются из закоммиченных assets/vendor/ и своих стилей, без сети и CDN."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.build_dir = Path(tmp.name) / "dist"
+        patcher = mock.patch.object(assets, "BUILD_DIR", self.build_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bundles_contain_vendored_bootstrap(self) -> None:
+        sizes = assets.build_bundles()
+        self.assertEqual(set(sizes), set(assets.BUNDLES))
+        css = (self.build_dir / "app.css").read_text(encoding="utf-8")
+        self.assertIn("Bootstrap  v5.3.8", css)
+        self.assertIn(".text-truncate-3", css)  # static/css/app.css
+        self.assertNotIn("sourceMappingURL", css)
+        self.assertIn("Bootstrap v5.3.8", (self.build_dir / "app.js").read_text(encoding="utf-8"))
+
+    def test_tampered_vendor_file_is_rejected(self) -> None:
+        vendor_dir = Path(tempfile.mkdtemp(dir=self.build_dir.parent))
+        for vendor in assets.VENDOR_FILES:
+            (vendor_dir / vendor.path).parent.mkdir(parents=True, exist_ok=True)
+            (vendor_dir / vendor.path).write_bytes((assets.VENDOR_DIR / vendor.path).read_bytes() + b"\n")
+        with mock.patch.object(assets, "VENDOR_DIR", vendor_dir), self.assertRaises(assets.AssetError):
+            assets.build_bundles()
+
+    def test_pages_do_not_load_cdn(self) -> None:
+        body = self.client.get(reverse("event_list")).content.decode()
+        self.assertNotIn("cdn.", body)
+        self.assertIn("dist/app.css", body)
+
+
+class ImageVariantsAlphaTests(TestCase):
+    """Прозрачность исходника сохраняется в AVIF/WebP, JPEG — на белом фоне."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(MEDIA_ROOT=tmp.name, IMAGE_VARIANT_WIDTHS=[64])
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _variants(self, image: Image.Image) -> dict[str, Image.Image]:
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        name = default_storage.save("events/logo.png", ContentFile(buffer.getvalue()))
+        files = generate_variants(name)["widths"]["64"]
+        result = {}
+        for key, path in files.items():
+            with default_storage.open(path, "rb") as fh, Image.open(fh) as variant:
+                variant.load()
+                result[key] = variant
+        return result
+
+    def test_transparent_png(self) -> None:
+        image = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+        image.paste((200, 30, 30, 255), (0, 0, 32, 64))
+        for key, variant in self._variants(image).items():
+            with self.subTest(format=key):
+                if key == "jpeg":
+                    self.assertEqual(variant.mode, "RGB")
+                    self.assertTrue(all(c > 240 for c in variant.getpixel((56, 32))))
+                else:
+                    self.assertEqual(variant.mode, "RGBA")
+                    self.assertEqual(variant.getpixel((56, 32))[3], 0)
+                    self.assertGreater(variant.getpixel((8, 32))[3], 250)
+
+    def test_opaque_image_stays_rgb(self) -> None:
+        for key, variant in self._variants(Image.new("RGB", (64, 64), (10, 120, 10))).items():
+            with self.subTest(format=key):
+                self.assertEqual(variant.mode, "RGB")
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EventLike, EventPopularity, TrendingContribution, TrendingWatermark, VolunteerApplication
+
+# Вклад события в момент t — вес × 2^(t / полураспад) (t — секунды Unix-эпохи).
+# Отношение баллов двух мероприятий от «текущего момента» не зависит, поэтому
+# хранится сумма без ежедневного пересчёта, а новые лайки просто прибавляются.
+# Сама сумма в double переполнилась бы через ~1000 периодов полураспада, поэтому
+# в EventPopularity.score лежит её log2: показатель — t / полураспад плюс log2(вес),
+# сложение — log-sum-exp, порядок мероприятий тот же.
+# Каждая пара (пользователь, мероприятие) даёт вклад от источника один раз
+# (TrendingContribution): снятый и снова поставленный лайк — новая строка с новым
+# id, но баллы не растут. Снятие лайка свой вклад не отнимает, он просто затухает.
+
+# разница показателей, за которой меньшее слагаемое уже не меняет сумму в double;
+# заодно power() не уходит в underflow (в PostgreSQL это ошибка, а не ноль)
+_NEGLIGIBLE = -1000.0
+_LOG2 = "ln(2.0::float8)"
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    model: type
+    weight_setting: str
+
+
+SOURCES = (
+    Source("likes", EventLike, "TRENDING_LIKE_WEIGHT"),
+    Source("applications", VolunteerApplication, "TRENDING_APPLICATION_WEIGHT"),
+)
+
+
+def half_life_seconds() -> float:
+    hours = settings.TRENDING_HALF_LIFE_HOURS
+    # t / полураспад должен оставаться конечным числом в double с точностью до долей периода
+    if not math.isfinite(hours) or hours * 3600.0 < 1e-3:
+        raise ImproperlyConfigured(f"TRENDING_HALF_LIFE_HOURS must be a positive number of hours, got {hours!r}")
+    return hours * 3600.0
+
+
+def source_weight(source: Source) -> float:
+    weight = float(getattr(settings, source.weight_setting))
+    if not math.isfinite(weight) or weight < 0:
+        raise ImproperlyConfigured(f"{source.weight_setting} must be a non-negative number, got {weight!r}")
+    return weight
+
+
+def _check_settings() -> None:
+    # неверные настройки — ошибка до первой транзакции, а не посреди пачек или после удаления рейтинга
+    half_life_seconds()
+    for source in SOURCES:
+        source_weight(source)
+
+
+def _sql_names(source: Source) -> dict[str, str]:
+    qn = connection.ops.quote_name
+    return {
+        "rows": qn(source.model._meta.db_table),
+        "popularity": qn(EventPopularity._meta.db_table),
+        "contributions": qn(TrendingContribution._meta.db_table),
+    }
+
+
+def _process_batch(source: Source, last_id: int, cutoff: datetime, batch_size: int) -> tuple[int | None, int]:
+    """
+    Одним оператором: следующие batch_size строк источника после last_id
+    (по id) прибавляются к баллам. Пачка обрывается на первой строке моложе
+    cutoff: её транзакция могла ещё не закоммитить соседние id, и водяной знак
+    не должен их перескочить. Баллы дают только пары (пользователь, мероприятие),
+    впервые попавшие в TrendingContribution. Возвращает (новый last_id или None, строк).
+    """
+    sql = """
+        WITH candidates AS (
+            SELECT id, user_id, event_id, created_at FROM {rows}
+            WHERE id > %(last_id)s
+            ORDER BY id
+            LIMIT %(batch_size)s
+        ), fresh AS (
+            SELECT min(id) AS id FROM candidates WHERE created_at >= %(cutoff)s
+        ), batch AS (
+            SELECT * FROM candidates
+            WHERE (SELECT id FROM fresh) IS NULL OR id < (SELECT id FROM fresh)
+        ), counted AS (
+            -- уже дававшие вклад пары (повторный лайк) RETURNING не вернёт
+            INSERT INTO {contributions} (source, user_id, event_id)
+            SELECT %(source)s, user_id, event_id FROM batch
+            ON CONFLICT DO NOTHING
+            RETURNING user_id, event_id
+        ), contributions AS (
+            -- log2 вклада; нулевой вес — строки учитываются водяным знаком, но баллов не дают
+            SELECT batch.event_id, %(log_weight)s + extract(epoch FROM batch.created_at)::float8 / %(half_life)s AS x
+            FROM batch
+            JOIN counted ON counted.user_id = batch.user_id AND counted.event_id = batch.event_id
+            WHERE %(weight)s > 0
+        ), upserted AS (
+            INSERT INTO {popularity} (event_id, score, updated_at)
+            SELECT event_id, m + ln(sum(power(2.0::float8, GREATEST(x - m, %(negligible)s)))) / {log2}, %(now)s
+            FROM (SELECT event_id, x, max(x) OVER (PARTITION BY event_id) AS m FROM contributions) AS c
+            GROUP BY event_id, m
+            ON CONFLICT (event_id) DO UPDATE
+            SET score = GREATEST({popularity}.score, EXCLUDED.score)
+                        + ln(1 + power(2.0::float8, GREATEST(
+                            -abs({popularity}.score - EXCLUDED.score), %(negligible)s
+                        ))) / {log2},
+                updated_at = EXCLUDED.updated_at
+        )
+        SELECT (SELECT max(id) FROM batch), (SELECT count(*) FROM batch)
+    """.format(**_sql_names(source), log2=_LOG2)
+    weight = source_weight(source)
+    params = {
+        "source": source.name,
+        "last_id": last_id,
+        "batch_size": batch_size,
+        "cutoff": cutoff,
+        "weight": weight,
+        "log_weight": math.log2(weight) if weight > 0 else 0.0,
+        "half_life": half_life_seconds(),
+        "negligible": _NEGLIGIBLE,
+        "now": timezone.now(),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+
+def update_popularity(batch_size: int | None = None) -> dict[str, int]:
+    """
+    Добавляет к EventPopularity только строки новее водяного знака каждого
+    источника. Пачки — отдельные короткие транзакции; строка водяного знака
+    блокируется, поэтому параллельные запуски не посчитают строки дважды.
+    Возвращает {источник: учтено строк}.
+    """
+    batch_size = batch_size or settings.TRENDING_BATCH_SIZE
+    _check_settings()
+    cutoff = timezone.now() - timedelta(seconds=settings.TRENDING_LAG_SECONDS)
+    processed = {}
+    for source in SOURCES:
+        processed[source.name] = 0
+        while True:
+            with transaction.atomic():
+                TrendingWatermark.objects.get_or_create(source=source.name)
+                mark = TrendingWatermark.objects.select_for_update().get(source=source.name)
+                upto, count = _process_batch(source, mark.last_id, cutoff, batch_size)
+                if upto is None:
+                    break
+                mark.last_id = upto
+                mark.save(update_fields=["last_id", "updated_at"])
+            processed[source.name] += count
+            if count < batch_size:
+                break
+    return processed
+
+
+def rebuild_popularity(batch_size: int | None = None) -> dict[str, int]:
+    """
+    Пересчёт с нуля (после смены весов/полураспада или чтобы учесть снятые лайки).
+    Удаление и все пачки — одна транзакция: до коммита лента «в тренде» читает
+    прежний рейтинг, а не пустой или наполовину пересчитанный.
+    """
+    _check_settings()
+    with transaction.atomic():
+        EventPopularity.objects.all().delete()
+        TrendingWatermark.objects.all().delete()
+        TrendingContribution.objects.all().delete()
+        return update_popularity(batch_size)
@@ -1,13 +1,25 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 
 from . import views
 
+# VIEW_MODE=async — страницы только для чтения обслуживают async-вьюхи
+# (имена маршрутов те же, чтобы метрики и бюджеты запросов были сравнимы)
+if settings.VIEW_MODE == "async":
+    event_list_view, event_detail_view = views.aevent_list, views.aevent_detail
+else:
+    event_list_view, event_detail_view = views.event_list, views.event_detail
+
 urlpatterns = [
-    path("", views.event_list, name="event_list"),
-    path("events/<int:pk>/", views.event_detail, name="event_detail"),
+    path("", event_list_view, name="event_list"),
+    path("search/", views.event_search, name="event_search"),
+    path("events/<int:pk>/", event_detail_view, name="event_detail"),
     path("events/<int:pk>/apply/", views.apply_to_event, name="apply_to_event"),
     path("events/<int:pk>/like/", views.toggle_like, name="toggle_like"),
+    path("api/events/<int:pk>/like/", views.toggle_like_json, name="toggle_like_json"),
+    path("api/likes/batch/", views.likes_batch, name="likes_batch"),
+    path("api/changes/<str:kind>/", views.changes_feed, name="changes_feed"),
 
     path("signup/", views.signup, name="signup"),
     path("login/", auth_views.LoginView.as_view(template_name="auth/login.html"), name="login"),
@@ -1,15 +1,34 @@
 from __future__ import annotations
 
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.http import require_POST
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET, require_POST
 
-from .forms import SignUpForm, VolunteerApplicationForm
+from . import services
+from .cache import attach_card_cache_keys, cache_anonymous_page
+from .changes import FEEDS, ChangePage, CursorExpired, iter_json
+from .counters import get_volunteer_stats
+from .db_routers import replica_reads
+from .exports import aiter_chunks
+from .http_cache import conditional_page, event_detail_etag, event_list_etag
+from .forms import EventFilterForm, EventSearchForm, SignUpForm, VolunteerApplicationForm
+from .loaders import get_event_state_loader
 from .models import Event, VolunteerApplication, EventLike
+from .moderation import submit_application, waitlist_position
+from .pagination import InvalidCursor, apaginate_keyset, paginate_keyset
+from .search import search_events, web_query, with_headline
 
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
@@ -17,39 +36,88 @@ from django.shortcuts import render
 def custom_404_view(request: HttpRequest, exception) -> HttpResponse:
     return render(request, "errors/404.html", status=404)
 
+def _event_list_filters(filter_form: EventFilterForm) -> tuple:
+    if filter_form.is_valid():
+        data = filter_form.cleaned_data
+        return data["category"], data["when"], data["sort"]
+    return None, EventFilterForm.WHEN_ALL, EventFilterForm.SORT_DATE
+
+
+def _event_list_queryset(category, when: str, sort: str) -> tuple[QuerySet[Event], tuple[str, ...], bool]:
+    """Лента с фильтрами, ключи keyset-пагинации и направление сортировки (descending)."""
+    # likes_count/applications_count — денормализованные колонки, без JOIN/COUNT
+    events = Event.objects.select_related("category")
+    if category is not None:
+        events = events.filter(category=category)
+
+    now = timezone.now()
+    if when == EventFilterForm.WHEN_UPCOMING:
+        events = events.filter(event_date__gte=now)
+    elif when == EventFilterForm.WHEN_PAST:
+        events = events.filter(event_date__lt=now)
+
+    if sort == EventFilterForm.SORT_TRENDING:
+        # рейтинг посчитан заранее (compute_trending): страница — один запрос по
+        # индексу (score, event_id) с JOIN, без агрегации лайков
+        events = events.select_related("popularity").filter(popularity__isnull=False)
+        return events, ("popularity__score", "id"), True
+
+    # предстоящие — ближайшие первыми, остальное — от новых к старым
+    return events, ("event_date", "id"), when != EventFilterForm.WHEN_UPCOMING
+
+
+def _redirect_without_cursor(request: HttpRequest) -> HttpResponse:
+    query = _without_cursor(request)
+    return redirect(f"{request.path}?{query}" if query else request.path)
+
+
+def _event_list_context(page, filter_form: EventFilterForm) -> dict:
+    return {
+        "events": page.items,
+        "page": page,
+        "filter_form": filter_form,
+        "card_cache_timeout": settings.PAGE_CACHE_TIMEOUT,
+    }
+
+
+@replica_reads
+@conditional_page(event_list_etag)
+@cache_anonymous_page
 def event_list(request: HttpRequest) -> HttpResponse:
     # Гость может смотреть список
-    events = (
-        Event.objects
-        .select_related("category")
-        .annotate(
-            likes_count=Count("likes", distinct=True),
-            applications_count=Count("applications", distinct=True),
+    filter_form = EventFilterForm(request.GET or None)
+    events, keys, descending = _event_list_queryset(*_event_list_filters(filter_form))
+
+    try:
+        page = paginate_keyset(
+            events,
+            keys=keys,
+            per_page=settings.EVENTS_PAGE_SIZE,
+            cursor=request.GET.get("cursor") or None,
+            descending=descending,
         )
-        .order_by("-event_date")
-    )
-    return render(request, "events/event_list.html", {"events": events})
+    except InvalidCursor:
+        return _redirect_without_cursor(request)
 
+    # лайк/статус заявки для всей страницы — один запрос (для гостя — ни одного)
+    get_event_state_loader(request).attach(page.items)
+    attach_card_cache_keys(page.items)
 
-def event_detail(request: HttpRequest, pk: int) -> HttpResponse:
-    event = (
-        Event.objects
-        .select_related("category")
-        .annotate(
-            likes_count=Count("likes", distinct=True),
-            applications_count=Count("applications", distinct=True),
-        )
-        .filter(pk=pk)
-        .first()
-    )
-    if not event:
-        event = get_object_or_404(Event, pk=pk)
+    return render(request, "events/event_list.html", _event_list_context(page, filter_form))
 
-    liked = False
-    application = None
-    if request.user.is_authenticated:
-        liked = EventLike.objects.filter(user=request.user, event=event).exists()
-        application = VolunteerApplication.objects.filter(user=request.user, event=event).first()
+
+def _without_cursor(request: HttpRequest) -> str:
+    query = request.GET.copy()
+    query.pop("cursor", None)
+    return query.urlencode()
+
+
+@replica_reads
+@conditional_page(event_detail_etag)
+@cache_anonymous_page
+def event_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    event = get_object_or_404(Event.objects.select_related("category"), pk=pk)
+    get_event_state_loader(request).attach([event])
 
     form = VolunteerApplicationForm()
     return render(
@@ -57,13 +125,94 @@ def event_detail(request: HttpRequest, pk: int) -> HttpResponse:
         "events/event_detail.html",
         {
             "event": event,
-            "liked": liked,
-            "application": application,
             "form": form,
         },
     )
 
 
+# --- async-варианты страниц только для чтения (VIEW_MODE=async, см. core/urls.py) ---
+# Запросы к данным идут через async ORM; то, что в Django пока синхронно
+# (сессия, сообщения, проверка категории формой, рендер шаблона), — через sync_to_async.
+
+
+@replica_reads
+@conditional_page(event_list_etag)
+@cache_anonymous_page
+async def aevent_list(request: HttpRequest) -> HttpResponse:
+    request.user = await request.auser()
+    filter_form = EventFilterForm(request.GET or None)
+    filters = await sync_to_async(_event_list_filters)(filter_form)
+    events, keys, descending = _event_list_queryset(*filters)
+
+    try:
+        page = await apaginate_keyset(
+            events,
+            keys=keys,
+            per_page=settings.EVENTS_PAGE_SIZE,
+            cursor=request.GET.get("cursor") or None,
+            descending=descending,
+        )
+    except InvalidCursor:
+        return _redirect_without_cursor(request)
+
+    await get_event_state_loader(request).aattach(page.items)
+    await sync_to_async(attach_card_cache_keys)(page.items)
+
+    return await sync_to_async(render)(request, "events/event_list.html", _event_list_context(page, filter_form))
+
+
+@replica_reads
+@conditional_page(event_detail_etag)
+@cache_anonymous_page
+async def aevent_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    request.user = await request.auser()
+    event = await aget_object_or_404(Event.objects.select_related("category"), pk=pk)
+    await get_event_state_loader(request).aattach([event])
+
+    return await sync_to_async(render)(
+        request,
+        "events/event_detail.html",
+        {
+            "event": event,
+            "form": VolunteerApplicationForm(),
+        },
+    )
+
+
+@replica_reads
+@cache_anonymous_page
+def event_search(request: HttpRequest) -> HttpResponse:
+    form = EventSearchForm(request.GET or None)
+    q = form.cleaned_data["q"].strip() if form.is_valid() else ""
+
+    page = None
+    if q:
+        query = web_query(q)
+        # WHERE по GIN-индексу search_vector, сортировка по релевантности
+        events = with_headline(search_events(Event.objects.select_related("category"), query), query)
+        try:
+            page = paginate_keyset(
+                events,
+                keys=("rank", "id"),
+                per_page=settings.EVENTS_PAGE_SIZE,
+                cursor=request.GET.get("cursor") or None,
+            )
+        except InvalidCursor:
+            return _redirect_without_cursor(request)
+        get_event_state_loader(request).attach(page.items)
+
+    return render(
+        request,
+        "events/search.html",
+        {
+            "form": form,
+            "q": q,
+            "page": page,
+            "events": page.items if page else [],
+        },
+    )
+
+
 @login_required
 def apply_to_event(request: HttpRequest, pk: int) -> HttpResponse:
     event = get_object_or_404(Event, pk=pk)
@@ -77,11 +226,19 @@ def apply_to_event(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method == "POST":
         form = VolunteerApplicationForm(request.POST)
         if form.is_valid():
-            obj = form.save(commit=False)
-            obj.user = request.user
-            obj.event = event
-            obj.save()
-            messages.success(request, "Заявка отправлена! Ожидайте решения организатора.")
+            application = submit_application(request.user, event, form.cleaned_data["motivation"])
+            if application is None:
+                # параллельный запрос (двойной клик) успел подать заявку первым
+                messages.info(request, "Вы уже подали заявку на это мероприятие.")
+            elif application.status == VolunteerApplication.Status.WAITLISTED:
+                position = waitlist_position(application)
+                messages.warning(
+                    request,
+                    f"Мест нет — вы в листе ожидания (позиция {position}). "
+                    "Освободится место — заявка перейдёт на рассмотрение автоматически.",
+                )
+            else:
+                messages.success(request, "Заявка отправлена! Ожидайте решения организатора.")
             return redirect("event_detail", pk=event.pk)
     else:
         form = VolunteerApplicationForm()
@@ -92,15 +249,100 @@ def apply_to_event(request: HttpRequest, pk: int) -> HttpResponse:
 @login_required
 @require_POST
 def toggle_like(request: HttpRequest, pk: int) -> HttpResponse:
-    event = get_object_or_404(Event, pk=pk)
-    like = EventLike.objects.filter(user=request.user, event=event).first()
-    if like:
-        like.delete()
-        messages.info(request, "Лайк убран.")
-    else:
-        EventLike.objects.create(user=request.user, event=event)
+    try:
+        liked, _ = services.toggle_like(request.user, pk)
+    except IntegrityError:
+        raise Http404("Мероприятие не найдено")
+
+    if liked:
         messages.success(request, "Спасибо за поддержку! Лайк добавлен.")
-    return redirect("event_detail", pk=event.pk)
+    else:
+        messages.info(request, "Лайк убран.")
+    return redirect("event_detail", pk=pk)
+
+
+@require_POST
+def toggle_like_json(request: HttpRequest, pk: int) -> JsonResponse:
+    """Переключение лайка без перерисовки страницы: отдаёт новое состояние и счётчик."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "authentication_required"}, status=401)
+
+    try:
+        liked, likes_count = services.toggle_like(request.user, pk)
+    except IntegrityError:
+        return JsonResponse({"error": "not_found"}, status=404)
+
+    return JsonResponse({"event": pk, "liked": liked, "likes_count": likes_count})
+
+
+@require_POST
+def likes_batch(request: HttpRequest) -> JsonResponse:
+    """
+    Пакетные лайки для офлайн-синхронизации мобильного клиента, одна транзакция:
+    {"operations": [{"event": 1, "action": "like"}, {"event": 2, "action": "unlike"}]}
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "authentication_required"}, status=401)
+
+    try:
+        payload = json.loads(request.body)
+        operations = [
+            (int(op["event"]), {"like": True, "unlike": False}[op["action"]])
+            for op in payload["operations"]
+        ]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"error": "invalid_payload"}, status=400)
+
+    if len(operations) > settings.LIKES_BATCH_MAX_OPERATIONS:
+        return JsonResponse({"error": "too_many_operations"}, status=400)
+
+    applied = services.apply_like_operations(request.user, operations)
+    results = []
+    for event_id in dict.fromkeys(event_id for event_id, _ in operations):
+        if event_id in applied:
+            liked, likes_count = applied[event_id]
+            results.append({"event": event_id, "liked": liked, "likes_count": likes_count})
+        else:
+            results.append({"event": event_id, "error": "not_found"})
+    return JsonResponse({"results": results})
+
+
+@require_GET
+def changes_feed(request: HttpRequest, kind: str) -> HttpResponse:
+    """
+    Лента изменений для партнёров (core/changes.py): ?cursor=...&limit=...
+    Записи после курсора по возрастанию (updated_at, id), удаления — op "delete".
+    Доступ — staff-сессия или заголовок Authorization: Bearer CHANGES_FEED_TOKEN.
+    """
+    token = settings.CHANGES_FEED_TOKEN
+    authorized = request.user.is_active and request.user.is_staff
+    if token and not authorized:
+        authorized = constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    if not authorized:
+        return JsonResponse({"error": "forbidden"}, status=403)
+
+    feed = FEEDS.get(kind)
+    if feed is None:
+        return JsonResponse({"error": "not_found"}, status=404)
+
+    try:
+        limit = int(request.GET.get("limit") or settings.CHANGES_FEED_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({"error": "invalid_limit"}, status=400)
+    limit = min(max(limit, 1), settings.CHANGES_FEED_MAX_PAGE_SIZE)
+
+    try:
+        page = ChangePage(feed, request.GET.get("cursor") or None, limit)
+    except InvalidCursor:
+        return JsonResponse({"error": "invalid_cursor"}, status=400)
+    except CursorExpired:
+        # удаления старше срока хранения уже стёрты — только полная синхронизация без курсора
+        return JsonResponse({"error": "cursor_expired"}, status=410)
+    chunks = iter_json(page)
+    if isinstance(request, ASGIRequest):
+        # под ASGI синхронный итератор Django сначала собрал бы в память целиком
+        chunks = aiter_chunks(chunks)
+    return StreamingHttpResponse(chunks, content_type="application/json")
 
 
 def signup(request: HttpRequest) -> HttpResponse:
@@ -120,13 +362,49 @@ def signup(request: HttpRequest) -> HttpResponse:
     return render(request, "auth/signup.html", {"form": form})
 
 
+def _dashboard_page(request: HttpRequest, queryset: QuerySet, param: str):
+    """Страница одной панели кабинета: свой курсор у каждой, битый курсор — первая страница."""
+    try:
+        return paginate_keyset(
+            queryset,
+            keys=("created_at", "id"),
+            per_page=settings.DASHBOARD_PAGE_SIZE,
+            cursor=request.GET.get(param) or None,
+        )
+    except InvalidCursor:
+        return paginate_keyset(queryset, keys=("created_at", "id"), per_page=settings.DASHBOARD_PAGE_SIZE)
+
+
 @login_required
 def my_dashboard(request: HttpRequest) -> HttpResponse:
-    applications = (
+    # сводка — одна строка VolunteerStats по первичному ключу, без COUNT по заявкам/лайкам
+    stats = get_volunteer_stats(request.user)
+    upcoming = list(
         VolunteerApplication.objects
-        .select_related("event", "event__category")
-        .filter(user=request.user)
-        .order_by("-created_at")
+        .select_related("event")
+        .filter(
+            user=request.user,
+            status__in=VolunteerApplication.SEAT_STATUSES,
+            event__event_date__gte=timezone.now(),
+        )
+        .order_by("event__event_date", "event_id")[: settings.DASHBOARD_UPCOMING]
+    )
+
+    # обе панели листаются независимо, по индексам (user, created_at, id)
+    applications = _dashboard_page(
+        request,
+        VolunteerApplication.objects.select_related("event", "event__category").filter(user=request.user),
+        "apps_cursor",
+    )
+    likes = _dashboard_page(
+        request,
+        EventLike.objects.select_related("event").filter(user=request.user),
+        "likes_cursor",
+    )
+
+    get_event_state_loader(request).attach([a.event for a in applications.items] + [l.event for l in likes.items])
+    return render(
+        request,
+        "profile/dashboard.html",
+        {"stats": stats, "upcoming": upcoming, "applications": applications, "likes": likes},
     )
-    likes = EventLike.objects.select_related("event").filter(user=request.user).order_by("-created_at")
-    return render(request, "profile/dashboard.html", {"applications": applications, "likes": likes})
@@ -0,0 +1,36 @@
+"""
+Конфигурация gunicorn (production-режим вместо runserver).
+
+SERVER_MODE=sync  — WSGI, воркеры gthread (процессы × потоки);
+SERVER_MODE=async — ASGI, воркеры uvicorn (по одному циклу событий на процесс).
+Число воркеров — по числу CPU, переопределяется WEB_CONCURRENCY.
+"""
+import multiprocessing
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", "sync")
+CPU_COUNT = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+if SERVER_MODE == "async":
+    wsgi_app = "volunteer_service.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    workers = int(os.getenv("WEB_CONCURRENCY", CPU_COUNT))
+else:
+    wsgi_app = "volunteer_service.wsgi:application"
+    worker_class = "gthread"
+    # классическая формула для воркеров, ждущих БД: 2 × CPU + 1
+    workers = int(os.getenv("WEB_CONCURRENCY", CPU_COUNT * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# перезапуск воркеров после N запросов — страховка от утечек памяти
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
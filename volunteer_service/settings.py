@@ -19,10 +19,13 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "core",
 ]
 
 MIDDLEWARE = [
+    "core.perf.PerformanceMiddleware",
+    "core.db_routers.PrimaryPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -54,17 +57,103 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "volunteer_service.wsgi.application"
 
-DATABASES = {
-    "default": {
+# Режим сервера (gunicorn.conf.py): sync — WSGI, gthread-воркеры; async — ASGI, uvicorn-воркеры.
+SERVER_MODE = os.getenv("SERVER_MODE", "sync")
+# Какие вьюхи обслуживают ленту и карточку мероприятия: sync или async (core/urls.py)
+VIEW_MODE = os.getenv("VIEW_MODE", SERVER_MODE)
+
+# Пул соединений psycopg 3 (по одному на процесс): поток/запрос берёт соединение
+# из пула и возвращает его в конце запроса. С пулом CONN_MAX_AGE должен быть 0.
+# Без пула (DB_POOL=0) — постоянные соединения на поток; в async-режиме ORM каждого
+# запроса работает в своём потоке, и они не переиспользуются — там пул нужнее всего.
+DB_POOL = os.getenv("DB_POOL", "1") == "1"
+
+
+def _database(host: str, port: str) -> dict:
+    options = {}
+    if DB_POOL:
+        options["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+    return {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": os.getenv("POSTGRES_DB", "volunteer_db"),
         "USER": os.getenv("POSTGRES_USER", "volunteer_user"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "volunteer_pass"),
-        "HOST": os.getenv("POSTGRES_HOST", "db"),
-        "PORT": int(os.getenv("POSTGRES_PORT", "5432")),
+        "HOST": host,
+        "PORT": int(port),
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "0" if SERVER_MODE == "async" else "60")),
+        "CONN_HEALTH_CHECKS": not DB_POOL,
+        "OPTIONS": options,
     }
+
+
+DATABASES = {
+    "default": _database(os.getenv("POSTGRES_HOST", "db"), os.getenv("POSTGRES_PORT", "5432")),
 }
 
+# Реплика только для чтения (потоковая репликация PostgreSQL): публичные страницы
+# читают с неё, см. core/db_routers.py
+POSTGRES_REPLICA_HOST = os.getenv("POSTGRES_REPLICA_HOST", "")
+if POSTGRES_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **_database(POSTGRES_REPLICA_HOST, os.getenv("POSTGRES_REPLICA_PORT", os.getenv("POSTGRES_PORT", "5432"))),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.db_routers.PrimaryReplicaRouter"]
+# Сколько секунд после записи (POST и т.п.) клиент читает только с primary:
+# свой лайк/заявку он увидит сразу, несмотря на отставание реплики
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "10"))
+
+# Кэш: по умолчанию в памяти процесса; CACHE_URL=file:///path — файловый,
+# CACHE_URL=redis://host:6379/0 — Redis (нужен пакет redis)
+CACHE_URL = os.getenv("CACHE_URL", "")
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
+elif CACHE_URL.startswith("file://"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_URL.removeprefix("file://"),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "volunteer"}}
+
+# Время жизни закэшированных гостевых страниц и карточек мероприятий, сек
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "300"))
+
+# Условный GET гостевых страниц ленты (core/http_cache.py): соль ETag — менять
+# с каждым релизом (вёрстка и хеши статики), сколько секунд общий прокси
+# отдаёт страницу без проверки (браузер проверяет всегда, max-age=0)
+HTTP_ETAG_SALT = os.getenv("HTTP_ETAG_SALT", "")
+HTTP_SHARED_MAX_AGE = int(os.getenv("HTTP_SHARED_MAX_AGE", "60"))
+
+# Хранилище сессий: db — таблица django_session (SELECT на каждый запрос с cookie);
+# cached_db — чтение из кэша, запись в БД (по умолчанию при общем кэше Redis);
+# cache — только кэш; signed_cookies — вся сессия в подписанной cookie, БД не нужна
+# (выход не отзывает уже выданную cookie — см. README).
+# locmem/file-кэш у каждого воркера свой, поэтому без Redis по умолчанию db.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "cached_db" if "RedisCache" in CACHES["default"]["BACKEND"] else "db")
+SESSION_ENGINE = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}[SESSION_BACKEND]
+
+# Flash-сообщения: cookie — только в cookie; session — в сессии (лишняя запись
+# django_session на каждый лайк/заявку); fallback — cookie, а не влезшее — в сессию
+MESSAGE_BACKEND = os.getenv("MESSAGE_BACKEND", "cookie")
+MESSAGE_STORAGE = {
+    "cookie": "django.contrib.messages.storage.cookie.CookieStorage",
+    "session": "django.contrib.messages.storage.session.SessionStorage",
+    "fallback": "django.contrib.messages.storage.fallback.FallbackStorage",
+}[MESSAGE_BACKEND]
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -80,17 +169,115 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# collectstatic: хеш содержимого в имени + .gz и .br (пакет Brotli) рядом с файлом;
+# WhiteNoise отдаёт хешированные файлы с Cache-Control: max-age=10 лет, immutable.
+# Фронтенд — бандлы static/dist/ из build_assets (core/assets.py).
+# Готовые выгрузки из админки (ExportJob.file) — вне MEDIA_ROOT: /media/ отдаётся
+# без авторизации, а выгрузки скачиваются только через вьюху админки с проверкой прав.
+EXPORT_ROOT = Path(os.getenv("EXPORT_ROOT", BASE_DIR / "private" / "exports"))
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+    "exports": {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": EXPORT_ROOT}},
+}
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Производные Event.image (core/images.py): ширины в px, качество JPEG/WebP,
+# число фоновых потоков на процесс (0 — строить синхронно после коммита)
+IMAGE_VARIANT_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1024").split(","))
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+# Cache-Control для /media/: файлы с хешем в имени — навсегда, остальные — MEDIA_MAX_AGE
+MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", "86400"))
+# Отдачу файлов /media/ можно передать прокси: "x-accel-redirect" (nginx,
+# internal-location с префиксом MEDIA_ACCEL_PREFIX) или "x-sendfile" (Apache/lighttpd).
+# Пусто — файл отдаёт Django (FileResponse, под gunicorn — через sendfile()).
+MEDIA_ACCEL = os.getenv("MEDIA_ACCEL", "").lower()
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/internal-media/")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Размер страницы ленты мероприятий (keyset-пагинация)
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "12"))
+
+# Кабинет волонтёра: строк на странице каждой панели (заявки, лайки)
+# и сколько ближайших мероприятий показывать в сводке
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "20"))
+DASHBOARD_UPCOMING = int(os.getenv("DASHBOARD_UPCOMING", "5"))
+
+# Экспорт из админки: размер чанка выборки и порог, после которого
+# временный файл выгрузки уходит из памяти на диск
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+EXPORT_SPOOL_MAX_SIZE = int(os.getenv("EXPORT_SPOOL_MAX_SIZE", str(10 * 1024 * 1024)))
+# строк в row group выгрузки Parquet (столько строк держится в памяти при записи)
+EXPORT_PARQUET_ROW_GROUP_SIZE = int(os.getenv("EXPORT_PARQUET_ROW_GROUP_SIZE", "50000"))
+# RUNNING-задача без прогресса дольше этого времени (сек) считается брошенной
+EXPORT_JOB_STALE_AFTER = int(os.getenv("EXPORT_JOB_STALE_AFTER", "600"))
+
+# Максимум операций в одном пакете /api/likes/batch/
+LIKES_BATCH_MAX_OPERATIONS = int(os.getenv("LIKES_BATCH_MAX_OPERATIONS", "500"))
+
+# Лента «в тренде» (core/trending.py, команда compute_trending): веса лайка и
+# заявки, период полураспада вклада в часах; строки моложе TRENDING_LAG_SECONDS
+# учитываются следующим запуском (их соседи по id могли ещё не закоммититься)
+TRENDING_LIKE_WEIGHT = float(os.getenv("TRENDING_LIKE_WEIGHT", "1"))
+TRENDING_APPLICATION_WEIGHT = float(os.getenv("TRENDING_APPLICATION_WEIGHT", "3"))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "72"))
+TRENDING_LAG_SECONDS = int(os.getenv("TRENDING_LAG_SECONDS", "30"))
+TRENDING_BATCH_SIZE = int(os.getenv("TRENDING_BATCH_SIZE", "50000"))
+
+# Ленты изменений /api/changes/<events|likes|applications>/ (core/changes.py):
+# токен партнёров (заголовок Authorization: Bearer ...; пусто — только staff),
+# записей на странице по умолчанию и максимум, строк за одно чтение из БД;
+# строки моложе CHANGES_FEED_LAG_SECONDS отдаются следующим запросом
+CHANGES_FEED_TOKEN = os.getenv("CHANGES_FEED_TOKEN", "")
+CHANGES_FEED_PAGE_SIZE = int(os.getenv("CHANGES_FEED_PAGE_SIZE", "1000"))
+CHANGES_FEED_MAX_PAGE_SIZE = int(os.getenv("CHANGES_FEED_MAX_PAGE_SIZE", "5000"))
+CHANGES_FEED_CHUNK_SIZE = int(os.getenv("CHANGES_FEED_CHUNK_SIZE", "500"))
+CHANGES_FEED_LAG_SECONDS = int(os.getenv("CHANGES_FEED_LAG_SECONDS", "30"))
+# сколько дней хранятся Tombstone (удаляет cleanup_tombstones); курсор старше —
+# 410 cursor_expired, партнёр делает полную синхронизацию заново
+CHANGES_FEED_TOMBSTONE_RETENTION_DAYS = int(os.getenv("CHANGES_FEED_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Экран модерации заявок в админке: заявок на странице и максимум заявок
+# в одной операции «все по фильтру»
+MODERATION_PAGE_SIZE = int(os.getenv("MODERATION_PAGE_SIZE", "200"))
+MODERATION_MAX_BATCH = int(os.getenv("MODERATION_MAX_BATCH", "20000"))
+
+# Changelist'ы больших таблиц в админке: начиная с этой оценки планировщика
+# число строк не пересчитывается точным COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", "10000"))
+
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "event_list"
 LOGOUT_REDIRECT_URL = "event_list"
 
+# Метрики запросов (core.perf): окно для p50/p95/p99 по каждой вьюхе,
+# бюджеты SQL-запросов по имени вьюхи; PERF_BUDGET_STRICT=1 превращает
+# превышение в исключение (для тестов/CI), иначе — предупреждение в лог.
+PERF_WINDOW = int(os.getenv("PERF_WINDOW", "1000"))
+PERF_QUERY_BUDGETS = {
+    "event_list": 6,
+    "event_detail": 5,
+    "event_search": 5,
+    "toggle_like": 4,
+    "toggle_like_json": 4,
+    "likes_batch": 8,
+    "changes_feed": 4,
+    "apply_to_event": 8,
+    "my_dashboard": 7,
+    "admin:export_xlsx": 6,
+    "admin:core_event_changelist": 6,
+    "admin:core_volunteerapplication_changelist": 6,
+    "admin:core_eventlike_changelist": 6,
+    "admin:core_applicationstatuschange_changelist": 5,
+}
+PERF_BUDGET_STRICT = os.getenv("PERF_BUDGET_STRICT", "0") == "1"
+# Токен для сбора /admin/perf/metrics/ Prometheus'ом без сессии администратора
+PERF_METRICS_TOKEN = os.getenv("PERF_METRICS_TOKEN", "")
+
 # Security headers (reasonable defaults)
 CSRF_COOKIE_SECURE = False
 SESSION_COOKIE_SECURE = False
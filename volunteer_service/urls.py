@@ -1,7 +1,6 @@
-from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
-from django.views.static import serve
+from core.media import serve_media
 from core.views import custom_404_view
 
 handler404 = custom_404_view
@@ -9,5 +8,5 @@ handler404 = custom_404_view
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("core.urls")),
-    path("media/<path:path>", serve, {"document_root": settings.MEDIA_ROOT}),
+    path("media/<path:path>", serve_media, name="media"),
 ]